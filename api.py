@@ -0,0 +1,163 @@
+"""
+Versioned JSON API for Convex Studio Inventory System
+Read-only /api/v1 endpoints for stock, orders, work projects, assignments
+and payments, enabled by FEATURE_FLAGS['api_endpoints'].
+
+    GET /api/v1/<resource>?fields=id,serial_number&limit=100&cursor=...&<filter>=...
+    GET /api/v1/<resource>/<id>?fields=...
+
+Requests need a signed-in session; payments are for admins only. Lists are
+keyset-paged by id. fields limits the columns returned. Every
+response carries an ETag derived from the resource's change counters, so an
+If-None-Match revalidation is answered with 304 without running the query,
+and larger bodies are gzip-compressed for clients that accept it.
+"""
+
+from flask import Blueprint, abort, jsonify, request, session
+
+from conditional import client_has, data_etag, gzip_response, not_modified, with_etag
+from config import get_items_per_page, is_feature_enabled
+from db import get_db
+from pagination import keyset_page
+from stock_search import STOCK_COLUMNS, build_filters as stock_filters
+
+API_VERSION = 1
+MAX_PAGE_SIZE = 500
+
+bp = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+
+def _equality_filters(filters):
+    """Filter builder for plain column = value filters: query parameter -> column"""
+    def build(args):
+        clauses, params = [], []
+        for name, column in filters.items():
+            value = args.get(name)
+            if value not in (None, ''):
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        return clauses, params
+    return build
+
+
+# resource -> (table, columns, tables its data comes from, filter builder); filters use indexed columns
+RESOURCES = {
+    'stock': ('stock', STOCK_COLUMNS, ('stock',), stock_filters),
+    'orders': ('orders', (
+        'id', 'item_type', 'capacity', 'quantity', 'storage_owner', 'disk_name', 'order_reason',
+        'storage_sent_to', 'sent_by', 'order_date', 'created_at',
+    ), ('orders',), _equality_filters({})),
+    'work_projects': ('work_projects', (
+        'id', 'client_name', 'referred_by', 'wedding_date', 'engagement_date', 'services', 'notes',
+        'status', 'created_at', 'updated_at', 'religion', 'custom_religion', 'christian_subcategory',
+        'requirements', 'sides', 'maduaram_veypu_date', 'maduaram_veypu_type', 'save_the_date',
+    ), ('work_projects',), _equality_filters({'status': 'status'})),
+    'assignments': ('work_assignments', (
+        'id', 'project_id', 'section', 'assignee', 'status', 'date_assigned', 'completed_date',
+        'rework_date', 'updated_at',
+    ), ('work_assignments',), _equality_filters({
+        'project_id': 'project_id', 'section': 'section', 'assignee': 'assignee',
+    })),
+    'payments': ('payment_details', (
+        'id', 'project_id', 'quoted_amount', 'discount', 'advance_amount', 'remaining_amount',
+    ), ('payment_details',), _equality_filters({'project_id': 'project_id'})),
+}
+
+# Resources only admins may read
+ADMIN_RESOURCES = {'payments'}
+
+ADMIN_ROLE = 'Admin Access'
+
+
+def api_error(status, message):
+    return jsonify({'error': message}), status
+
+
+@bp.before_request
+def require_api_access():
+    """The API exists only behind its feature flag and answers only signed-in staff"""
+    if not is_feature_enabled('api_endpoints'):
+        abort(404)
+    if 'user_id' not in session:
+        return api_error(401, 'Sign in required')
+    if (request.view_args or {}).get('resource') in ADMIN_RESOURCES and session.get('role') != ADMIN_ROLE:
+        return api_error(403, 'Forbidden')
+
+
+@bp.errorhandler(404)
+def not_found(error):
+    return api_error(404, 'Not found')
+
+
+@bp.errorhandler(400)
+def bad_request(error):
+    return api_error(400, error.description)
+
+
+def resource_or_404(name):
+    if name not in RESOURCES:
+        abort(404)
+    return RESOURCES[name]
+
+
+def selected_fields(columns):
+    """Columns named by ?fields=, in the order given, or every column"""
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    if not fields:
+        return list(columns)
+    unknown = [field for field in fields if field not in columns]
+    if unknown:
+        abort(400, f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+
+def conditional_json(tables, payload_builder):
+    """Answer 304 if the client's copy is current, otherwise build, tag and compress the JSON"""
+    conn = get_db()
+    # The validator covers the data version and every argument that shapes the body
+    etag = data_etag(conn, tables, API_VERSION, request.path, sorted(request.args.items(multi=True)))
+    if client_has(etag):
+        return not_modified(etag)
+    response = jsonify(payload_builder(conn))
+    return gzip_response(with_etag(response, etag))
+
+
+@bp.route('/<resource>')
+def list_resource(resource):
+    table, columns, tables, build_filters = resource_or_404(resource)
+    fields = selected_fields(columns)
+    try:
+        limit = int(request.args.get('limit') or get_items_per_page())
+    except ValueError:
+        abort(400, 'limit must be a number')
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    try:
+        clauses, params = build_filters(request.args)
+    except ValueError as e:
+        abort(400, str(e))
+
+    def payload(conn):
+        # id rides along for the cursor and is dropped again if not asked for
+        select_columns = fields if 'id' in fields else fields + ['id']
+        rows, next_cursor = keyset_page(
+            conn, f"SELECT {', '.join(select_columns)} FROM {table}", ['id'], ['id'],
+            cursor=request.args.get('cursor'), page_size=limit,
+            where=' AND '.join(clauses) or None, params=params)
+        return {
+            'data': [{field: value for field, value in zip(select_columns, row) if field in fields} for row in rows],
+            'next_cursor': next_cursor,
+        }
+    return conditional_json(tables, payload)
+
+
+@bp.route('/<resource>/<int:item_id>')
+def get_resource(resource, item_id):
+    table, columns, tables, _ = resource_or_404(resource)
+    fields = selected_fields(columns)
+
+    def payload(conn):
+        row = conn.execute(f"SELECT {', '.join(fields)} FROM {table} WHERE id = ?", (item_id,)).fetchone()
+        if row is None:
+            abort(404)
+        return {'data': dict(zip(fields, row))}
+    return conditional_json(tables, payload)
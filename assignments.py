@@ -0,0 +1,103 @@
+"""
+Work assignments for Convex Studio Inventory System
+Each (project, section) assignment is one narrow row in work_assignments.
+The legacy <section>_* columns on work_projects are kept in step by triggers
+so pages that still read them see the same data.
+"""
+
+SECTIONS = ('reel', 'album', 'highlight', 'fullwork')
+
+# work_assignments column -> legacy work_projects column suffix
+LEGACY_COLUMNS = {
+    'assignee': 'assigned_to',
+    'date_assigned': 'date_assigned',
+    'status': 'status',
+    'completed_date': 'completed_date',
+    'rework_date': 'rework_date',
+}
+
+ASSIGNED_PROJECTS_SQL = '''SELECT * FROM work_projects
+    WHERE id IN (SELECT project_id FROM work_assignments WHERE assignee = ?)
+    ORDER BY created_at DESC'''
+
+
+def init_work_assignments(conn):
+    """Create work_assignments, backfill it from work_projects and install the sync triggers
+
+    Runs inside the caller's transaction, so no edit is missed between the
+    backfill and the triggers.
+    """
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='work_assignments'")
+    if c.fetchone():
+        return
+    project_columns = {row[1] for row in c.execute('PRAGMA table_info(work_projects)')}
+
+    c.execute('''CREATE TABLE work_assignments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        project_id INTEGER NOT NULL,
+        section TEXT NOT NULL,
+        assignee TEXT,
+        status TEXT,
+        date_assigned TEXT,
+        completed_date TEXT,
+        rework_date TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (project_id, section),
+        FOREIGN KEY (project_id) REFERENCES work_projects(id)
+    )''')
+
+    for section in SECTIONS:
+        mapped = [(column, f'{section}_{legacy}') for column, legacy in LEGACY_COLUMNS.items()
+                  if f'{section}_{legacy}' in project_columns]
+        if not mapped:
+            continue
+        # Backfill every project that has anything recorded for this section
+        c.execute(f'''INSERT INTO work_assignments (project_id, section, {', '.join(column for column, _ in mapped)})
+            SELECT id, ?, {', '.join(legacy for _, legacy in mapped)}
+            FROM work_projects
+            WHERE {' OR '.join(f'{legacy} IS NOT NULL' for _, legacy in mapped)}''', (section,))
+        # Mirror assignment writes onto the legacy columns
+        assignments = ', '.join(f'{legacy} = NEW.{column}' for column, legacy in mapped)
+        for event in ('INSERT', 'UPDATE'):
+            c.execute(f'''CREATE TRIGGER work_assignments_{section}_{event.lower()}
+                AFTER {event} ON work_assignments
+                WHEN NEW.section = '{section}'
+                BEGIN
+                    UPDATE work_projects SET {assignments} WHERE id = NEW.project_id;
+                END''')
+
+    c.execute('''CREATE TRIGGER work_projects_delete_assignments
+        AFTER DELETE ON work_projects
+        BEGIN
+            DELETE FROM work_assignments WHERE project_id = OLD.id;
+        END''')
+
+
+def get_assignment(conn, project_id, section):
+    """Return (assignee, date_assigned) for a project section, or (None, None)"""
+    row = conn.execute(
+        'SELECT assignee, date_assigned FROM work_assignments WHERE project_id = ? AND section = ?',
+        (project_id, section)
+    ).fetchone()
+    return row or (None, None)
+
+
+def save_assignment(conn, project_id, section, assignee, date_assigned, status, completed_date=None, rework_date=None):
+    """Insert or update the single assignment row for a project section"""
+    conn.execute('''INSERT INTO work_assignments
+            (project_id, section, assignee, date_assigned, status, completed_date, rework_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (project_id, section) DO UPDATE SET
+            assignee = excluded.assignee,
+            date_assigned = excluded.date_assigned,
+            status = excluded.status,
+            completed_date = excluded.completed_date,
+            rework_date = excluded.rework_date,
+            updated_at = CURRENT_TIMESTAMP''',
+        (project_id, section, assignee, date_assigned, status, completed_date, rework_date))
+
+
+def assigned_projects(conn, assignee):
+    """Return every project with at least one section assigned to the given person"""
+    return conn.execute(ASSIGNED_PROJECTS_SQL, (assignee,)).fetchall()
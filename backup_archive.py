@@ -0,0 +1,189 @@
+"""
+Compressed backup archives for Convex Studio Inventory System
+A backup is streamed in fixed-size chunks, each compressed on its own with
+gzip or lzma and appended to the archive. A JSON manifest next to the archive
+records every chunk's offset, sizes and SHA-256 checksums, so an archive can
+be verified chunk by chunk and a damaged chunk pinpointed.
+
+Independently compressed chunks concatenate into an ordinary multi-member
+.gz or multi-stream .xz file, so the archives also open with the usual tools.
+"""
+
+import gzip
+import hashlib
+import json
+import lzma
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+MANIFEST_SUFFIX = '.manifest.json'
+ARCHIVE_FORMAT = 1
+
+# compression name -> (archive suffix, compress, decompress)
+COMPRESSORS = {
+    'gzip': ('.db.gz', lambda data: gzip.compress(data, compresslevel=6), gzip.decompress),
+    'lzma': ('.db.xz', lambda data: lzma.compress(data, preset=6), lzma.decompress),
+    'none': ('.db', bytes, bytes),
+}
+
+# Suffixes of complete backup files, compressed or not
+BACKUP_SUFFIXES = tuple(sorted({suffix for suffix, _, _ in COMPRESSORS.values()}, key=len, reverse=True))
+
+
+class ArchiveError(ValueError):
+    """Raised when an archive does not match its manifest"""
+
+
+def backup_files(backup_dir):
+    """Paths of every complete backup in backup_dir, archived or plain"""
+    return [path for path in Path(backup_dir).glob('inventory_backup_*')
+            if path.name.endswith(BACKUP_SUFFIXES)]
+
+
+def manifest_path(archive_path):
+    archive_path = Path(archive_path)
+    return archive_path.with_name(archive_path.name + MANIFEST_SUFFIX)
+
+
+def read_manifest(archive_path):
+    """Return the manifest of an archive, or None if it has none"""
+    path = manifest_path(archive_path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def write_archive(source_path, archive_path, compression='gzip', chunk_size=4 * 1024 * 1024):
+    """Stream source_path into a chunked archive and write its manifest
+
+    Both files are written under a .partial name and renamed into place, the
+    manifest last, so an archive only counts once it is complete.
+    """
+    if compression not in COMPRESSORS:
+        raise ValueError(f"Unknown backup compression: {compression}")
+    _, compress, _ = COMPRESSORS[compression]
+    archive_path = Path(archive_path)
+    partial_archive = archive_path.with_name(archive_path.name + '.partial')
+    partial_manifest = archive_path.with_name(archive_path.name + MANIFEST_SUFFIX + '.partial')
+
+    chunks = []
+    source_digest = hashlib.sha256()
+    source_size = offset = 0
+    with open(source_path, 'rb') as source, open(partial_archive, 'wb') as archive:
+        while True:
+            data = source.read(chunk_size)
+            if not data:
+                break
+            packed = compress(data)
+            archive.write(packed)
+            source_digest.update(data)
+            chunks.append({
+                'offset': offset,
+                'length': len(packed),
+                'size': len(data),
+                'sha256': hashlib.sha256(data).hexdigest(),
+                'compressed_sha256': hashlib.sha256(packed).hexdigest(),
+            })
+            offset += len(packed)
+            source_size += len(data)
+        archive.flush()
+        os.fsync(archive.fileno())
+
+    manifest = {
+        'format': ARCHIVE_FORMAT,
+        'compression': compression,
+        'chunk_size': chunk_size,
+        'source_size': source_size,
+        'source_sha256': source_digest.hexdigest(),
+        'archive_size': offset,
+        'created': datetime.now().isoformat(),
+        'chunks': chunks,
+    }
+    partial_manifest.write_text(json.dumps(manifest, indent=1))
+    os.replace(partial_archive, archive_path)
+    os.replace(partial_manifest, manifest_path(archive_path))
+    return manifest
+
+
+def iter_chunks(archive_path, manifest=None):
+    """Yield the verified, decompressed chunks of an archive in order
+
+    Raises ArchiveError at the first chunk that does not match the manifest.
+    """
+    manifest = manifest or read_manifest(archive_path)
+    if manifest is None:
+        raise ArchiveError(f"{Path(archive_path).name} has no manifest")
+    _, _, decompress = COMPRESSORS[manifest['compression']]
+    with open(archive_path, 'rb') as archive:
+        for number, chunk in enumerate(manifest['chunks']):
+            archive.seek(chunk['offset'])
+            packed = archive.read(chunk['length'])
+            if hashlib.sha256(packed).hexdigest() != chunk['compressed_sha256']:
+                raise ArchiveError(f"chunk {number} is damaged")
+            try:
+                data = decompress(packed)
+            except (OSError, EOFError, lzma.LZMAError) as e:
+                raise ArchiveError(f"chunk {number} does not decompress: {e}")
+            if len(data) != chunk['size'] or hashlib.sha256(data).hexdigest() != chunk['sha256']:
+                raise ArchiveError(f"chunk {number} does not match its checksum")
+            yield data
+
+
+def verify_archive(archive_path):
+    """Check every chunk and the whole-file checksum; returns a result dict"""
+    archive_path = Path(archive_path)
+    result = {'filename': archive_path.name, 'valid': False, 'error': None}
+    try:
+        manifest = read_manifest(archive_path)
+        if manifest is None:
+            raise ArchiveError("no manifest")
+        if archive_path.stat().st_size != manifest['archive_size']:
+            raise ArchiveError("archive size does not match the manifest")
+        digest = hashlib.sha256()
+        for data in iter_chunks(archive_path, manifest):
+            digest.update(data)
+        if digest.hexdigest() != manifest['source_sha256']:
+            raise ArchiveError("database checksum does not match")
+        result['valid'] = True
+    except (ArchiveError, OSError, ValueError) as e:
+        result['error'] = str(e)
+    return result
+
+
+def extract_archive(archive_path, output_path):
+    """Write the verified database held in an archive to output_path"""
+    with open(output_path, 'wb') as output:
+        for data in iter_chunks(archive_path):
+            output.write(data)
+
+
+def describe_archive(archive_path):
+    """Listing entry for one backup file, from its manifest when it has one"""
+    archive_path = Path(archive_path)
+    stat = archive_path.stat()
+    manifest = read_manifest(archive_path)
+    entry = {
+        'filename': archive_path.name,
+        'size_mb': round(stat.st_size / (1024 * 1024), 2),
+        'created': (manifest['created'] if manifest else datetime.fromtimestamp(stat.st_ctime).isoformat()),
+        'compression': manifest['compression'] if manifest else None,
+        'chunks': len(manifest['chunks']) if manifest else None,
+    }
+    if manifest:
+        entry['database_size_mb'] = round(manifest['source_size'] / (1024 * 1024), 2)
+    return entry
+
+
+def map_archives(func, paths, workers):
+    """Run func over every archive on a thread pool, keeping the input order
+
+    Hashing and (de)compression release the GIL, so archives are processed
+    in parallel.
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        return list(pool.map(func, paths))
@@ -0,0 +1 @@
+"""Load benchmarks and synthetic data for Convex Studio Inventory System"""
@@ -0,0 +1,235 @@
+"""
+End-to-end load benchmarks for Convex Studio Inventory System
+Seeds a scratch database (see benchmarks/seed.py), then drives the main
+routes through the Flask test client at each concurrency level and reports
+p50/p95/p99 latency and throughput per route, compared with the stored
+baselines in benchmarks/baselines.json.
+
+    python -m benchmarks.run                       # full volumes, compare to baselines
+    python -m benchmarks.run --scale 0.1 -n 50     # quick run
+    python -m benchmarks.run --save-baseline       # record this machine's numbers
+    python -m benchmarks.run --fail-on-regression  # exit 1 when a route regressed
+
+Baselines are machine-specific: record them on the machine that compares
+against them. When the templates folder is missing, pages render through a
+stub template, so the numbers cover routing, queries and view code only.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baselines.json'
+STUB_TEMPLATE = '<html>{{ request.path }}</html>'
+WARMUP_REQUESTS = 5
+
+
+def _project_id(rng, context):
+    return rng.randrange(1, context['projects'] + 1)
+
+
+def _serial_query(rng, context):
+    from benchmarks.seed import ITEM_CAPACITIES
+    item_type = rng.choice(list(ITEM_CAPACITIES))
+    return f'item_type={item_type}&capacity={rng.choice(ITEM_CAPACITIES[item_type])}'
+
+
+# name -> (URL builder, session kind)
+ROUTES = {
+    'index': (lambda rng, context: '/', 'admin'),
+    'upload': (lambda rng, context: '/upload', 'admin'),
+    'order': (lambda rng, context: '/order', 'admin'),
+    'metrics': (lambda rng, context: '/metrics', 'admin'),
+    'work': (lambda rng, context: '/work', 'admin'),
+    'work_profile': (lambda rng, context: f'/work/profile/{_project_id(rng, context)}', 'admin'),
+    'mywork': (lambda rng, context: '/mywork', 'employee'),
+    'serial_numbers': (lambda rng, context: f'/api/serial_numbers?{_serial_query(rng, context)}', 'admin'),
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def load_app(db_path, work_dir, scale, seed):
+    """Point the configuration at db_path, seed it if needed and import the application
+
+    Must run before anything imports config, which reads the environment once.
+    """
+    if 'config' in sys.modules:
+        raise RuntimeError('load_app must run before config is imported')
+    os.environ['DATABASE_PATH'] = str(db_path)
+    os.environ.setdefault('BACKUP_DIR', str(Path(work_dir) / 'backups'))
+    os.environ.setdefault('LOGS_DIR', str(Path(work_dir) / 'logs'))
+    if not os.path.exists(db_path):
+        from benchmarks.seed import seed_database
+        seed_database(db_path, scale, seed)
+    from app import create_app
+    flask_app = create_app()
+    stub_templates = not Path(flask_app.root_path, flask_app.template_folder).is_dir()
+    if stub_templates:
+        from jinja2 import FunctionLoader
+        flask_app.jinja_env.loader = FunctionLoader(lambda name: STUB_TEMPLATE)
+    return flask_app, stub_templates
+
+
+def make_client(flask_app, kind, context):
+    client = flask_app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        if kind == 'admin':
+            sess['user_name'] = 'Benchmark Admin'
+            sess['role'] = 'Admin Access'
+        else:
+            sess['user_name'] = context['busiest_employee']
+            sess['role'] = 'Editor'
+    return client
+
+
+def run_route(flask_app, name, concurrency, requests_per_level, context, seed):
+    """Issue requests_per_level requests to one route from concurrency threads"""
+    build_url, kind = ROUTES[name]
+    latencies, errors = [], []
+    lock = threading.Lock()
+    counter = iter(range(requests_per_level))
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        client = make_client(flask_app, kind, context)
+        for _ in range(WARMUP_REQUESTS):
+            client.get(build_url(rng, context))
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+            url = build_url(rng, context)
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code >= 400:
+                    errors.append(f'{url}: {response.status_code}')
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'throughput_rps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'sample_errors': errors[:3],
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Return a verdict string for one result against its baseline entry"""
+    if not baseline:
+        return 'no baseline'
+    p95_change = result['p95_ms'] / baseline['p95_ms'] - 1 if baseline['p95_ms'] else 0.0
+    rps_change = result['throughput_rps'] / baseline['throughput_rps'] - 1 if baseline['throughput_rps'] else 0.0
+    verdict = f'p95 {p95_change:+.0%}, rps {rps_change:+.0%}'
+    if p95_change > tolerance or rps_change < -tolerance:
+        return 'REGRESSION ' + verdict
+    return verdict
+
+
+def bench_context(db_path):
+    """Facts about the seeded data that the URL builders need"""
+    import sqlite3
+    conn = sqlite3.connect(db_path)
+    try:
+        projects = conn.execute('SELECT MAX(id) FROM work_projects').fetchone()[0] or 1
+        busiest = conn.execute('''SELECT assignee FROM work_assignments
+            GROUP BY assignee ORDER BY COUNT(*) DESC LIMIT 1''').fetchone()
+    finally:
+        conn.close()
+    return {'projects': projects, 'busiest_employee': busiest[0] if busiest else ''}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the end-to-end route benchmarks')
+    parser.add_argument('--db', help='Seeded database to reuse; seeded into a scratch directory when omitted')
+    parser.add_argument('--scale', type=float, default=1.0, help='Data volume relative to the full seed')
+    parser.add_argument('--concurrency', default='1,4,8', help='Comma-separated thread counts')
+    parser.add_argument('-n', '--requests', type=int, default=200, help='Requests per route per concurrency level')
+    parser.add_argument('--routes', default=','.join(ROUTES), help='Comma-separated routes to run')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95/throughput change before a regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix='convex_bench_')
+    db_path = args.db or os.path.join(work_dir, 'bench.db')
+    flask_app, stub_templates = load_app(db_path, work_dir, args.scale, args.seed)
+    context = bench_context(db_path)
+
+    baseline_file = Path(args.baseline)
+    stored = json.loads(baseline_file.read_text()) if baseline_file.exists() else {}
+    baselines = stored.get('results', {}) if stored.get('scale') == args.scale else {}
+    if stored and not baselines:
+        print(f"Stored baselines were recorded at scale {stored.get('scale')}; not comparing")
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    routes = [route.strip() for route in args.routes.split(',') if route.strip()]
+    unknown = set(routes) - set(ROUTES)
+    if unknown:
+        parser.error(f"Unknown routes: {', '.join(sorted(unknown))}")
+
+    print(f"Templates: {'stub' if stub_templates else 'real'}; {args.requests} requests per route and level")
+    print(f"{'route':<16}{'conc':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}  vs baseline")
+    results, regressions = {}, []
+    for name in routes:
+        for level in levels:
+            key = f'{name}@{level}'
+            result = run_route(flask_app, name, level, args.requests, context, args.seed)
+            results[key] = result
+            verdict = compare(result, baselines.get(key), args.tolerance)
+            if verdict.startswith('REGRESSION'):
+                regressions.append(key)
+            if result['errors']:
+                verdict += f"; {result['errors']} errors, e.g. {result['sample_errors'][0]}"
+            print(f"{name:<16}{level:>5}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+                  f"{result['p99_ms']:>10}{result['throughput_rps']:>10}  {verdict}")
+
+    if args.save_baseline:
+        baseline_file.write_text(json.dumps({
+            'scale': args.scale,
+            'requests': args.requests,
+            'stub_templates': stub_templates,
+            'recorded': time.strftime('%Y-%m-%d'),
+            'results': {key: {field: value for field, value in result.items() if field != 'sample_errors'}
+                        for key, result in results.items()},
+        }, indent=1, sort_keys=True) + '\n')
+        print(f"Saved baselines to {baseline_file}")
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
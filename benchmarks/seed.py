@@ -0,0 +1,176 @@
+"""
+Synthetic data generator for the Convex Studio benchmarks
+Builds a scratch database through the regular migrations and fills it with
+realistic volumes: stock units (some already allocated to orders), orders
+with their allocations, work projects with section assignments, work logs
+and payment details. The same seed always produces the same data.
+
+    python -m benchmarks.seed bench.db --scale 0.1
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from assignments import SECTIONS  # noqa: E402
+from db import connect  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+# Volumes at scale 1.0
+VOLUMES = {
+    'stock': 200_000,
+    'orders': 50_000,
+    'work_projects': 20_000,
+    'employees': 40,
+}
+
+ITEM_CAPACITIES = {
+    'Pendrive': ['16GB', '32GB', '64GB', '128GB'],
+    'HDD': ['1TB', '2TB', '4TB', '8TB'],
+    'SSD': ['256GB', '512GB', '1TB', '2TB'],
+}
+OWNERS = ['Convex'] * 6 + [f'Client {n:03d}' for n in range(1, 121)]
+CONDITIONS = ['New'] * 8 + ['Used', 'Refurbished']
+ROLES = ['Editor', 'Photographer', 'Videographer', 'Admin Access']
+SERVICES = ['Photography', 'Videography', 'Photography,Videography', 'Album', 'Photography,Videography,Album']
+RELIGIONS = ['Hindu', 'Christian', 'Muslim', 'Other']
+STATUSES = ['Active'] * 5 + ['Completed'] * 3 + ['On Hold']
+SECTION_STATUSES = ['Assigned', 'In Progress', 'Completed', 'Rework']
+LOG_EVENTS = ['assigned', 'completed', 'rework', 'note']
+
+BATCH = 5000
+START_DAY = date(2022, 1, 1)
+
+
+def _day(rng, span_days=1460):
+    return (START_DAY + timedelta(days=rng.randrange(span_days))).isoformat()
+
+
+def _batched(conn, sql, rows):
+    """executemany in slices so row generators never hold a whole table in memory"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def seed_database(db_path, scale=1.0, seed=1, log=print):
+    """Create db_path from scratch and fill it; returns the row counts written"""
+    db_path = Path(db_path)
+    for suffix in ('', '-wal', '-shm'):
+        Path(f'{db_path}{suffix}').unlink(missing_ok=True)
+    counts = {table: max(1, int(volume * scale)) for table, volume in VOLUMES.items()}
+    counts['employees'] = VOLUMES['employees']
+    rng = random.Random(seed)
+    started = time.perf_counter()
+
+    with closing(connect(str(db_path))) as conn:
+        migrate(conn)
+        conn.execute('BEGIN IMMEDIATE')
+
+        employees = [f'Employee {n:02d}' for n in range(1, counts['employees'] + 1)]
+        conn.executemany(
+            'INSERT INTO employees (name, role, password, active) VALUES (?, ?, ?, 1)',
+            [(name, ROLES[n % len(ROLES)], None) for n, name in enumerate(employees)]
+        )
+
+        # Stock: one row per physical unit; the first units of each group are the ones orders took
+        stock_rows = []
+        for n in range(counts['stock']):
+            item_type = rng.choice(list(ITEM_CAPACITIES))
+            stock_rows.append((
+                item_type, rng.choice(ITEM_CAPACITIES[item_type]), f'SN{n + 1:07d}', _day(rng), 1,
+                rng.choice(OWNERS), rng.choice(CONDITIONS), f'DISK-{rng.randrange(1, 2000):04d}',
+            ))
+        _batched(conn, '''INSERT INTO stock
+            (item_type, capacity, serial_number, purchase_date, quantity, storage_owner, condition, disk_name)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', stock_rows)
+        log(f"stock: {counts['stock']} units")
+
+        # Orders: each takes one unit, recorded in order_allocations like allocate_order does
+        taken = rng.sample(range(1, counts['stock'] + 1), min(counts['orders'], counts['stock']))
+        order_rows = []
+        for stock_id in taken:
+            item_type, capacity, _, _, _, owner, _, disk_name = stock_rows[stock_id - 1]
+            order_rows.append((item_type, capacity, 1, owner, disk_name, 'Client delivery',
+                               rng.choice(OWNERS[6:]), rng.choice(employees), _day(rng)))
+        del stock_rows
+        _batched(conn, '''INSERT INTO orders
+            (item_type, capacity, quantity, storage_owner, disk_name, order_reason, storage_sent_to, sent_by, order_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', order_rows)
+        _batched(conn, 'UPDATE stock SET quantity = 0 WHERE id = ?', ((stock_id,) for stock_id in taken))
+        _batched(conn, 'INSERT INTO order_allocations (order_id, stock_id, quantity) VALUES (?, ?, 1)',
+                 ((order_id, stock_id) for order_id, stock_id in enumerate(taken, start=1)))
+        log(f"orders: {len(taken)}")
+
+        # Work projects, created over the same period as the stock
+        project_rows = []
+        for n in range(counts['work_projects']):
+            created = datetime.combine(START_DAY, datetime.min.time()) + timedelta(minutes=rng.randrange(1460 * 24 * 60))
+            wedding = _day(rng, 1800) if rng.random() < 0.8 else ''
+            engagement = _day(rng, 1800) if rng.random() < 0.4 else ''
+            project_rows.append((
+                f'Client {n + 1:05d}', rng.choice(employees + [''] * 20), wedding, engagement,
+                rng.choice(SERVICES), '', rng.choice(STATUSES), created.strftime('%Y-%m-%d %H:%M:%S'),
+                rng.choice(RELIGIONS), 'Photo,Video', rng.choice(['Bride', 'Groom', 'Both']),
+            ))
+        _batched(conn, '''INSERT INTO work_projects
+            (client_name, referred_by, wedding_date, engagement_date, services, notes, status, created_at,
+             religion, requirements, sides)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', project_rows)
+        del project_rows
+        log(f"work_projects: {counts['work_projects']}")
+
+        assignments, logs, payments = [], [], []
+        for project_id in range(1, counts['work_projects'] + 1):
+            for section in SECTIONS:
+                if rng.random() < 0.6:
+                    assigned = _day(rng)
+                    status = rng.choice(SECTION_STATUSES)
+                    assignments.append((project_id, section, rng.choice(employees), assigned, status))
+                    for _ in range(rng.randrange(0, 3)):
+                        logs.append((project_id, section, rng.choice(LOG_EVENTS), _day(rng),
+                                     rng.choice(employees), 'Seeded entry'))
+            if rng.random() < 0.8:
+                quoted = rng.randrange(20, 400) * 1000
+                payments.append((project_id, quoted, rng.randrange(0, 5) * 1000, quoted // rng.choice([2, 3, 4])))
+        _batched(conn, '''INSERT INTO work_assignments (project_id, section, assignee, date_assigned, status)
+            VALUES (?, ?, ?, ?, ?)''', assignments)
+        _batched(conn, '''INSERT INTO work_logs (project_id, section, event_type, event_date, user, details)
+            VALUES (?, ?, ?, ?, ?, ?)''', logs)
+        _batched(conn, '''INSERT INTO payment_details (project_id, quoted_amount, discount, advance_amount)
+            VALUES (?, ?, ?, ?)''', payments)
+        counts.update({'orders': len(taken), 'work_assignments': len(assignments),
+                       'work_logs': len(logs), 'payment_details': len(payments)})
+        log(f"work_assignments: {len(assignments)}, work_logs: {len(logs)}, payment_details: {len(payments)}")
+
+        conn.commit()
+        conn.execute('ANALYZE')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    log(f"Seeded {db_path} in {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fill a scratch database with synthetic benchmark data')
+    parser.add_argument('db_path', help='Database file to create (replaced if it exists)')
+    parser.add_argument('--scale', type=float, default=1.0, help='Fraction of the full volumes to generate')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    os.makedirs(os.path.dirname(os.path.abspath(args.db_path)), exist_ok=True)
+    seed_database(args.db_path, args.scale, args.seed)
+
+
+if __name__ == '__main__':
+    main()
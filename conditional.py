@@ -0,0 +1,109 @@
+"""
+Conditional and compressed responses for Convex Studio Inventory System
+Validators are derived from the table_versions change counters, so deciding
+that a client's copy is still current costs one primary-key lookup and no
+query of the data itself.
+"""
+
+import gzip
+import hashlib
+import os
+from datetime import date
+from functools import wraps
+
+from flask import current_app, request, session
+
+from data_versions import table_versions
+from db import get_db
+
+# Bodies smaller than this are sent uncompressed; gzip would barely help
+GZIP_MIN_SIZE = 1024
+
+
+def make_etag(*parts):
+    """Weak validator built from everything the response depends on
+
+    Weak, because the same content may be sent gzip-compressed or not.
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def data_etag(conn, tables, *parts):
+    """Validator for a response built from tables, plus any other inputs in parts"""
+    return make_etag(table_versions(conn, tables), *parts)
+
+
+def client_has(etag):
+    """True if the request's If-None-Match already names etag"""
+    return request.if_none_match.contains_weak(etag.removeprefix('W/').strip('"'))
+
+
+def not_modified(etag):
+    """Empty 304 response carrying etag"""
+    return with_etag(current_app.response_class(status=304), etag)
+
+
+def with_etag(response, etag):
+    """Attach etag and ask clients to revalidate before reusing their copy"""
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def gzip_response(response):
+    """Compress a buffered response when the client accepts gzip"""
+    response.vary.add('Accept-Encoding')
+    if (response.direct_passthrough or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.accept_encodings):
+        return response
+    body = response.get_data()
+    if len(body) < GZIP_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def template_stamp():
+    """Newest modification time under the template folder, read once per process
+
+    Part of every page validator, so deploying changed templates makes
+    clients fetch the page again.
+    """
+    stamp = current_app.extensions.get('template_stamp')
+    if stamp is None:
+        folder = os.path.join(current_app.root_path, current_app.template_folder or 'templates')
+        stamp = max((os.path.getmtime(os.path.join(path, name))
+                     for path, _, names in os.walk(folder) for name in names), default=0)
+        current_app.extensions['template_stamp'] = stamp
+    return stamp
+
+
+def conditional_page(*tables, daily=False):
+    """Answer GET requests for a rendered page with 304 while nothing it shows has changed
+
+    The validator covers the change counters of tables, the query string, the
+    signed-in user and role and the templates; daily adds today's date for
+    pages with date-relative counts. Other methods, and requests with flashed
+    messages waiting to be shown, go straight to the view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+            parts = [request.full_path, session.get('user_id'), session.get('role'), template_stamp()]
+            if daily:
+                parts.append(date.today().isoformat())
+            # Versions are read before the page is built (see table_versions)
+            etag = data_etag(get_db(), tables, *parts)
+            if client_has(etag):
+                return not_modified(etag)
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                with_etag(response, etag)
+            return response
+        return wrapper
+    return decorator
@@ -15,6 +15,9 @@ class Config:
     # Database settings
     DATABASE_PATH = os.environ.get('DATABASE_PATH') or 'inventory.db'
     DATABASE_URL = os.environ.get('DATABASE_URL') or f'sqlite:///{DATABASE_PATH}'
+    DATABASE_BUSY_TIMEOUT = int(os.environ.get('DATABASE_BUSY_TIMEOUT', 5000))  # milliseconds
+    DATABASE_CACHED_STATEMENTS = int(os.environ.get('DATABASE_CACHED_STATEMENTS', 256))
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 8))
     
     # File upload settings
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or 'uploads'
@@ -25,6 +28,31 @@ class Config:
     BACKUP_DIR = os.environ.get('BACKUP_DIR') or 'backups'
     LOGS_DIR = os.environ.get('LOGS_DIR') or 'logs'
     MAX_BACKUP_FILES = int(os.environ.get('MAX_BACKUP_FILES', 30))
+    BACKUP_PAGES_PER_STEP = int(os.environ.get('BACKUP_PAGES_PER_STEP', 1024))  # pages copied per backup step
+    BACKUP_COMPRESSION = os.environ.get('BACKUP_COMPRESSION', 'gzip').lower()  # gzip, lzma or none
+    BACKUP_CHUNK_SIZE = int(os.environ.get('BACKUP_CHUNK_SIZE', 4 * 1024 * 1024))  # bytes per archive chunk
+    BACKUP_VERIFY_WORKERS = int(os.environ.get('BACKUP_VERIFY_WORKERS', 4))
+    
+    # Continuous WAL archiving for point-in-time restore
+    WAL_ARCHIVE_ENABLED = os.environ.get('WAL_ARCHIVE', 'false').lower() == 'true'
+    WAL_ARCHIVE_INTERVAL = float(os.environ.get('WAL_ARCHIVE_INTERVAL', 10))  # seconds between archive passes
+    WAL_ARCHIVE_CHECKPOINT_FRAMES = int(os.environ.get('WAL_ARCHIVE_CHECKPOINT_FRAMES', 1000))
+    WAL_ARCHIVE_GENERATIONS = int(os.environ.get('WAL_ARCHIVE_GENERATIONS', 5))
+    
+    # Health checks, refreshed in the background and served from memory
+    HEALTH_CHECK_INTERVAL = float(os.environ.get('HEALTH_CHECK_INTERVAL', 15))  # seconds between probe runs
+    HEALTH_PROBE_TIMEOUT_MS = int(os.environ.get('HEALTH_PROBE_TIMEOUT_MS', 500))  # time budget per probe
+    HEALTH_MAX_BACKUP_AGE_HOURS = float(os.environ.get('HEALTH_MAX_BACKUP_AGE_HOURS', 26))
+    
+    # Per-route latency and SQLite time, exported in Prometheus text format
+    REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS', 'true').lower() == 'true'
+    STATS_ALLOWED_HOSTS = [host.strip() for host in os.environ.get('STATS_ALLOWED_HOSTS', '127.0.0.1,::1').split(',')]
+    
+    # Opt-in SQL profiler: slow-query log with query plans and N+1 detection
+    SQL_PROFILER_ENABLED = os.environ.get('SQL_PROFILER', 'false').lower() == 'true'
+    SQL_SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', 100))
+    SQL_REPEAT_THRESHOLD = int(os.environ.get('SQL_REPEAT_THRESHOLD', 10))  # same statement shape per request
+    SQL_PROFILE_LOG = os.environ.get('SQL_PROFILE_LOG') or os.path.join(LOGS_DIR, 'sql_profile.log')
     
     # Security settings
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
@@ -76,7 +104,8 @@ class DevelopmentConfig(Config):
     TESTING = False
     
     # Development-specific settings
-    DATABASE_PATH = 'inventory_dev.db'
+    # The desktop launchers start app.py without FLASK_ENV, so default to the live database
+    DATABASE_PATH = os.environ.get('DATABASE_PATH') or 'inventory.db'
     LOG_LEVEL = 'DEBUG'
     
     # Enable all features in development
@@ -183,8 +212,17 @@ config = {
     'default': DevelopmentConfig
 }
 
+_active_config = None
+
+def use_config(config_class):
+    """Make config_class the configuration every get_config() call returns"""
+    global _active_config
+    _active_config = config_class
+
 def get_config():
-    """Get configuration based on environment"""
+    """Get the configuration passed to create_app(), or the one for the environment"""
+    if _active_config is not None:
+        return _active_config
     env = os.environ.get('FLASK_ENV', 'development')
     return config.get(env, config['default'])
 
@@ -198,6 +236,11 @@ def get_database_path():
     config_class = get_config()
     return config_class.DATABASE_PATH
 
+def get_items_per_page():
+    """Get page size for paginated listings from configuration"""
+    config_class = get_config()
+    return config_class.ITEMS_PER_PAGE
+
 def get_upload_folder():
     """Get upload folder path from configuration"""
     config_class = get_config()
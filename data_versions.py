@@ -0,0 +1,76 @@
+"""
+Per-table change counters for Convex Studio Inventory System
+Triggers bump a counter in table_versions on every insert, update or delete,
+so caches can tell whether a table changed with one primary-key lookup.
+Scoped counters do the same for the rows of a table sharing one key value,
+e.g. the work logs of a single project, under the name "<table>:<value>".
+"""
+
+# Tables whose changes are counted
+TRACKED_TABLES = ['stock', 'orders', 'work_projects', 'work_assignments', 'payment_details', 'employees']
+
+# Tables also counted per value of a column: table -> column
+SCOPED_TABLES = {
+    'work_logs': 'project_id',
+    'payment_details': 'project_id',
+}
+
+
+def scoped_counter(table, value):
+    """Name of the counter for the rows of table whose scope column equals value"""
+    return f'{table}:{value}'
+
+
+def _bump_scoped(table, row):
+    """Trigger statement bumping the scoped counter of row (NEW or OLD), creating it if needed"""
+    column = SCOPED_TABLES[table]
+    return f'''INSERT INTO table_versions (table_name, version) VALUES ('{table}:' || {row}.{column}, 1)
+                    ON CONFLICT (table_name) DO UPDATE SET version = version + 1;'''
+
+
+def ensure_version_triggers(conn, tables=None):
+    """Create the table_versions table and its triggers for every tracked table that exists
+
+    Runs inside the caller's transaction.
+    """
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS table_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID''')
+    existing = {row[0] for row in c.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    for table in tables or TRACKED_TABLES:
+        if table not in existing:
+            continue
+        c.execute('INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)', (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                END''')
+    for table in SCOPED_TABLES:
+        if table not in existing:
+            continue
+        # Inserts count against the new row's scope, deletes against the old one's and updates against both
+        for event, rows in (('INSERT', ['NEW']), ('UPDATE', ['OLD', 'NEW']), ('DELETE', ['OLD'])):
+            body = '\n                    '.join(_bump_scoped(table, row) for row in rows)
+            c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_scoped_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    {body}
+                END''')
+
+
+def table_versions(conn, tables):
+    """Return the change counters for the given tables as a tuple, in the order given
+
+    Read them before the data they cover: a concurrent write can then only
+    make what was built look older than it is, never newer.
+    """
+    placeholders = ','.join('?' for _ in tables)
+    rows = dict(conn.execute(
+        f'SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})',
+        list(tables)
+    ).fetchall())
+    return tuple(rows.get(table, 0) for table in tables)
@@ -0,0 +1,107 @@
+"""
+Database connection management for Convex Studio Inventory System
+Pools SQLite connections and hands one out per Flask app context.
+"""
+
+import os
+import sqlite3
+import threading
+from collections import deque
+
+from flask import g
+
+from config import get_config, get_database_path
+from request_metrics import InstrumentedConnection
+
+_pool_lock = threading.Lock()
+_pools = {}
+_pool_pid = os.getpid()
+_stats = {'opened': 0, 'reused': 0, 'closed': 0}
+
+
+def connect(db_path=None):
+    """Open a new SQLite connection with the application's pragmas applied"""
+    config_class = get_config()
+    busy_timeout = config_class.DATABASE_BUSY_TIMEOUT
+    conn = sqlite3.connect(
+        db_path or get_database_path(),
+        timeout=busy_timeout / 1000,
+        cached_statements=config_class.DATABASE_CACHED_STATEMENTS,
+        check_same_thread=False,
+        # Instrumented connections charge query time to the request being served;
+        # the SQL profiler reads its statements from them too
+        factory=(InstrumentedConnection if config_class.REQUEST_METRICS_ENABLED or config_class.SQL_PROFILER_ENABLED
+                 else sqlite3.Connection)
+    )
+    conn.execute(f'PRAGMA busy_timeout = {int(busy_timeout)}')
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    if config_class.WAL_ARCHIVE_ENABLED:
+        # The WAL archiver checkpoints once frames are archived
+        conn.execute('PRAGMA wal_autocheckpoint = 0')
+    return conn
+
+
+def _idle_connections(db_path):
+    """Return the idle connection deque for a database, resetting it after a fork"""
+    global _pool_pid
+    if _pool_pid != os.getpid():
+        # Connections must never be shared with a parent process
+        _pools.clear()
+        _pool_pid = os.getpid()
+    return _pools.setdefault(db_path, deque())
+
+
+def acquire():
+    """Check a connection out of the pool, opening a new one if none are idle"""
+    db_path = get_database_path()
+    with _pool_lock:
+        idle = _idle_connections(db_path)
+        if idle:
+            _stats['reused'] += 1
+            return idle.pop()
+        _stats['opened'] += 1
+    return connect(db_path)
+
+
+def release(conn):
+    """Return a connection to the pool, closing it if the pool is already full"""
+    if conn.in_transaction:
+        conn.rollback()
+    db_path = get_database_path()
+    with _pool_lock:
+        idle = _idle_connections(db_path)
+        if len(idle) < get_config().DATABASE_POOL_SIZE:
+            idle.append(conn)
+            return
+        _stats['closed'] += 1
+    conn.close()
+
+
+def get_db():
+    """Return the connection bound to the current app context"""
+    if 'db' not in g:
+        g.db = acquire()
+    return g.db
+
+
+def close_db(exception=None):
+    """Hand the app context's connection back to the pool"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        release(conn)
+
+
+def connection_stats():
+    """Report how often pooled connections were reused versus newly opened"""
+    with _pool_lock:
+        stats = dict(_stats)
+        stats['idle'] = sum(len(idle) for idle in _pools.values())
+    checkouts = stats['opened'] + stats['reused']
+    stats['reuse_ratio'] = round(stats['reused'] / checkouts, 4) if checkouts else 0.0
+    return stats
+
+
+def init_app(app):
+    """Register connection cleanup with the Flask application"""
+    app.teardown_appcontext(close_db)
@@ -0,0 +1,114 @@
+"""
+Fragment cache for Convex Studio Inventory System
+Caches the query results a page is assembled from. Each fragment names the
+change counters it depends on (see data_versions); a fragment is reused while
+those counters are unchanged and rebuilt as soon as one moves. Scoped
+counters make per-project fragments exact: a new work log for one project
+evicts that project's log fragment and nothing else. Because the counters
+live in the database, a write made by any worker process is seen by all.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from assignments import SECTIONS
+from data_versions import scoped_counter, table_versions
+
+# Least recently used fragments are dropped beyond this many
+MAX_ENTRIES = 2048
+
+
+class FragmentCache:
+    """Process-wide cache of query results, validated against change counters"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+
+    def get(self, key, versions, build, max_age=None):
+        """Return the fragment stored under key if it was built at versions, else build() it
+
+        versions come from table_versions, read before the data build() reads.
+        max_age optionally limits how many seconds a fragment is reused for.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if (entry is not None and entry[0] == versions
+                    and (max_age is None or time.monotonic() - entry[2] < max_age)):
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = build()
+        with self._lock:
+            self._entries[key] = (versions, value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+fragment_cache = FragmentCache()
+
+
+def _rows(conn, sql, params=()):
+    return conn.execute(sql, params).fetchall()
+
+
+def _group_logs(rows):
+    """Work log rows grouped by section for the profile template"""
+    logs_by_section = {section: [] for section in SECTIONS}
+    for section, event_type, event_date, user, details in rows:
+        if section in logs_by_section:
+            logs_by_section[section].append({'date': event_date, 'user': user, 'details': details})
+    return logs_by_section
+
+
+def _payment(row):
+    if row is None:
+        return {'quoted_amount': 0, 'discount': 0, 'advance_amount': 0, 'remaining_amount': 0}
+    return dict(zip(('quoted_amount', 'discount', 'advance_amount', 'remaining_amount'), row))
+
+
+def work_profile_fragments(conn, project_id, status):
+    """Everything the work profile page shows besides the project row itself
+
+    All counters are read with one primary-key lookup; only fragments whose
+    counters moved are queried again.
+    """
+    logs_counter = scoped_counter('work_logs', project_id)
+    payment_counter = scoped_counter('payment_details', project_id)
+    projects_version, employees_version, logs_version, payment_version = table_versions(
+        conn, ('work_projects', 'employees', logs_counter, payment_counter))
+
+    similar_projects = fragment_cache.get(('similar_projects',), projects_version, lambda: _rows(
+        conn, 'SELECT COUNT(*) FROM work_projects WHERE wedding_date IS NOT NULL')[0][0])
+    status_count = fragment_cache.get(('status_count', status), projects_version, lambda: _rows(
+        conn, 'SELECT COUNT(*) FROM work_projects WHERE status = ?', (status,))[0][0])
+    # One shared list of the newest projects; the profile's own project is dropped afterwards
+    newest_projects = fragment_cache.get(('newest_projects',), projects_version, lambda: _rows(
+        conn, 'SELECT * FROM work_projects ORDER BY created_at DESC LIMIT 6'))
+    employees = fragment_cache.get(('employees',), employees_version, lambda: _rows(
+        conn, 'SELECT id, name, role FROM employees'))
+    work_logs = fragment_cache.get(('work_logs', project_id), logs_version, lambda: _group_logs(_rows(
+        conn, '''SELECT section, event_type, event_date, user, details FROM work_logs
+                 WHERE project_id = ? ORDER BY event_date''', (project_id,))))
+    payment = fragment_cache.get(('payment', project_id), payment_version, lambda: _payment(conn.execute(
+        '''SELECT quoted_amount, discount, advance_amount, remaining_amount FROM payment_details
+           WHERE project_id = ?''', (project_id,)).fetchone()))
+
+    return {
+        'similar_projects': similar_projects,
+        'status_count': status_count,
+        'recent_projects': [row for row in newest_projects if row[0] != project_id][:5],
+        'employees': employees,
+        'payment': dict(payment),
+        'work_logs': work_logs,
+    }
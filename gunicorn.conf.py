@@ -0,0 +1,19 @@
+"""
+Gunicorn settings for Convex Studio Inventory System
+Every worker builds its own app through wsgi.create_app(); SQLite in WAL mode
+lets the workers read in parallel, and writes are serialized by SQLite's lock.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+# Requests are cheap to replay; recycling workers bounds any slow memory growth.
+# When the worker running the WAL archiver is recycled, its replacement takes the
+# archive lock and resumes the generation rather than taking a new base snapshot
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = 500
+accesslog = '-'
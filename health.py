@@ -0,0 +1,187 @@
+"""
+Health and readiness checks for Convex Studio Inventory System
+A background thread runs a fixed set of probes against the database every
+HEALTH_CHECK_INTERVAL seconds and keeps the results as a snapshot, so the
+/health and /ready endpoints answer from memory without touching SQLite.
+Every probe runs under its own time budget (HEALTH_PROBE_TIMEOUT_MS).
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from backup_archive import backup_files
+from config import get_config
+from db import connect
+from migrations import LATEST_VERSION, current_version
+
+logger = logging.getLogger(__name__)
+
+OK, WARN, FAIL = 'ok', 'warn', 'fail'
+
+# Probes whose failure makes the instance unready; the rest only warn
+CRITICAL_PROBES = ('database', 'schema', 'write_lock')
+
+
+class ProbeTimeout(Exception):
+    """Raised when a probe exceeds its time budget"""
+
+
+def probe_database(conn, budget_ms):
+    conn.execute('SELECT 1').fetchone()
+    return OK, {}
+
+
+def probe_schema(conn, budget_ms):
+    version = current_version(conn)
+    status = OK if version >= LATEST_VERSION else FAIL
+    return status, {'version': version, 'expected': LATEST_VERSION}
+
+
+def probe_backup(conn, budget_ms):
+    backups = backup_files(get_config().BACKUP_DIR)
+    if not backups:
+        return WARN, {'last_backup_age_hours': None}
+    newest = max(path.stat().st_mtime for path in backups)
+    age_hours = (time.time() - newest) / 3600
+    status = OK if age_hours <= get_config().HEALTH_MAX_BACKUP_AGE_HOURS else WARN
+    return status, {'last_backup_age_hours': round(age_hours, 2), 'backups': len(backups)}
+
+
+def probe_write_lock(conn, budget_ms):
+    # Time how long a writer would wait; busy_timeout caps the wait at the budget
+    conn.execute(f'PRAGMA busy_timeout = {int(budget_ms)}')
+    started = time.monotonic()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+    except sqlite3.OperationalError:
+        raise ProbeTimeout(f'write lock not acquired within {budget_ms} ms')
+    finally:
+        wait_ms = (time.monotonic() - started) * 1000
+    conn.rollback()
+    status = OK if wait_ms < budget_ms / 2 else WARN
+    return status, {'wait_ms': round(wait_ms, 2)}
+
+
+PROBES = [
+    ('database', probe_database),
+    ('schema', probe_schema),
+    ('backup', probe_backup),
+    ('write_lock', probe_write_lock),
+]
+
+
+def run_probe(conn, probe, budget_ms):
+    """Run one probe under its time budget and return its result dict"""
+    deadline = time.monotonic() + budget_ms / 1000
+    # SQLite calls the handler every 1000 VM steps; a true result interrupts the query
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+    started = time.monotonic()
+    try:
+        status, detail = probe(conn, budget_ms)
+        if time.monotonic() > deadline:
+            status = WARN if status == OK else status
+            detail['over_budget'] = True
+    except (ProbeTimeout, sqlite3.Error, OSError) as e:
+        status, detail = FAIL, {'error': str(e)}
+    finally:
+        conn.set_progress_handler(None, 0)
+        if conn.in_transaction:
+            conn.rollback()
+    detail.update({'status': status, 'duration_ms': round((time.monotonic() - started) * 1000, 2)})
+    return detail
+
+
+class HealthMonitor:
+    """Runs the probes in the background and serves the latest results"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._refreshed_at = 0.0
+        self._conn = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Take a first snapshot, then keep refreshing it on a daemon thread"""
+        if self._thread is not None:
+            return self
+        self.refresh()
+        self._start_thread()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+        return self
+
+    def _start_thread(self):
+        self._thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+        self._thread.start()
+
+    def _after_fork(self):
+        # Threads do not survive a fork and the connection belongs to the parent;
+        # a worker forked from a preloaded app starts its own monitor
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._conn = None
+        if self._thread is not None:
+            self._start_thread()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(get_config().HEALTH_CHECK_INTERVAL):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Health refresh failed: {e}")
+
+    def refresh(self):
+        """Run every probe once and publish the results"""
+        budget_ms = get_config().HEALTH_PROBE_TIMEOUT_MS
+        probes = {}
+        try:
+            if self._conn is None:
+                self._conn = connect(self.db_path)
+            for name, probe in PROBES:
+                probes[name] = run_probe(self._conn, probe, budget_ms)
+        except sqlite3.Error as e:
+            probes['database'] = {'status': FAIL, 'error': str(e)}
+        if probes['database']['status'] == FAIL and self._conn is not None:
+            # Reconnect next time rather than reuse a connection in an unknown state
+            self._conn.close()
+            self._conn = None
+
+        statuses = [probe['status'] for probe in probes.values()]
+        snapshot = {
+            'status': FAIL if FAIL in statuses else WARN if WARN in statuses else OK,
+            'ready': all(probes.get(name, {}).get('status') != FAIL for name in CRITICAL_PROBES),
+            'checked_at': datetime.now().isoformat(),
+            'probes': probes,
+        }
+        with self._lock:
+            self._snapshot = snapshot
+            self._refreshed_at = time.monotonic()
+        return snapshot
+
+    def snapshot(self):
+        """Return the latest results, marked stale if the monitor has stopped refreshing"""
+        with self._lock:
+            if self._snapshot is None:
+                return {'status': FAIL, 'ready': False, 'stale': True, 'probes': {}}
+            age = time.monotonic() - self._refreshed_at
+            snapshot = dict(self._snapshot)
+        snapshot['age_seconds'] = round(age, 2)
+        snapshot['stale'] = age > 3 * get_config().HEALTH_CHECK_INTERVAL
+        if snapshot['stale']:
+            snapshot['ready'] = False
+        return snapshot
+
+
+health_monitor = HealthMonitor()
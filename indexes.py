@@ -0,0 +1,91 @@
+"""
+Managed secondary indexes for Convex Studio Inventory System
+Every index the application's queries rely on is declared here. ensure_indexes()
+brings a database in line with the declaration: missing indexes are created,
+changed ones rebuilt and managed indexes that are no longer declared dropped.
+It runs whenever migrations are applied, so a change to INDEXES ships with a
+migration.
+"""
+
+import logging
+
+from work_dashboard import day_sql
+
+logger = logging.getLogger(__name__)
+
+# Only indexes with this prefix are managed; anything else is left alone
+INDEX_PREFIX = 'idx_'
+
+# (name, table, indexed columns, partial-index condition or None)
+INDEXES = [
+    # FIFO allocation, /api/serial_numbers and the order form: in-stock rows by type and capacity, in id order
+    ('idx_stock_available', 'stock', 'item_type, capacity', 'quantity > 0'),
+    # Stock search: one index per filter, serial and disk lookups case-insensitive for exact and prefix seeks
+    ('idx_stock_type_capacity_owner', 'stock', 'item_type, capacity, storage_owner', None),
+    ('idx_stock_owner', 'stock', 'storage_owner', None),
+    ('idx_stock_condition', 'stock', 'condition', None),
+    ('idx_stock_serial_number', 'stock', 'serial_number COLLATE NOCASE', None),
+    ('idx_stock_disk_name', 'stock', 'disk_name COLLATE NOCASE', None),
+    ('idx_stock_purchase_date', 'stock', 'purchase_date', None),
+    ('idx_orders_created_at', 'orders', 'created_at', None),
+    ('idx_order_allocations_order', 'order_allocations', 'order_id', None),
+    ('idx_work_projects_created_at', 'work_projects', 'created_at', None),
+    ('idx_work_projects_client_name', 'work_projects', 'client_name COLLATE NOCASE', None),
+    ('idx_work_projects_status', 'work_projects', 'status', None),
+    ('idx_work_projects_wedding_date', 'work_projects', 'wedding_date', None),
+    # Upcoming count on /work: wedding and engagement dates as day numbers, range-scanned from today
+    ('idx_work_projects_wedding_day', 'work_projects', day_sql('wedding_date'), None),
+    ('idx_work_projects_engagement_day', 'work_projects', day_sql('engagement_date'), None),
+    # Calendar: events in a day range; the primary key makes it cover kind and project
+    ('idx_work_project_events_day', 'work_project_events', 'day, event_kind', None),
+    # "Assigned to me" on the dashboard and /mywork; covers the project_id subquery
+    ('idx_work_assignments_assignee', 'work_assignments', 'assignee, status, project_id', None),
+    ('idx_work_logs_project', 'work_logs', 'project_id, event_date', None),
+    ('idx_payment_details_project', 'payment_details', 'project_id', None),
+    ('idx_employees_name', 'employees', 'name', None),
+]
+
+
+def index_sql(name, table, columns, where=None):
+    """Build the CREATE INDEX statement for a declared index"""
+    sql = f'CREATE INDEX {name} ON {table} ({columns})'
+    if where:
+        sql += f' WHERE {where}'
+    return sql
+
+
+def _normalize(sql):
+    return ' '.join((sql or '').split()).lower()
+
+
+def ensure_indexes(conn):
+    """Create, rebuild or drop managed indexes to match INDEXES
+
+    Indexes on tables that do not exist yet are skipped and picked up on a
+    later run. Returns a dict listing the indexes created and dropped.
+    """
+    c = conn.cursor()
+    tables = {row[0] for row in c.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    existing = {
+        name: sql for name, sql in c.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type='index' AND name LIKE ? ESCAPE '\\'",
+            (INDEX_PREFIX.replace('_', '\\_') + '%',)
+        )
+    }
+    declared = {name: (table, index_sql(name, table, columns, where)) for name, table, columns, where in INDEXES}
+
+    created, dropped = [], []
+    for name in existing:
+        if name not in declared or _normalize(existing[name]) != _normalize(declared[name][1]):
+            c.execute(f'DROP INDEX IF EXISTS {name}')
+            dropped.append(name)
+    for name, (table, sql) in declared.items():
+        if table not in tables:
+            logger.info(f"Skipping index {name}: table {table} does not exist")
+            continue
+        if name not in existing or name in dropped:
+            c.execute(sql)
+            created.append(name)
+    if created or dropped:
+        logger.info(f"Indexes created: {created or 'none'}; dropped: {dropped or 'none'}")
+    return {'created': created, 'dropped': dropped}
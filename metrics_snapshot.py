@@ -0,0 +1,100 @@
+"""
+Materialized metrics snapshot for Convex Studio Inventory System
+The /metrics dashboard reads a precomputed snapshot built from the
+trigger-maintained stock_summary table. The snapshot is rebuilt when the
+stock or orders change counters move, and at the latest after CACHE_TIMEOUT.
+"""
+
+from config import get_config
+from data_versions import table_versions
+from fragment_cache import FragmentCache
+
+SOURCE_TABLES = ('stock', 'orders')
+
+
+def build_metrics(conn):
+    """Compute every figure shown on the metrics dashboard"""
+    c = conn.cursor()
+
+    # Ownership distribution
+    c.execute("""
+        SELECT storage_owner,
+               SUM(in_stock_rows) as total_items,
+               SUM(in_stock_quantity) as total_quantity,
+               SUM(CASE WHEN item_type = 'Pendrive' THEN in_stock_quantity ELSE 0 END) as pendrive_count,
+               SUM(CASE WHEN item_type = 'HDD' THEN in_stock_quantity ELSE 0 END) as hdd_count,
+               SUM(CASE WHEN item_type = 'SSD' THEN in_stock_quantity ELSE 0 END) as ssd_count
+        FROM stock_summary
+        WHERE in_stock_rows > 0
+        GROUP BY storage_owner
+        ORDER BY total_quantity DESC
+    """)
+    ownership_data = c.fetchall()
+
+    # Item type distribution by ownership
+    c.execute("""
+        SELECT storage_owner, item_type, SUM(in_stock_quantity) as total_quantity
+        FROM stock_summary
+        WHERE in_stock_rows > 0
+        GROUP BY storage_owner, item_type
+        ORDER BY storage_owner, total_quantity DESC
+    """)
+    item_type_by_owner = c.fetchall()
+
+    # Capacity distribution by ownership
+    c.execute("""
+        SELECT storage_owner, capacity, SUM(in_stock_quantity) as total_quantity
+        FROM stock_summary
+        WHERE in_stock_rows > 0
+        GROUP BY storage_owner, capacity
+        ORDER BY storage_owner, total_quantity DESC
+    """)
+    capacity_by_owner = c.fetchall()
+
+    # Recent orders
+    c.execute("""
+        SELECT o.storage_owner, o.disk_name, o.order_reason, o.storage_sent_to, o.item_type, o.capacity, o.quantity, o.sent_by, o.order_date, o.created_at
+        FROM orders o
+        ORDER BY o.created_at DESC
+        LIMIT 20
+    """)
+    recent_orders = c.fetchall()
+
+    # Total statistics
+    c.execute("""
+        SELECT
+            COUNT(DISTINCT storage_owner) as total_owners,
+            SUM(in_stock_quantity) as total_items,
+            COUNT(DISTINCT item_type) as total_item_types,
+            COUNT(DISTINCT capacity) as total_capacities
+        FROM stock_summary
+        WHERE in_stock_rows > 0
+    """)
+    total_stats = c.fetchone()
+
+    return {
+        'ownership_data': ownership_data,
+        'item_type_by_owner': item_type_by_owner,
+        'capacity_by_owner': capacity_by_owner,
+        'recent_orders': recent_orders,
+        'total_stats': total_stats,
+    }
+
+
+class MetricsSnapshot:
+    """Process-wide metrics snapshot, rebuilt when its source tables change"""
+
+    def __init__(self):
+        self._cache = FragmentCache(max_entries=1)
+
+    def get(self, conn):
+        """Return the current metrics, rebuilding the snapshot if it is out of date"""
+        return self._cache.get(('metrics',), table_versions(conn, SOURCE_TABLES), lambda: build_metrics(conn),
+                               max_age=get_config().CACHE_TIMEOUT)
+
+    def invalidate(self):
+        """Force the next read to rebuild the snapshot"""
+        self._cache.clear()
+
+
+metrics_snapshot = MetricsSnapshot()
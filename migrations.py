@@ -0,0 +1,342 @@
+"""
+Schema migrations for Convex Studio Inventory System
+Every schema change is an ordered, idempotent migration recorded in the
+schema_version table. At startup migrate() costs a single version lookup when
+the database is already current; otherwise each pending migration runs in its
+own write transaction together with its schema_version row.
+"""
+
+import logging
+import sqlite3
+
+from assignments import SECTIONS, init_work_assignments
+from data_versions import ensure_version_triggers
+from indexes import ensure_indexes
+from stock import init_stock_summary
+from work_dashboard import init_work_summary
+from work_events import init_work_events
+from work_search import init_work_search
+
+logger = logging.getLogger(__name__)
+
+
+def add_missing_columns(conn, table, columns):
+    """Add each (name, definition) column that the table does not have yet"""
+    existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    for name, definition in columns:
+        if name not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
+
+def migration_1_initial_schema(conn):
+    """Core stock, orders, work_projects and employees tables"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS stock (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_type TEXT NOT NULL,
+        capacity TEXT NOT NULL,
+        serial_number TEXT,
+        purchase_date TEXT,
+        quantity INTEGER NOT NULL,
+        storage_owner TEXT NOT NULL,
+        condition TEXT DEFAULT 'New',
+        disk_name TEXT
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_type TEXT NOT NULL,
+        capacity TEXT NOT NULL,
+        quantity INTEGER NOT NULL,
+        storage_owner TEXT NOT NULL,
+        disk_name TEXT,
+        order_reason TEXT NOT NULL,
+        storage_sent_to TEXT NOT NULL,
+        sent_by TEXT NOT NULL,
+        order_date TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS work_projects (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_name TEXT NOT NULL,
+        referred_by TEXT,
+        wedding_date TEXT,
+        engagement_date TEXT,
+        services TEXT NOT NULL,
+        notes TEXT,
+        status TEXT DEFAULT 'Active',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        religion TEXT,
+        custom_religion TEXT,
+        christian_subcategory TEXT,
+        requirements TEXT,
+        sides TEXT
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS employees (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        role TEXT NOT NULL,
+        password TEXT
+    )''')
+    # Columns added to older databases after their tables were first created
+    add_missing_columns(conn, 'stock', [
+        ('condition', 'TEXT DEFAULT "New"'),
+        ('disk_name', 'TEXT'),
+    ])
+    add_missing_columns(conn, 'orders', [
+        ('sent_by', 'TEXT'),
+        ('storage_owner', 'TEXT'),
+        ('disk_name', 'TEXT'),
+        ('order_reason', 'TEXT'),
+        ('storage_sent_to', 'TEXT'),
+        ('order_date', 'TEXT'),
+    ])
+    add_missing_columns(conn, 'work_projects', [
+        ('religion', 'TEXT'),
+        ('custom_religion', 'TEXT'),
+        ('christian_subcategory', 'TEXT'),
+        ('requirements', 'TEXT'),
+        ('sides', 'TEXT'),
+    ])
+
+
+def migration_2_add_audit_trail(conn):
+    """Audit trail table"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS audit_trail (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        record_id INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        old_values TEXT,
+        new_values TEXT,
+        user_id TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+
+def migration_3_add_user_management(conn):
+    """User management tables"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        role TEXT NOT NULL DEFAULT 'staff',
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS user_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        session_token TEXT UNIQUE NOT NULL,
+        expires_at TIMESTAMP NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )''')
+
+
+def migration_4_add_indexes(conn):
+    """Managed secondary index set"""
+    ensure_indexes(conn)
+
+
+def migration_5_normalize_work_assignments(conn):
+    """Per-section assignment columns, normalized into work_assignments"""
+    add_missing_columns(conn, 'work_projects', [
+        (f'{section}_{column}', 'TEXT')
+        for section in SECTIONS
+        for column in ('assigned_to', 'date_assigned', 'status', 'completed_date', 'rework_date')
+    ])
+    init_work_assignments(conn)
+
+
+def migration_6_add_work_logs_and_payments(conn):
+    """Work log and payment detail tables"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS work_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        project_id INTEGER NOT NULL,
+        section TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        event_date TEXT NOT NULL,
+        user TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        details TEXT,
+        FOREIGN KEY (project_id) REFERENCES work_projects(id)
+    )''')
+    add_missing_columns(conn, 'work_logs', [('details', 'TEXT')])
+    conn.execute('''CREATE TABLE IF NOT EXISTS payment_details (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        project_id INTEGER NOT NULL,
+        quoted_amount REAL DEFAULT 0,
+        discount REAL DEFAULT 0,
+        advance_amount REAL DEFAULT 0,
+        remaining_amount AS (quoted_amount - discount - advance_amount) STORED,
+        FOREIGN KEY (project_id) REFERENCES work_projects(id)
+    )''')
+
+
+def migration_7_add_project_detail_columns(conn):
+    """Data copy, backup and ceremony columns on work_projects"""
+    add_missing_columns(conn, 'work_projects', [
+        ('photo_copied_location', 'TEXT'),
+        ('video_copied_location', 'TEXT'),
+        ('photo_copied_by', 'TEXT'),
+        ('video_copied_by', 'TEXT'),
+        ('photo_pc_name', 'TEXT'),
+        ('video_pc_name', 'TEXT'),
+        ('has_backup', 'TEXT'),
+        ('backup_pc_name', 'TEXT'),
+        ('backup_location', 'TEXT'),
+        ('backup_copied_by', 'TEXT'),
+        ('maduaram_veypu_date', 'TEXT'),
+        ('maduaram_veypu_type', 'TEXT'),
+        ('save_the_date', 'TEXT'),
+    ])
+
+
+def migration_8_add_employee_login_columns(conn):
+    """Password and active flag on employees"""
+    add_missing_columns(conn, 'employees', [
+        ('password', 'TEXT'),
+        ('active', 'INTEGER DEFAULT 1'),
+    ])
+
+
+def migration_9_add_stock_allocations_and_summary(conn):
+    """Order allocation records and the trigger-maintained stock summary"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS order_allocations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id INTEGER NOT NULL,
+        stock_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (order_id) REFERENCES orders(id),
+        FOREIGN KEY (stock_id) REFERENCES stock(id)
+    )''')
+    init_stock_summary(conn)
+
+
+def migration_10_add_table_versions(conn):
+    """Per-table change counters"""
+    ensure_version_triggers(conn)
+
+
+def migration_11_add_work_search(conn):
+    """Full-text index over work projects"""
+    init_work_search(conn)
+
+
+def migration_12_add_stock_search_indexes(conn):
+    """Indexes behind the stock search filters and lookups"""
+    ensure_indexes(conn)
+    # With several indexes on stock, the planner needs statistics to pick the selective one
+    conn.execute('ANALYZE stock')
+
+
+def migration_13_track_work_tables(conn):
+    """Change counters for work projects, assignments and payments"""
+    ensure_version_triggers(conn)
+
+
+def migration_14_add_scoped_versions(conn):
+    """Employee change counter and per-project counters for work logs and payments"""
+    ensure_version_triggers(conn)
+
+
+def migration_15_add_work_dashboard_counters(conn):
+    """Trigger-maintained work summary and day-number indexes for the /work counters"""
+    init_work_summary(conn)
+    ensure_indexes(conn)
+
+
+def migration_16_add_work_project_events(conn):
+    """Typed work project event dates, indexed by day, for the calendar"""
+    init_work_events(conn)
+    ensure_indexes(conn)
+
+
+# (version, description, function), in the order they must be applied
+MIGRATIONS = [
+    (1, 'Initial version', migration_1_initial_schema),
+    (2, 'Add audit trail table', migration_2_add_audit_trail),
+    (3, 'Add user management tables', migration_3_add_user_management),
+    (4, 'Add managed secondary indexes', migration_4_add_indexes),
+    (5, 'Normalize work assignments', migration_5_normalize_work_assignments),
+    (6, 'Add work logs and payment details tables', migration_6_add_work_logs_and_payments),
+    (7, 'Add project copy, backup and ceremony columns', migration_7_add_project_detail_columns),
+    (8, 'Add employee password and active columns', migration_8_add_employee_login_columns),
+    (9, 'Add order allocations and stock summary', migration_9_add_stock_allocations_and_summary),
+    (10, 'Add table change counters', migration_10_add_table_versions),
+    (11, 'Add work project full-text search', migration_11_add_work_search),
+    (12, 'Add stock search indexes', migration_12_add_stock_search_indexes),
+    (13, 'Track work table changes', migration_13_track_work_tables),
+    (14, 'Add employee and per-project change counters', migration_14_add_scoped_versions),
+    (15, 'Add work dashboard counters', migration_15_add_work_dashboard_counters),
+    (16, 'Add work project events', migration_16_add_work_project_events),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    """Return the highest applied schema version, or 0 for an empty database"""
+    try:
+        row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    except sqlite3.OperationalError:
+        # No schema_version table yet
+        return 0
+    return row[0] or 0
+
+
+def ensure_version_table(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS schema_version (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        version INTEGER NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        description TEXT
+    )''')
+
+
+def apply_migration(conn, version, description, migration_func):
+    """Run one migration and record it, all in a single write transaction
+
+    Returns False if another process applied the version first.
+    """
+    ensure_version_table(conn)
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Re-checked under the write lock so concurrent workers apply it once
+        if current_version(conn) >= version:
+            conn.rollback()
+            return False
+        migration_func(conn)
+        conn.execute(
+            'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+            (version, description)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    logger.info(f"Applied migration {version}: {description}")
+    return True
+
+
+def pending_migrations(conn):
+    """Return the migrations newer than the database's schema version"""
+    version = current_version(conn)
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+
+def migrate(conn):
+    """Apply every pending migration; returns the versions applied"""
+    if current_version(conn) >= LATEST_VERSION:
+        return []
+    applied = []
+    for version, description, migration_func in pending_migrations(conn):
+        if apply_migration(conn, version, description, migration_func):
+            applied.append(version)
+    if applied:
+        # Indexes on tables created after migration 4 are picked up here
+        ensure_indexes(conn)
+        conn.commit()
+    return applied
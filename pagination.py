@@ -0,0 +1,77 @@
+"""
+Keyset (seek) pagination for Convex Studio Inventory System
+Pages are addressed by an opaque cursor holding the sort key of the last row
+shown, so fetching page N costs the same as fetching page 1.
+"""
+
+import base64
+import binascii
+import json
+
+# JSON values that can be bound as SQL parameters
+_SCALAR_TYPES = (str, int, float, type(None))
+
+
+def encode_cursor(values):
+    """Encode the sort key of a row into an opaque, URL-safe cursor"""
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Decode a cursor, returning None if it is missing or malformed"""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, binascii.Error):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    # A crafted cursor could hold objects or lists, which sqlite3 cannot bind
+    if not all(isinstance(value, _SCALAR_TYPES) for value in values):
+        return None
+    return values
+
+
+def keyset_page(conn, select, keys, key_columns, cursor=None, page_size=50,
+                descending=False, where=None, params=()):
+    """Fetch one page of rows ordered by a unique sort key
+
+    select       SELECT ... FROM ... part of the query, without WHERE/ORDER BY
+    keys         SQL expressions forming the sort key, ending in a unique column,
+                 e.g. ['created_at', 'id'] or ['wp.client_name COLLATE NOCASE', 'wp.id']
+    key_columns  names of the result columns holding those values
+    cursor       token returned for the previous page, or None for the first page
+    where        optional extra filter, with its values in params
+
+    Sort key columns must not be NULL. Returns (rows, next_cursor); next_cursor
+    is None on the last page.
+    """
+    clauses = [f'({where})'] if where else []
+    values = list(params)
+    after = decode_cursor(cursor, len(keys))
+    if after is not None:
+        op = '<' if descending else '>'
+        # The single-column bound lets the planner seek on the leading index column
+        clauses.append(f'{keys[0]} {op}= ?')
+        clauses.append(f"({', '.join(keys)}) {op} ({', '.join('?' for _ in keys)})")
+        values.append(after[0])
+        values.extend(after)
+    direction = 'DESC' if descending else 'ASC'
+    sql = select
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    sql += ' ORDER BY ' + ', '.join(f'{key} {direction}' for key in keys) + ' LIMIT ?'
+    values.append(page_size + 1)
+
+    c = conn.cursor()
+    c.execute(sql, values)
+    rows = c.fetchall()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        names = [column[0] for column in c.description]
+        positions = [names.index(name) for name in key_columns]
+        next_cursor = encode_cursor(rows[-1][position] for position in positions)
+    return rows, next_cursor
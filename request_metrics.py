@@ -0,0 +1,227 @@
+"""
+Request instrumentation for Convex Studio Inventory System
+Records per-endpoint latency histograms, response status counts, query counts
+and time spent in SQLite, and renders them in the Prometheus text format.
+
+Connections opened by db.connect() use InstrumentedConnection, whose cursors
+time every execute and fetch call. The time is charged to the request being
+served on the current thread. Iterating over a cursor is left native: a
+Python wrapper per row would cost more than the rows themselves, so rows
+stepped through by iteration rather than fetch* are not counted as DB time.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import request
+
+# Upper bounds in seconds, as in the Prometheus client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+
+
+class RequestStats:
+    """Query count and SQLite time accumulated by one request
+
+    When statement profiling is on, statements also collects one
+    [sql, params, seconds] entry per statement, fetch time included.
+    """
+    __slots__ = ('started', 'queries', 'db_seconds', 'statements')
+
+    def __init__(self, profile=False):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = [] if profile else None
+
+
+def _timed(method, is_query):
+    """Wrap a cursor method so its run time is charged to the current request"""
+    def wrapper(self, *args, **kwargs):
+        stats = getattr(_local, 'stats', None)
+        if stats is None:
+            return method(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.db_seconds += elapsed
+            if is_query:
+                stats.queries += 1
+                if stats.statements is not None:
+                    self._profile_entry = [args[0], args[1] if len(args) > 1 else (), elapsed]
+                    stats.statements.append(self._profile_entry)
+            elif stats.statements is not None and getattr(self, '_profile_entry', None):
+                self._profile_entry[2] += elapsed
+    wrapper.__name__ = method.__name__
+    return wrapper
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports its statements and fetches to the current request"""
+    execute = _timed(sqlite3.Cursor.execute, True)
+    executemany = _timed(sqlite3.Cursor.executemany, True)
+    executescript = _timed(sqlite3.Cursor.executescript, True)
+    # SQLite produces rows lazily, so fetching results is DB time too; one
+    # timing per call, not per row, so plain iteration stays at native speed
+    fetchone = _timed(sqlite3.Cursor.fetchone, False)
+    fetchmany = _timed(sqlite3.Cursor.fetchmany, False)
+    fetchall = _timed(sqlite3.Cursor.fetchall, False)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, including those behind execute(), are instrumented"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # Connection.execute and friends do not go through cursor(), so route them explicitly
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+    def executescript(self, *args):
+        return self.cursor().executescript(*args)
+
+
+class Histogram:
+    """Bucket counts, sum and count of observed values"""
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """In-process aggregates for every endpoint, guarded by one lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency = defaultdict(Histogram)      # (endpoint, method)
+            self.db_time = defaultdict(Histogram)      # (endpoint, method)
+            self.responses = defaultdict(int)          # (endpoint, method, status)
+            self.queries = defaultdict(int)            # (endpoint, method)
+
+    def record(self, endpoint, method, status, seconds, stats):
+        key = (endpoint, method)
+        with self._lock:
+            self.latency[key].observe(seconds)
+            self.db_time[key].observe(stats.db_seconds)
+            self.responses[(endpoint, method, status)] += 1
+            self.queries[key] += stats.queries
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        with self._lock:
+            latency = {key: _copy(h) for key, h in self.latency.items()}
+            db_time = {key: _copy(h) for key, h in self.db_time.items()}
+            responses = dict(self.responses)
+            queries = dict(self.queries)
+
+        lines = []
+        _render_histogram(lines, 'convex_http_request_duration_seconds',
+                          'Time spent serving requests, by endpoint', latency)
+        _render_histogram(lines, 'convex_http_request_db_seconds',
+                          'Time spent in SQLite per request, by endpoint', db_time)
+        lines.append('# HELP convex_http_responses_total Responses sent, by endpoint and status code')
+        lines.append('# TYPE convex_http_responses_total counter')
+        for (endpoint, method, status), value in sorted(responses.items()):
+            lines.append(f'convex_http_responses_total{_labels(endpoint, method, status=status)} {value}')
+        lines.append('# HELP convex_db_queries_total SQL statements executed, by endpoint')
+        lines.append('# TYPE convex_db_queries_total counter')
+        for (endpoint, method), value in sorted(queries.items()):
+            lines.append(f'convex_db_queries_total{_labels(endpoint, method)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _copy(histogram):
+    copy = Histogram()
+    copy.counts = list(histogram.counts)
+    copy.total, copy.count = histogram.total, histogram.count
+    return copy
+
+
+def _labels(endpoint, method, **extra):
+    pairs = [('endpoint', endpoint), ('method', method)] + list(extra.items())
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _render_histogram(lines, name, help_text, histograms):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for (endpoint, method), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(endpoint, method, le=bound)} {cumulative}')
+        lines.append(f'{name}_bucket{_labels(endpoint, method, le="+Inf")} {histogram.count}')
+        lines.append(f'{name}_sum{_labels(endpoint, method)} {histogram.total:.6f}')
+        lines.append(f'{name}_count{_labels(endpoint, method)} {histogram.count}')
+
+
+request_metrics = RequestMetrics()
+
+# Set by sql_profiler.init_app to collect every statement of every request
+profile_statements = False
+
+
+def current_request_stats():
+    """The RequestStats of the request on this thread, or None"""
+    return getattr(_local, 'stats', None)
+
+
+@contextmanager
+def untracked():
+    """Run queries without charging them to the current request"""
+    stats, _local.stats = getattr(_local, 'stats', None), None
+    try:
+        yield
+    finally:
+        _local.stats = stats
+
+
+def _start_request():
+    _local.stats = RequestStats(profile=profile_statements)
+
+
+def _finish_request(response):
+    stats = getattr(_local, 'stats', None)
+    if stats is not None:
+        # Unmatched URLs share one label so scans cannot blow up the series count
+        endpoint = request.endpoint or 'unmatched'
+        request_metrics.record(endpoint, request.method, response.status_code,
+                               time.perf_counter() - stats.started, stats)
+    return response
+
+
+def _clear_request(exception=None):
+    _local.stats = None
+
+
+def init_app(app):
+    """Time every request served by the Flask application"""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_clear_request)
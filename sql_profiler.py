@@ -0,0 +1,133 @@
+"""
+SQL profiler for Convex Studio Inventory System
+Opt-in (SQL_PROFILER=true). Builds on the instrumented connections of
+request_metrics: every statement a request runs is timed, fetches included.
+At the end of each request:
+
+- statements slower than SQL_SLOW_QUERY_MS are logged with their EXPLAIN QUERY PLAN
+- statement shapes repeated SQL_REPEAT_THRESHOLD times or more are flagged as
+  likely N+1 patterns
+- a JSON report of the request's queries is appended to SQL_PROFILE_LOG
+"""
+
+import json
+import logging
+import re
+import sqlite3
+from collections import Counter
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from flask import request
+
+import request_metrics
+from config import get_config
+from db import connect
+
+logger = logging.getLogger(__name__)
+report_logger = logging.getLogger('sql_profile')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def statement_shape(sql):
+    """Reduce a statement to its shape: literals become ? and IN lists collapse"""
+    shape = _STRING_LITERAL.sub('?', sql)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _PLACEHOLDER_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def explain(sql, params):
+    """Return the EXPLAIN QUERY PLAN of a statement as readable lines"""
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT', 'REPLACE')):
+        return []
+    conn = connect()
+    try:
+        rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    except (sqlite3.Error, ValueError) as e:
+        return [f'unavailable: {e}']
+    finally:
+        conn.close()
+    return [row[3] for row in rows]
+
+
+def build_report(endpoint, method, status, statements):
+    """Summarize one request's statements into the profile report"""
+    config_class = get_config()
+    slow_seconds = config_class.SQL_SLOW_QUERY_MS / 1000
+    shapes = Counter()
+    shape_seconds = Counter()
+    for sql, _, seconds in statements:
+        shape = statement_shape(sql)
+        shapes[shape] += 1
+        shape_seconds[shape] += seconds
+
+    slow = [
+        {'sql': _WHITESPACE.sub(' ', sql).strip(), 'ms': round(seconds * 1000, 2)}
+        for sql, params, seconds in statements if seconds >= slow_seconds
+    ]
+    repeated = [
+        {'shape': shape, 'count': count, 'ms': round(shape_seconds[shape] * 1000, 2)}
+        for shape, count in shapes.most_common() if count >= config_class.SQL_REPEAT_THRESHOLD
+    ]
+    return {
+        'time': datetime.now().isoformat(),
+        'endpoint': endpoint,
+        'method': method,
+        'status': status,
+        'queries': len(statements),
+        'distinct_shapes': len(shapes),
+        'db_ms': round(sum(seconds for _, _, seconds in statements) * 1000, 2),
+        'slow': slow,
+        'repeated': repeated,
+        'shapes': [
+            {'shape': shape, 'count': count, 'ms': round(shape_seconds[shape] * 1000, 2)}
+            for shape, count in shapes.most_common()
+        ],
+    }
+
+
+def _profile_request(response):
+    stats = request_metrics.current_request_stats()
+    if stats is None or not stats.statements:
+        return response
+    endpoint = request.endpoint or 'unmatched'
+    report = build_report(endpoint, request.method, response.status_code, stats.statements)
+
+    if report['slow']:
+        slow_seconds = get_config().SQL_SLOW_QUERY_MS / 1000
+        # The plans are looked up outside the request's own accounting
+        with request_metrics.untracked():
+            plans = [explain(sql, params) for sql, params, seconds in stats.statements if seconds >= slow_seconds]
+        for entry, plan in zip(report['slow'], plans):
+            entry['plan'] = plan
+            logger.warning(f"Slow query in {endpoint} ({entry['ms']} ms): {entry['sql']} | plan: {'; '.join(plan)}")
+    for entry in report['repeated']:
+        logger.warning(f"Possible N+1 in {endpoint}: {entry['count']} x {entry['shape']}")
+
+    report_logger.info(json.dumps(report))
+    return response
+
+
+def init_app(app):
+    """Profile every request's SQL when Config.SQL_PROFILER_ENABLED is set"""
+    config_class = get_config()
+    if not config_class.SQL_PROFILER_ENABLED:
+        return False
+    log_path = Path(config_class.SQL_PROFILE_LOG)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    if not report_logger.handlers:
+        handler = RotatingFileHandler(log_path, maxBytes=10 * 1024 * 1024, backupCount=5)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        report_logger.addHandler(handler)
+        report_logger.setLevel(logging.INFO)
+        report_logger.propagate = False
+    request_metrics.profile_statements = True
+    # Registered after request_metrics, so it runs first while the request's stats are still live
+    app.after_request(_profile_request)
+    return True
@@ -0,0 +1,258 @@
+"""
+Stock intake helpers for Convex Studio Inventory System
+Every physical unit is stored as its own stock row with quantity 1.
+"""
+
+import re
+
+# Upper bound on units accepted by a single bulk intake request
+MAX_BULK_INTAKE = 10000
+
+_SERIAL_PATTERN = re.compile(r'^(.*?)(\d+)$')
+
+# Optional text fields of an intake lot; absent or null is allowed
+LOT_TEXT_FIELDS = ('serial_number', 'purchase_date', 'condition', 'disk_name')
+
+ORDER_COLUMNS = ('item_type', 'capacity', 'quantity', 'storage_owner', 'disk_name',
+                 'order_reason', 'storage_sent_to', 'sent_by', 'order_date')
+
+
+class InsufficientStockError(ValueError):
+    """Raised when an order asks for more units than are in stock"""
+
+    def __init__(self, requested, available):
+        super().__init__(f'Insufficient stock: requested {requested}, available {available}')
+        self.requested = requested
+        self.available = available
+
+
+def expand_serial_range(start, end):
+    """Expand a serial range such as SN0001..SN0500 into individual serial numbers"""
+    start_match = _SERIAL_PATTERN.match(start.strip())
+    end_match = _SERIAL_PATTERN.match(end.strip())
+    if not start_match or not end_match:
+        raise ValueError('Serial range bounds must end in digits')
+    prefix, first = start_match.groups()
+    end_prefix, last = end_match.groups()
+    if prefix != end_prefix:
+        raise ValueError('Serial range bounds must share the same prefix')
+    if int(last) < int(first):
+        raise ValueError('Serial range end comes before its start')
+    count = int(last) - int(first) + 1
+    if count > MAX_BULK_INTAKE:
+        raise ValueError(f'Serial range covers {count} units, the limit is {MAX_BULK_INTAKE}')
+    width = len(first)
+    return [f'{prefix}{number:0{width}d}' for number in range(int(first), int(last) + 1)]
+
+
+def parse_serial_numbers(text):
+    """Split pasted serial numbers on commas, whitespace or new lines"""
+    return [serial for serial in re.split(r'[\s,]+', text or '') if serial]
+
+
+def lot_serial_numbers(lot):
+    """Return the explicit serial numbers of an intake lot, or None if it only has a quantity"""
+    if lot.get('serial_numbers'):
+        serials = lot['serial_numbers']
+        if isinstance(serials, str):
+            serials = parse_serial_numbers(serials)
+        return [str(serial).strip() for serial in serials if str(serial).strip()]
+    serial_range = lot.get('serial_range')
+    if serial_range:
+        if not isinstance(serial_range, dict):
+            raise ValueError('serial_range must be an object with start and end')
+        return expand_serial_range(str(serial_range.get('start', '')), str(serial_range.get('end', '')))
+    return None
+
+
+def form_serial_numbers(form):
+    """Read a pasted serial list or a serial_start/serial_end range from a submitted form"""
+    serial_start = form.get('serial_start', '').strip()
+    serial_end = form.get('serial_end', '').strip()
+    if serial_start and serial_end:
+        return expand_serial_range(serial_start, serial_end)
+    serials = parse_serial_numbers(form.get('serial_numbers', ''))
+    return serials or None
+
+
+def insert_stock_units(conn, lot, quantity=1, serial_numbers=None):
+    """Insert a lot of single-unit stock rows with one batched statement
+
+    Units sharing a serial number are generated inside SQLite by a recursive
+    CTE; explicit serial numbers are bound through a single executemany.
+    The caller owns the transaction. Returns the number of rows inserted.
+    """
+    values = (
+        lot['item_type'],
+        lot['capacity'],
+        lot.get('purchase_date'),
+        lot['storage_owner'],
+        lot.get('condition') or 'New',
+        lot.get('disk_name'),
+    )
+    c = conn.cursor()
+    if serial_numbers is not None:
+        c.executemany(
+            "INSERT INTO stock (item_type, capacity, purchase_date, storage_owner, condition, disk_name, serial_number, quantity) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, 1)",
+            (values + (serial,) for serial in serial_numbers)
+        )
+        return len(serial_numbers)
+    if quantity <= 0:
+        return 0
+    c.execute(
+        "WITH RECURSIVE units(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM units WHERE n < ?) "
+        "INSERT INTO stock (item_type, capacity, purchase_date, storage_owner, condition, disk_name, serial_number, quantity) "
+        "SELECT ?, ?, ?, ?, ?, ?, ?, 1 FROM units",
+        (quantity,) + values + (lot.get('serial_number'),)
+    )
+    return quantity
+
+
+def bulk_intake(conn, lots):
+    """Validate and insert several intake lots inside one write transaction
+
+    Each lot carries item_type, capacity and storage_owner plus either a
+    quantity, a serial_numbers list or a serial_range {start, end}.
+    Raises ValueError without writing anything if any lot is invalid.
+    """
+    prepared = []
+    total_units = 0
+    for index, lot in enumerate(lots, start=1):
+        if not isinstance(lot, dict):
+            raise ValueError(f'Lot {index}: expected an object')
+        for field in ('item_type', 'capacity', 'storage_owner'):
+            value = lot.get(field)
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f'Lot {index}: {field} is required')
+        for field in LOT_TEXT_FIELDS:
+            if not isinstance(lot.get(field), (str, type(None))):
+                raise ValueError(f'Lot {index}: {field} must be text')
+        serials = lot_serial_numbers(lot)
+        if serials is None:
+            quantity = lot.get('quantity', 0)
+            # bool is an int subclass; JSON true must not count as one unit
+            if not isinstance(quantity, int) or isinstance(quantity, bool):
+                raise ValueError(f'Lot {index}: invalid quantity value')
+            if quantity <= 0:
+                raise ValueError(f'Lot {index}: quantity must be greater than 0')
+        else:
+            quantity = len(serials)
+            if not quantity:
+                raise ValueError(f'Lot {index}: no serial numbers given')
+        total_units += quantity
+        if total_units > MAX_BULK_INTAKE:
+            raise ValueError(f'A single intake is limited to {MAX_BULK_INTAKE} units')
+        cleaned = {key: value.strip() if isinstance(value, str) else value for key, value in lot.items()}
+        prepared.append((cleaned, quantity, serials))
+
+    c = conn.cursor()
+    c.execute('BEGIN IMMEDIATE')
+    try:
+        inserted = sum(insert_stock_units(conn, lot, quantity, serials) for lot, quantity, serials in prepared)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return inserted
+
+
+# Oldest in-stock rows covering an order: each row's running total before it must
+# still be short of the order, and the last row gives only what is missing
+ALLOCATE_SQL = """INSERT INTO order_allocations (order_id, stock_id, quantity)
+    SELECT :order_id, id, MIN(quantity, :requested - (covered - quantity))
+    FROM (SELECT id, quantity, SUM(quantity) OVER (ORDER BY id) AS covered
+          FROM stock WHERE item_type = :item_type AND capacity = :capacity AND quantity > 0)
+    WHERE covered - quantity < :requested
+    ORDER BY id"""
+
+DEPLETE_SQL = """UPDATE stock
+    SET quantity = quantity - (SELECT a.quantity FROM order_allocations a
+                               WHERE a.order_id = :order_id AND a.stock_id = stock.id)
+    WHERE id IN (SELECT stock_id FROM order_allocations WHERE order_id = :order_id)"""
+
+
+def allocate_order(conn, order):
+    """Record an order and deplete matching stock oldest-first under a write lock
+
+    The write lock is taken up front with BEGIN IMMEDIATE so the availability
+    check and the decrement cannot interleave with another order. The
+    allocation is computed in SQL with a running total over the in-stock rows
+    in id order, written to order_allocations with one INSERT ... SELECT and
+    applied to stock with one UPDATE, however many rows the order spans.
+    Returns (order_id, [(stock_id, quantity), ...]).
+    Raises InsufficientStockError, leaving the database untouched.
+    """
+    requested = int(order['quantity'])
+    c = conn.cursor()
+    c.execute('BEGIN IMMEDIATE')
+    try:
+        c.execute(
+            f"INSERT INTO orders ({', '.join(ORDER_COLUMNS)}) VALUES ({', '.join('?' for _ in ORDER_COLUMNS)})",
+            tuple(order.get(column) for column in ORDER_COLUMNS)
+        )
+        params = {'order_id': c.lastrowid, 'requested': requested,
+                  'item_type': order['item_type'], 'capacity': order['capacity']}
+        c.execute(ALLOCATE_SQL, params)
+        allocations = c.execute(
+            "SELECT stock_id, quantity FROM order_allocations WHERE order_id = ? ORDER BY id", (params['order_id'],)
+        ).fetchall()
+        allocated = sum(take for _, take in allocations)
+        if allocated < requested:
+            # Every in-stock row was taken and it is still not enough
+            raise InsufficientStockError(requested, allocated)
+        c.execute(DEPLETE_SQL, params)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return params['order_id'], allocations
+
+
+def init_stock_summary(conn):
+    """Create stock_summary, backfill it and attach the triggers that keep it current
+
+    Dashboards read per-group totals from this table instead of scanning stock.
+    Runs inside the caller's transaction, so no stock change is missed between
+    the backfill and the triggers.
+    """
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='stock_summary'")
+    if c.fetchone():
+        return
+    c.execute('''CREATE TABLE stock_summary (
+        item_type TEXT NOT NULL,
+        capacity TEXT NOT NULL,
+        storage_owner TEXT NOT NULL,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        in_stock_rows INTEGER NOT NULL DEFAULT 0,
+        in_stock_quantity INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (item_type, capacity, storage_owner)
+    ) WITHOUT ROWID''')
+    c.execute('''INSERT INTO stock_summary (item_type, capacity, storage_owner, row_count, in_stock_rows, in_stock_quantity)
+        SELECT item_type, capacity, storage_owner, COUNT(*),
+               SUM(quantity > 0), SUM(MAX(quantity, 0))
+        FROM stock
+        GROUP BY item_type, capacity, storage_owner''')
+
+    add_new = '''
+        INSERT INTO stock_summary (item_type, capacity, storage_owner, row_count, in_stock_rows, in_stock_quantity)
+        VALUES (NEW.item_type, NEW.capacity, NEW.storage_owner, 1, NEW.quantity > 0, MAX(NEW.quantity, 0))
+        ON CONFLICT (item_type, capacity, storage_owner) DO UPDATE SET
+            row_count = row_count + 1,
+            in_stock_rows = in_stock_rows + excluded.in_stock_rows,
+            in_stock_quantity = in_stock_quantity + excluded.in_stock_quantity;'''
+    remove_old = '''
+        UPDATE stock_summary SET
+            row_count = row_count - 1,
+            in_stock_rows = in_stock_rows - (OLD.quantity > 0),
+            in_stock_quantity = in_stock_quantity - MAX(OLD.quantity, 0)
+        WHERE item_type = OLD.item_type AND capacity = OLD.capacity AND storage_owner = OLD.storage_owner;
+        DELETE FROM stock_summary
+        WHERE item_type = OLD.item_type AND capacity = OLD.capacity AND storage_owner = OLD.storage_owner
+          AND row_count <= 0;'''
+    c.execute(f'''CREATE TRIGGER stock_summary_insert AFTER INSERT ON stock BEGIN {add_new} END''')
+    c.execute(f'''CREATE TRIGGER stock_summary_delete AFTER DELETE ON stock BEGIN {remove_old} END''')
+    c.execute(f'''CREATE TRIGGER stock_summary_update
+        AFTER UPDATE OF item_type, capacity, storage_owner, quantity ON stock
+        BEGIN {remove_old} {add_new} END''')
@@ -0,0 +1,187 @@
+"""
+Streaming CSV stock import for Convex Studio Inventory System
+Reads supplier manifests row by row and writes them in chunked transactions,
+so large files never have to be held in memory.
+"""
+
+import codecs
+import csv
+import io
+import logging
+import sqlite3
+from datetime import datetime
+
+from stock import MAX_BULK_INTAKE
+
+logger = logging.getLogger(__name__)
+
+# Stock units written per transaction
+DEFAULT_CHUNK_SIZE = 2000
+# Per-row errors kept in the report; further errors are only counted
+MAX_REPORTED_ERRORS = 100
+
+REQUIRED_COLUMNS = ('item_type', 'capacity', 'storage_owner')
+OPTIONAL_COLUMNS = ('serial_number', 'purchase_date', 'quantity', 'condition', 'disk_name')
+
+# Header spellings seen in supplier manifests
+COLUMN_ALIASES = {
+    'type': 'item_type',
+    'item': 'item_type',
+    'size': 'capacity',
+    'owner': 'storage_owner',
+    'serial': 'serial_number',
+    'serial_no': 'serial_number',
+    'date': 'purchase_date',
+    'qty': 'quantity',
+    'disk': 'disk_name',
+}
+
+INSERT_SQL = (
+    "INSERT INTO stock (item_type, capacity, serial_number, purchase_date, quantity, storage_owner, condition, disk_name) "
+    "VALUES (?, ?, ?, ?, 1, ?, ?, ?)"
+)
+
+
+def normalize_header(name):
+    """Map a CSV header cell onto a stock column name"""
+    key = (name or '').strip().lower().replace(' ', '_').replace('-', '_')
+    return COLUMN_ALIASES.get(key, key)
+
+
+def validate_row(row):
+    """Check one CSV record against the stock schema
+
+    Returns (values, quantity) ready for INSERT_SQL, or raises ValueError.
+    """
+    for column in REQUIRED_COLUMNS:
+        if not row.get(column):
+            raise ValueError(f'{column} is required')
+    quantity_text = row.get('quantity') or '1'
+    try:
+        quantity = int(quantity_text)
+    except ValueError:
+        raise ValueError(f'invalid quantity {quantity_text!r}')
+    if quantity <= 0 or quantity > MAX_BULK_INTAKE:
+        raise ValueError(f'quantity must be between 1 and {MAX_BULK_INTAKE}')
+    purchase_date = row.get('purchase_date') or None
+    if purchase_date:
+        try:
+            datetime.strptime(purchase_date, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f'purchase_date {purchase_date!r} is not YYYY-MM-DD')
+    values = (
+        row['item_type'],
+        row['capacity'],
+        row.get('serial_number') or None,
+        purchase_date,
+        row['storage_owner'],
+        row.get('condition') or 'New',
+        row.get('disk_name') or None,
+    )
+    return values, quantity
+
+
+def decode_lines(stream, encoding):
+    """Yield the lines of a binary file object as text, decoding one line at a time
+
+    Only iteration is needed, so any upload buffer works, and a decoding
+    error surfaces on the line that holds the bad bytes.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for line in stream:
+        yield decoder.decode(line)
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def import_stock_csv(conn, stream, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, encoding='utf-8-sig'):
+    """Stream a CSV manifest into the stock table
+
+    ``stream`` may be a binary or text file object. Valid rows are expanded
+    into one stock row per unit and written with executemany, committing
+    every ``chunk_size`` units. Invalid rows are skipped and reported. If the
+    file turns out to be undecodable or malformed part way through, the rows
+    read so far are imported and the report's ``aborted`` entry gives the
+    first line that was not, with the error.
+    ``progress`` is called as progress(report) after every committed chunk.
+    Raises ValueError if the header is missing a required column.
+    """
+    if not isinstance(stream, io.TextIOBase):
+        stream = decode_lines(stream, encoding)
+    reader = csv.reader(stream)
+    try:
+        header = next(reader, None)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ValueError(f'unreadable CSV data: {e}')
+    if not header:
+        raise ValueError('CSV file is empty')
+    columns = [normalize_header(cell) for cell in header]
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"CSV is missing required column(s): {', '.join(missing)}")
+    known = set(REQUIRED_COLUMNS + OPTIONAL_COLUMNS)
+    positions = [(index, column) for index, column in enumerate(columns) if column in known]
+
+    report = {'rows_read': 0, 'imported': 0, 'skipped': 0, 'chunks': 0, 'errors': []}
+    batch = []
+
+    def record_error(line_number, message):
+        report['skipped'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line_number, 'error': message})
+
+    def flush():
+        try:
+            conn.executemany(INSERT_SQL, batch)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        report['imported'] += len(batch)
+        report['chunks'] += 1
+        batch.clear()
+        logger.info('Stock import: %d rows read, %d units imported', report['rows_read'], report['imported'])
+        if progress:
+            progress(report)
+
+    while True:
+        try:
+            record = next(reader, None)
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Units from earlier chunks are already committed; report the first line
+            # not imported instead of raising, so the file is not re-uploaded whole
+            report['aborted'] = {'line': reader.line_num + 1, 'error': f'unreadable CSV data: {e}'}
+            break
+        if record is None:
+            break
+        line_number = reader.line_num
+        if not any(cell.strip() for cell in record):
+            continue
+        report['rows_read'] += 1
+        row = {column: record[index].strip() for index, column in positions if index < len(record)}
+        try:
+            values, quantity = validate_row(row)
+        except ValueError as e:
+            record_error(line_number, str(e))
+            continue
+        batch.extend([values] * quantity)
+        if len(batch) >= chunk_size:
+            flush()
+    if batch:
+        flush()
+    return report
+
+
+def summarize_import(report, max_errors=5):
+    """Build (success, error) flash messages from an import report"""
+    success = f"Imported {report['imported']} item(s) from {report['rows_read']} row(s)."
+    problems = []
+    if report.get('aborted'):
+        aborted = report['aborted']
+        problems.append(f"Import stopped at line {aborted['line']} ({aborted['error']}); "
+                        f"lines before it were imported, upload only the lines from there on")
+    if report['skipped']:
+        details = '; '.join(f"line {error['line']}: {error['error']}" for error in report['errors'][:max_errors])
+        problems.append(f"{report['skipped']} row(s) skipped - {details}")
+    return success, ' '.join(problems) or None
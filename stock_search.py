@@ -0,0 +1,102 @@
+"""
+Stock search for Convex Studio Inventory System
+Filters stock rows server-side, sorts them and pages with keyset cursors.
+Every filter has an index behind it (see indexes.INDEXES), so finding a
+drive by serial number or disk name is an index seek, not a scan.
+"""
+
+from pagination import keyset_page
+
+STOCK_COLUMNS = ('id', 'item_type', 'capacity', 'serial_number', 'purchase_date', 'quantity',
+                 'storage_owner', 'condition', 'disk_name')
+
+# Equality filters: query parameter -> column
+EXACT_FILTERS = {
+    'item_type': 'item_type',
+    'capacity': 'capacity',
+    'owner': 'storage_owner',
+    'condition': 'condition',
+}
+
+# Case-insensitive lookups; a trailing * asks for a prefix match
+LOOKUP_FILTERS = {
+    'serial': 'serial_number',
+    'disk_name': 'disk_name',
+}
+
+# sort name -> (sort key expressions, result columns holding them, column that must not be NULL)
+SORTS = {
+    'id': (['id'], ['id'], None),
+    'serial_number': (['serial_number COLLATE NOCASE', 'id'], ['serial_number', 'id'], 'serial_number'),
+    'disk_name': (['disk_name COLLATE NOCASE', 'id'], ['disk_name', 'id'], 'disk_name'),
+    'purchase_date': (['purchase_date', 'id'], ['purchase_date', 'id'], 'purchase_date'),
+}
+
+MAX_PAGE_SIZE = 200
+
+
+def _prefix_bounds(prefix):
+    """Half-open NOCASE range [low, high) holding every string starting with prefix"""
+    low = prefix.lower()
+    return low, low[:-1] + chr(ord(low[-1]) + 1)
+
+
+def build_filters(args):
+    """Turn request arguments into a WHERE clause and its parameters
+
+    Raises ValueError for an unknown in_stock value.
+    """
+    clauses, params = [], []
+    for name, column in EXACT_FILTERS.items():
+        value = (args.get(name) or '').strip()
+        if value:
+            clauses.append(f'{column} = ?')
+            params.append(value)
+    for name, column in LOOKUP_FILTERS.items():
+        value = (args.get(name) or '').strip()
+        if value.endswith('*') and value.rstrip('*'):
+            low, high = _prefix_bounds(value.rstrip('*'))
+            clauses.append(f'{column} COLLATE NOCASE >= ? AND {column} COLLATE NOCASE < ?')
+            params.extend([low, high])
+        elif value and not value.endswith('*'):
+            clauses.append(f'{column} COLLATE NOCASE = ?')
+            params.append(value)
+    in_stock = (args.get('in_stock') or '').strip().lower()
+    if in_stock in ('1', 'true', 'yes'):
+        clauses.append('quantity > 0')
+    elif in_stock in ('0', 'false', 'no'):
+        clauses.append('quantity <= 0')
+    elif in_stock:
+        raise ValueError('in_stock must be true or false')
+    return clauses, params
+
+
+def search_stock(conn, args, page_size=50):
+    """Return (rows as dicts, next_cursor) for one page of matching stock
+
+    args holds the request arguments: the filters above, sort (a key of
+    SORTS), order (asc or desc), cursor and limit. Raises ValueError for an
+    invalid sort, order or filter value.
+    """
+    sort = args.get('sort') or 'id'
+    if sort not in SORTS:
+        raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+    order = (args.get('order') or 'asc').lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError('order must be asc or desc')
+    try:
+        limit = int(args.get('limit') or page_size)
+    except ValueError:
+        raise ValueError('limit must be a number')
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    keys, key_columns, required = SORTS[sort]
+    clauses, params = build_filters(args)
+    if required:
+        # Keyset cursors need a non-NULL sort key; rows without one are not listed
+        clauses.append(f'{required} IS NOT NULL')
+    rows, next_cursor = keyset_page(
+        conn, f"SELECT {', '.join(STOCK_COLUMNS)} FROM stock", keys, key_columns,
+        cursor=args.get('cursor'), page_size=limit, descending=order == 'desc',
+        where=' AND '.join(clauses) or None, params=params)
+    return [dict(zip(STOCK_COLUMNS, row)) for row in rows], next_cursor
@@ -0,0 +1,38 @@
+"""
+Shared test fixtures for Convex Studio Inventory System
+The application is pointed at a scratch copy of inventory.db before it is imported.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRATCH_DIR = tempfile.mkdtemp(prefix='convex_tests_')
+SCRATCH_DB = os.path.join(SCRATCH_DIR, 'inventory.db')
+
+shutil.copy(ROOT / 'inventory.db', SCRATCH_DB)
+os.environ['DATABASE_PATH'] = SCRATCH_DB
+for setting, folder in (('BACKUP_DIR', 'backups'), ('LOGS_DIR', 'logs'), ('UPLOAD_FOLDER', 'uploads')):
+    os.environ[setting] = os.path.join(SCRATCH_DIR, folder)
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope='session')
+def app():
+    """The Flask application, with its schema set up on the scratch database"""
+    from app import create_app
+    return create_app()
+
+
+@pytest.fixture
+def db(app):
+    """A plain connection to the scratch database"""
+    conn = sqlite3.connect(SCRATCH_DB)
+    yield conn
+    conn.close()
@@ -0,0 +1,95 @@
+"""
+Tests for FIFO order allocation under the write lock
+"""
+
+import threading
+
+import pytest
+
+from conftest import SCRATCH_DB
+from db import connect
+from stock import InsufficientStockError, allocate_order
+
+ITEM_TYPE = 'Alloc-Test'
+
+
+def order_for(quantity, capacity='1TB'):
+    return {'item_type': ITEM_TYPE, 'capacity': capacity, 'quantity': quantity, 'storage_owner': 'Convex',
+            'disk_name': 'Disk-T', 'order_reason': 'Test', 'storage_sent_to': 'Client', 'sent_by': 'Tester',
+            'order_date': '2024-01-01'}
+
+
+@pytest.fixture
+def stock(db):
+    """Stock rows of the test type: quantities 2, 0, 3, 1 in id order"""
+    ids = [db.execute('''INSERT INTO stock (item_type, capacity, quantity, storage_owner)
+                         VALUES (?, '1TB', ?, 'Convex')''', (ITEM_TYPE, quantity)).lastrowid for quantity in (2, 0, 3, 1)]
+    db.commit()
+    yield ids
+    db.execute('''DELETE FROM order_allocations WHERE order_id IN (SELECT id FROM orders WHERE item_type = ?)''',
+               (ITEM_TYPE,))
+    db.execute('DELETE FROM orders WHERE item_type = ?', (ITEM_TYPE,))
+    db.execute('DELETE FROM stock WHERE item_type = ?', (ITEM_TYPE,))
+    db.commit()
+
+
+def quantities(db, ids):
+    return [db.execute('SELECT quantity FROM stock WHERE id = ?', (stock_id,)).fetchone()[0] for stock_id in ids]
+
+
+def test_orders_deplete_oldest_rows_first(db, stock):
+    order_id, allocations = allocate_order(db, order_for(3))
+    assert allocations == [(stock[0], 2), (stock[2], 1)]
+    assert quantities(db, stock) == [0, 0, 2, 1]
+    assert db.execute('SELECT stock_id, quantity FROM order_allocations WHERE order_id = ? ORDER BY id',
+                      (order_id,)).fetchall() == allocations
+
+    _, allocations = allocate_order(db, order_for(3))
+    assert allocations == [(stock[2], 2), (stock[3], 1)]
+    assert quantities(db, stock) == [0, 0, 0, 0]
+
+
+def test_insufficient_stock_leaves_the_database_untouched(db, stock):
+    orders_before = db.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+    allocations_before = db.execute('SELECT COUNT(*) FROM order_allocations').fetchone()[0]
+    with pytest.raises(InsufficientStockError) as error:
+        allocate_order(db, order_for(7))
+    assert (error.value.requested, error.value.available) == (7, 6)
+    assert quantities(db, stock) == [2, 0, 3, 1]
+    assert db.execute('SELECT COUNT(*) FROM orders').fetchone()[0] == orders_before
+    assert db.execute('SELECT COUNT(*) FROM order_allocations').fetchone()[0] == allocations_before
+    assert not db.in_transaction
+
+
+def test_concurrent_orders_never_oversell(db, stock):
+    available = sum(quantities(db, stock))
+    filled, refused, failures = [], [], []
+    start = threading.Barrier(8)
+
+    def place_orders():
+        conn = connect(SCRATCH_DB)
+        try:
+            start.wait()
+            for _ in range(5):
+                try:
+                    filled.append(sum(take for _, take in allocate_order(conn, order_for(1))[1]))
+                except InsufficientStockError:
+                    refused.append(1)
+        except Exception as e:
+            failures.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=place_orders) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert failures == []
+    assert sum(filled) == available
+    assert len(refused) == 40 - available
+    assert quantities(db, stock) == [0, 0, 0, 0]
+    allocated = db.execute('''SELECT SUM(a.quantity) FROM order_allocations a JOIN orders o ON o.id = a.order_id
+                              WHERE o.item_type = ?''', (ITEM_TYPE,)).fetchone()[0]
+    assert allocated == available
@@ -0,0 +1,107 @@
+"""
+Tests for the versioned JSON API
+"""
+
+import gzip
+import json
+
+import pytest
+
+from config import get_config
+
+
+def login(client, role):
+    with client.session_transaction() as session:
+        session.update(user_id=1, user_name='Tester', role=role)
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    login(client, 'Admin Access')
+    return client
+
+
+@pytest.fixture
+def project(db):
+    project_id = db.execute("INSERT INTO work_projects (client_name, services, status, notes) VALUES (?, ?, ?, ?)",
+                            ('API Client', 'Album', 'Pending', 'x' * 3000)).lastrowid
+    payment_ids = [db.execute('INSERT INTO payment_details (project_id, quoted_amount, advance_amount) VALUES (?, ?, ?)',
+                              (project_id, 1000 * n, 100)).lastrowid for n in (1, 2, 3)]
+    db.commit()
+    yield project_id, payment_ids
+    db.execute('DELETE FROM payment_details WHERE project_id = ?', (project_id,))
+    db.execute('DELETE FROM work_projects WHERE id = ?', (project_id,))
+    db.commit()
+
+
+def test_field_selection(client, project):
+    project_id, _ = project
+    response = client.get(f'/api/v1/work_projects/{project_id}?fields=client_name,status')
+    assert response.status_code == 200
+    assert response.get_json() == {'data': {'client_name': 'API Client', 'status': 'Pending'}}
+    assert client.get(f'/api/v1/work_projects/{project_id}?fields=password').status_code == 400
+
+
+def test_pages_follow_the_cursor(client, project):
+    project_id, payment_ids = project
+    seen, cursor = [], ''
+    while True:
+        body = client.get(f'/api/v1/payments?project_id={project_id}&fields=quoted_amount&limit=2&cursor={cursor}').get_json()
+        seen.extend(body['data'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert seen == [{'quoted_amount': 1000.0}, {'quoted_amount': 2000.0}, {'quoted_amount': 3000.0}]
+
+
+def test_unchanged_data_revalidates_with_304(client, db, project):
+    project_id, _ = project
+    url = f'/api/v1/work_projects/{project_id}'
+    etag = client.get(url).headers['ETag']
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    db.execute("UPDATE work_projects SET status = 'Completed' WHERE id = ?", (project_id,))
+    db.commit()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_large_bodies_are_gzipped(client, project):
+    project_id, _ = project
+    url = f'/api/v1/work_projects/{project_id}'
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data))['data']['id'] == project_id
+    assert 'Content-Encoding' not in client.get(url).headers
+
+
+def test_unknown_resources_and_missing_rows_are_404(client):
+    assert client.get('/api/v1/users').status_code == 404
+    response = client.get('/api/v1/stock/999999999')
+    assert response.status_code == 404
+    assert response.get_json() == {'error': 'Not found'}
+
+
+def test_disabled_flag_hides_the_api(client, monkeypatch):
+    monkeypatch.setitem(get_config().FEATURE_FLAGS, 'api_endpoints', False)
+    assert client.get('/api/v1/stock').status_code == 404
+
+
+def test_anonymous_requests_are_rejected(app, project):
+    client = app.test_client()
+    response = client.get('/api/v1/payments')
+    assert response.status_code == 401
+    assert response.get_json() == {'error': 'Sign in required'}
+    assert client.get(f'/api/v1/work_projects/{project[0]}?fields=notes').status_code == 401
+
+
+def test_payments_are_for_admins_only(app, project):
+    client = app.test_client()
+    login(client, 'Staff')
+    assert client.get('/api/v1/payments').status_code == 403
+    assert client.get(f'/api/v1/payments/{project[1][0]}').status_code == 403
+    assert client.get(f'/api/v1/work_projects/{project[0]}').status_code == 200
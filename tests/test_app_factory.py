@@ -0,0 +1,36 @@
+"""
+Tests for the application factory and the single-archiver lock
+"""
+
+import os
+import subprocess
+import sys
+
+from flask import url_for
+
+from conftest import ROOT
+from wal_archive import acquire_archive_lock
+
+
+def test_importing_app_touches_no_database(tmp_path):
+    db_path = tmp_path / 'untouched.db'
+    env = dict(os.environ, DATABASE_PATH=str(db_path))
+    subprocess.run([sys.executable, '-c', 'import app'], cwd=ROOT, env=env, check=True)
+    assert not db_path.exists()
+
+
+def test_routes_live_on_the_blueprint_and_old_endpoint_names_still_build(app):
+    assert 'main.index' in app.view_functions
+    with app.test_request_context('/'):
+        assert url_for('login') == url_for('main.login') == '/login'
+        assert url_for('work_profile', project_id=3) == '/work/profile/3'
+
+
+def test_only_one_process_holds_the_archive_lock(tmp_path):
+    first = acquire_archive_lock(tmp_path)
+    # flock is per open file, so a second open in the same process competes like another worker would
+    assert acquire_archive_lock(tmp_path) is None
+    first.close()
+    second = acquire_archive_lock(tmp_path)
+    assert second is not None
+    second.close()
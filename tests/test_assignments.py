@@ -0,0 +1,67 @@
+"""
+Tests for normalized work assignments and the legacy column mirror
+"""
+
+import sqlite3
+
+import pytest
+
+from assignments import assigned_projects, get_assignment, init_work_assignments, save_assignment
+
+
+def legacy(conn, project_id, section):
+    return conn.execute(f'''SELECT {section}_assigned_to, {section}_date_assigned, {section}_status,
+            {section}_completed_date, {section}_rework_date FROM work_projects WHERE id = ?''', (project_id,)).fetchone()
+
+
+@pytest.fixture
+def project(db):
+    project_id = db.execute("INSERT INTO work_projects (client_name, services) VALUES ('Assign Test', 'Album')").lastrowid
+    db.commit()
+    yield project_id
+    db.execute('DELETE FROM work_projects WHERE id = ?', (project_id,))
+    db.commit()
+
+
+def test_saved_assignments_are_mirrored_onto_legacy_columns(db, project):
+    save_assignment(db, project, 'reel', 'alice', '2024-05-01', 'In Progress')
+    db.commit()
+    assert get_assignment(db, project, 'reel') == ('alice', '2024-05-01')
+    assert legacy(db, project, 'reel') == ('alice', '2024-05-01', 'In Progress', None, None)
+    assert legacy(db, project, 'album') == (None, None, None, None, None)
+
+    save_assignment(db, project, 'reel', 'bob', '2024-05-02', 'Completed', completed_date='2024-05-09')
+    db.commit()
+    assert legacy(db, project, 'reel') == ('bob', '2024-05-02', 'Completed', '2024-05-09', None)
+    assert db.execute('SELECT COUNT(*) FROM work_assignments WHERE project_id = ?', (project,)).fetchone()[0] == 1
+    assert project in [row[0] for row in assigned_projects(db, 'bob')]
+    assert project not in [row[0] for row in assigned_projects(db, 'alice')]
+
+
+def test_deleting_a_project_deletes_its_assignments(db, project):
+    save_assignment(db, project, 'album', 'carol', '2024-06-01', 'Pending')
+    db.execute('DELETE FROM work_projects WHERE id = ?', (project,))
+    db.commit()
+    assert db.execute('SELECT COUNT(*) FROM work_assignments WHERE project_id = ?', (project,)).fetchone()[0] == 0
+    assert get_assignment(db, project, 'album') == (None, None)
+
+
+def test_backfill_from_legacy_columns():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('''CREATE TABLE work_projects (id INTEGER PRIMARY KEY, client_name TEXT,
+        reel_assigned_to TEXT, reel_date_assigned TEXT, reel_status TEXT, album_assigned_to TEXT, album_status TEXT)''')
+    conn.executemany('INSERT INTO work_projects VALUES (?, ?, ?, ?, ?, ?, ?)', [
+        (1, 'A', 'alice', '2024-01-01', 'Done', None, None),
+        (2, 'B', None, None, None, 'bob', 'Pending'),
+        (3, 'C', None, None, None, None, None),
+    ])
+    init_work_assignments(conn)
+    assert conn.execute('''SELECT project_id, section, assignee, date_assigned, status
+                           FROM work_assignments ORDER BY project_id, section''').fetchall() == [
+        (1, 'reel', 'alice', '2024-01-01', 'Done'),
+        (2, 'album', 'bob', None, 'Pending'),
+    ]
+    # Only mirrors the legacy columns the table actually has
+    save_assignment(conn, 3, 'album', 'dave', '2024-02-02', 'Pending')
+    assert conn.execute('SELECT album_assigned_to, album_status FROM work_projects WHERE id = 3').fetchone() == (
+        'dave', 'Pending')
@@ -0,0 +1,76 @@
+"""
+Online backup tests
+Backups are taken with the SQLite backup API, checked before they count and
+pruned to Config.MAX_BACKUP_FILES.
+"""
+
+import sqlite3
+
+import pytest
+
+from backup_archive import extract_archive, read_manifest
+from config import get_config
+from upgrade_implementation import InventoryUpgradeManager
+from conftest import SCRATCH_DB
+
+
+@pytest.fixture
+def manager(app, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return InventoryUpgradeManager(db_path=SCRATCH_DB, backup_dir=tmp_path / 'backups')
+
+
+def test_backup_is_a_compressed_standalone_copy(manager, tmp_path):
+    path = manager.backup_database()
+    assert path is not None and path.name.endswith('.db.gz')
+    assert read_manifest(path)['compression'] == 'gzip'
+    extract_archive(path, tmp_path / 'copy.db')
+    conn = sqlite3.connect(tmp_path / 'copy.db')
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+    assert conn.execute('SELECT COUNT(*) FROM stock').fetchone() == \
+        sqlite3.connect(SCRATCH_DB).execute('SELECT COUNT(*) FROM stock').fetchone()
+    conn.close()
+    assert manager.last_backup['status'] == 'ok'
+    assert not list(manager.backup_dir.glob('*.partial'))
+
+
+@pytest.mark.parametrize('compression', ['gzip', 'lzma', 'none'])
+def test_archives_verify_and_restore(manager, monkeypatch, compression):
+    monkeypatch.setattr(get_config(), 'BACKUP_COMPRESSION', compression)
+    monkeypatch.setattr(get_config(), 'BACKUP_CHUNK_SIZE', 8192)
+    path = manager.backup_database()
+    assert len(read_manifest(path)['chunks']) > 1
+    assert manager.verify_backups() == [{'filename': path.name, 'valid': True, 'error': None}]
+    assert manager.list_backups()[0]['compression'] == compression
+    assert manager.restore_backup(path.name)
+
+
+def test_damaged_chunk_is_reported(manager, monkeypatch):
+    monkeypatch.setattr(get_config(), 'BACKUP_CHUNK_SIZE', 8192)
+    path = manager.backup_database()
+    second = read_manifest(path)['chunks'][1]
+    with open(path, 'r+b') as f:
+        f.seek(second['offset'] + 20)
+        f.write(b'\xff\xff\xff\xff')
+    [result] = manager.verify_backups()
+    assert not result['valid'] and result['error'] == 'chunk 1 is damaged'
+
+
+def test_background_backup(manager):
+    manager.backup_database_async().join(timeout=30)
+    assert manager.last_backup['status'] == 'ok'
+    assert len(manager.list_backups()) == 1
+
+
+def test_retention_keeps_newest(manager, monkeypatch):
+    monkeypatch.setattr(get_config(), 'MAX_BACKUP_FILES', 2)
+    paths = [manager.backup_database() for _ in range(3)]
+    remaining = sorted(p.name for p in manager.backup_files())
+    assert remaining == sorted(p.name for p in paths[1:])
+
+
+def test_failed_check_is_discarded(manager, monkeypatch):
+    monkeypatch.setattr(manager, '_quick_check', lambda path: 'page 2: btree corrupt')
+    assert manager.backup_database() is None
+    assert manager.last_backup['status'] == 'failed'
+    assert not list(manager.backup_dir.glob('inventory_backup_*'))
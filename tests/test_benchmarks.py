@@ -0,0 +1,30 @@
+"""
+Tests for the benchmark data generator and percentile helper
+"""
+
+import sqlite3
+
+from benchmarks.run import percentile
+from benchmarks.seed import seed_database
+
+
+def test_seed_is_consistent_at_small_scale(tmp_path):
+    db_path = tmp_path / 'bench.db'
+    counts = seed_database(db_path, scale=0.005, log=lambda message: None)
+    conn = sqlite3.connect(db_path)
+    try:
+        in_stock = conn.execute('SELECT SUM(in_stock_quantity) FROM stock_summary').fetchone()[0]
+        assert in_stock == counts['stock'] - counts['orders']
+        assert conn.execute('SELECT COUNT(*) FROM order_allocations').fetchone()[0] == counts['orders']
+        # Assignments are mirrored onto the legacy columns by the triggers
+        mirrored = conn.execute('SELECT COUNT(*) FROM work_projects WHERE reel_assigned_to IS NOT NULL').fetchone()[0]
+        assert mirrored == conn.execute("SELECT COUNT(*) FROM work_assignments WHERE section = 'reel'").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(n) for n in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
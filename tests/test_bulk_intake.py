@@ -0,0 +1,100 @@
+"""
+Tests for serial number parsing and bulk stock intake
+"""
+
+import sqlite3
+
+import pytest
+
+from stock import MAX_BULK_INTAKE, bulk_intake, expand_serial_range, parse_serial_numbers
+
+ITEM_TYPE = 'Intake-Test'
+
+
+@pytest.fixture
+def intake_rows(db):
+    def rows():
+        return db.execute('SELECT capacity, serial_number, quantity FROM stock WHERE item_type = ? ORDER BY id',
+                          (ITEM_TYPE,)).fetchall()
+    yield rows
+    db.execute('DELETE FROM stock WHERE item_type = ?', (ITEM_TYPE,))
+    db.commit()
+
+
+def lot(**fields):
+    return dict({'item_type': ITEM_TYPE, 'capacity': '1TB', 'storage_owner': 'Convex'}, **fields)
+
+
+def test_serial_range_keeps_zero_padding():
+    assert expand_serial_range('SN0098', 'SN0101') == ['SN0098', 'SN0099', 'SN0100', 'SN0101']
+    assert expand_serial_range(' A-9 ', 'A-11') == ['A-9', 'A-10', 'A-11']
+    assert expand_serial_range('X7', 'X7') == ['X7']
+
+
+@pytest.mark.parametrize('start, end', [
+    ('SN0010', 'SN0001'), ('SN0001', 'XX0005'), ('SN-A', 'SN-B'), ('SN0', f'SN{MAX_BULK_INTAKE}'),
+])
+def test_invalid_serial_ranges_are_rejected(start, end):
+    with pytest.raises(ValueError):
+        expand_serial_range(start, end)
+
+
+def test_pasted_serials_split_on_commas_and_whitespace():
+    assert parse_serial_numbers('SN1, SN2\nSN3\t SN4,,') == ['SN1', 'SN2', 'SN3', 'SN4']
+    assert parse_serial_numbers('') == []
+    assert parse_serial_numbers(None) == []
+
+
+def test_lots_are_inserted_one_row_per_unit(db, intake_rows):
+    inserted = bulk_intake(db, [
+        lot(quantity=2, serial_number='SHARED'),
+        lot(capacity='2TB', serial_range={'start': 'R08', 'end': 'R10'}),
+        lot(capacity='4TB', serial_numbers='P1, P2'),
+    ])
+    assert inserted == 7
+    assert intake_rows() == [
+        ('1TB', 'SHARED', 1), ('1TB', 'SHARED', 1),
+        ('2TB', 'R08', 1), ('2TB', 'R09', 1), ('2TB', 'R10', 1),
+        ('4TB', 'P1', 1), ('4TB', 'P2', 1),
+    ]
+
+
+@pytest.mark.parametrize('bad_lot', [
+    lot(quantity=0), lot(quantity='many'), lot(quantity=2.7), lot(quantity=True), lot(quantity='3'),
+    lot(storage_owner=' '), lot(capacity=['1TB'], quantity=1), lot(item_type=7, quantity=1),
+    lot(disk_name={'name': 'x'}, quantity=1), lot(serial_range={'start': 'A2', 'end': 'A1'}),
+    'not a lot',
+])
+def test_a_bad_lot_rejects_the_whole_intake(db, intake_rows, bad_lot):
+    with pytest.raises(ValueError):
+        bulk_intake(db, [lot(quantity=3), bad_lot])
+    assert intake_rows() == []
+
+
+def test_intake_over_the_unit_limit_is_rejected(db, intake_rows):
+    with pytest.raises(ValueError, match=str(MAX_BULK_INTAKE)):
+        bulk_intake(db, [lot(quantity=MAX_BULK_INTAKE), lot(quantity=1)])
+    assert intake_rows() == []
+
+
+def test_database_error_rolls_back_earlier_lots(db, intake_rows):
+    # The trigger exists on this connection only and fails the second lot's insert
+    db.execute(f"""CREATE TEMP TRIGGER fail_intake BEFORE INSERT ON stock
+        WHEN NEW.item_type = '{ITEM_TYPE}' AND NEW.capacity = 'FAIL'
+        BEGIN SELECT RAISE(ABORT, 'forced failure'); END""")
+    try:
+        with pytest.raises(sqlite3.Error, match='forced failure'):
+            bulk_intake(db, [lot(quantity=2), lot(capacity='FAIL', serial_numbers=['Z1'])])
+    finally:
+        db.execute('DROP TRIGGER fail_intake')
+    assert intake_rows() == []
+    assert not db.in_transaction
+
+
+def test_endpoint_answers_400_for_non_text_fields(app, intake_rows):
+    response = app.test_client().post('/api/stock/bulk_intake', json={
+        'lots': [lot(quantity=1), lot(capacity=['1TB'], quantity=1)],
+    })
+    assert response.status_code == 400
+    assert 'capacity' in response.get_json()['error']
+    assert intake_rows() == []
@@ -0,0 +1,64 @@
+"""
+Tests for ETag revalidation of rendered pages
+"""
+
+import pytest
+from flask import template_rendered
+from jinja2 import FunctionLoader
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    # The repository ships without templates; any page renders as a stub
+    monkeypatch.setattr(app, 'jinja_loader', FunctionLoader(lambda name: name))
+    return app.test_client()
+
+
+@pytest.fixture
+def renders(app):
+    rendered = []
+    with template_rendered.connected_to(lambda sender, template, context: rendered.append(template.name), app):
+        yield rendered
+
+
+def login(client, role, user_id=1):
+    with client.session_transaction() as session:
+        session.update(user_id=user_id, user_name='Tester', role=role)
+
+
+def test_unchanged_page_is_not_rendered_again(client, renders):
+    login(client, 'Admin Access')
+    etag = client.get('/order').headers['ETag']
+    response = client.get('/order', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert renders == ['order.html']
+
+
+def test_table_change_invalidates_the_page(client, db):
+    login(client, 'Admin Access')
+    etag = client.get('/order').headers['ETag']
+    order_id = db.execute('''INSERT INTO orders (item_type, capacity, quantity, storage_owner, order_reason,
+            storage_sent_to, sent_by, order_date) VALUES ('HDD', '1TB', 1, 'Convex', 'Test', 'Client', 'Tester', '2024-01-01')''').lastrowid
+    db.commit()
+    try:
+        assert client.get('/order', headers={'If-None-Match': etag}).status_code == 200
+    finally:
+        db.execute('DELETE FROM orders WHERE id = ?', (order_id,))
+        db.commit()
+
+
+def test_validator_depends_on_role_and_query(client):
+    login(client, 'Admin Access')
+    admin_etag = client.get('/work').headers['ETag']
+    assert client.get('/work?error=x', headers={'If-None-Match': admin_etag}).status_code == 200
+    login(client, 'Staff')
+    assert client.get('/work', headers={'If-None-Match': admin_etag}).status_code == 200
+
+
+def test_posts_and_flashed_messages_bypass_revalidation(client):
+    login(client, 'Admin Access')
+    etag = client.get('/upload').headers['ETag']
+    with client.session_transaction() as session:
+        session['_flashes'] = [('message', 'Saved')]
+    assert client.get('/upload', headers={'If-None-Match': etag}).status_code == 200
+    assert client.post('/upload', headers={'If-None-Match': etag}).status_code == 302
@@ -0,0 +1,74 @@
+"""
+Tests for the work profile fragment cache
+"""
+
+import pytest
+
+from data_versions import scoped_counter, table_versions
+from fragment_cache import FragmentCache, fragment_cache, work_profile_fragments
+
+
+@pytest.fixture
+def projects(db):
+    ids = [db.execute("INSERT INTO work_projects (client_name, services) VALUES (?, 'Album')", (name,)).lastrowid
+           for name in ('Fragment One', 'Fragment Two')]
+    db.commit()
+    fragment_cache.clear()
+    yield ids
+    for table, column in (('work_logs', 'project_id'), ('payment_details', 'project_id'), ('work_projects', 'id')):
+        db.executemany(f'DELETE FROM {table} WHERE {column} = ?', [(project_id,) for project_id in ids])
+    db.commit()
+
+
+def add_log(db, project_id):
+    db.execute('''INSERT INTO work_logs (project_id, section, event_type, event_date, user)
+                  VALUES (?, 'reel', 'rework', '2024-05-01', 'Tester')''', (project_id,))
+    db.commit()
+
+
+def test_scoped_counters_move_only_for_their_project(db, projects):
+    first, second = (scoped_counter('work_logs', project_id) for project_id in projects)
+    before = table_versions(db, (first, second))
+    add_log(db, projects[0])
+    after = table_versions(db, (first, second))
+    assert after[0] > before[0]
+    assert after[1] == before[1]
+
+
+def test_log_edit_evicts_only_that_projects_logs(db, projects):
+    built = []
+
+    def build(key):
+        built.append(key)
+        return key
+    cache = FragmentCache()
+    versions = lambda project_id: table_versions(db, (scoped_counter('work_logs', project_id),))
+    for project_id in projects:
+        cache.get(('work_logs', project_id), versions(project_id), lambda: build(project_id))
+    add_log(db, projects[0])
+    for project_id in projects:
+        cache.get(('work_logs', project_id), versions(project_id), lambda: build(project_id))
+    assert built == [projects[0], projects[1], projects[0]]
+
+
+def test_profile_fragments_follow_the_data(db, projects):
+    project_id = projects[0]
+    fragments = work_profile_fragments(db, project_id, None)
+    assert fragments['work_logs']['reel'] == []
+    assert fragments['payment']['quoted_amount'] == 0
+    assert project_id not in [row[0] for row in fragments['recent_projects']]
+
+    add_log(db, project_id)
+    db.execute('INSERT INTO payment_details (project_id, quoted_amount) VALUES (?, 500)', (project_id,))
+    db.commit()
+    fragments = work_profile_fragments(db, project_id, None)
+    assert [log['user'] for log in fragments['work_logs']['reel']] == ['Tester']
+    assert fragments['payment']['remaining_amount'] == 500
+
+
+def test_least_recently_used_fragments_are_dropped():
+    cache = FragmentCache(max_entries=2)
+    for key in ('a', 'b', 'a', 'c'):
+        cache.get(key, (0,), lambda: key)
+    assert len(cache) == 2
+    assert cache.get('b', (0,), lambda: 'rebuilt') == 'rebuilt'
@@ -0,0 +1,63 @@
+"""
+Tests for the background health snapshot and the /health and /ready endpoints
+"""
+
+import sqlite3
+import time
+
+from conftest import SCRATCH_DB
+from health import CRITICAL_PROBES, HealthMonitor, run_probe, probe_write_lock
+
+
+def test_endpoints_serve_the_snapshot(app):
+    client = app.test_client()
+    health = client.get('/health')
+    assert health.status_code == 200
+    body = health.get_json()
+    assert set(body['probes']) == {'database', 'schema', 'backup', 'write_lock'}
+    assert body['probes']['schema']['version'] == body['probes']['schema']['expected']
+
+    ready = client.get('/ready')
+    assert ready.status_code == 200
+    assert ready.get_json()['ready'] is True
+
+
+def test_write_lock_probe_fails_within_its_budget():
+    monitor_conn = sqlite3.connect(SCRATCH_DB, check_same_thread=False)
+    holder = sqlite3.connect(SCRATCH_DB)
+    holder.execute('BEGIN IMMEDIATE')
+    try:
+        started = time.monotonic()
+        result = run_probe(monitor_conn, probe_write_lock, 100)
+        assert result['status'] == 'fail'
+        assert time.monotonic() - started < 1
+        assert not monitor_conn.in_transaction
+    finally:
+        holder.rollback()
+        holder.close()
+        monitor_conn.close()
+
+
+def test_refresh_marks_unready_when_a_critical_probe_fails():
+    monitor = HealthMonitor(SCRATCH_DB)
+    holder = sqlite3.connect(SCRATCH_DB)
+    holder.execute('BEGIN IMMEDIATE')
+    try:
+        snapshot = monitor.refresh()
+    finally:
+        holder.rollback()
+        holder.close()
+    assert snapshot['probes']['write_lock']['status'] == 'fail'
+    assert 'write_lock' in CRITICAL_PROBES
+    assert monitor.snapshot()['ready'] is False
+    assert monitor.refresh()['ready'] is True
+
+
+def test_stale_snapshot_is_not_ready():
+    monitor = HealthMonitor(SCRATCH_DB)
+    assert monitor.snapshot()['ready'] is False
+    monitor.refresh()
+    monitor._refreshed_at -= 3600
+    snapshot = monitor.snapshot()
+    assert snapshot['stale'] is True
+    assert snapshot['ready'] is False
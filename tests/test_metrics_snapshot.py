@@ -0,0 +1,73 @@
+"""
+Tests for the version-checked metrics snapshot
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import fragment_cache as fragment_cache_module
+import metrics_snapshot as snapshot_module
+from config import get_config
+from data_versions import table_versions
+from metrics_snapshot import MetricsSnapshot
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count snapshot rebuilds while still building the real metrics"""
+    calls = []
+    build_metrics = snapshot_module.build_metrics
+
+    def counting_build(conn):
+        calls.append(1)
+        return build_metrics(conn)
+    monkeypatch.setattr(snapshot_module, 'build_metrics', counting_build)
+    return calls
+
+
+def test_writes_to_stock_or_orders_rebuild_the_snapshot(db, builds):
+    snapshot = MetricsSnapshot()
+    snapshot.get(db)
+    snapshot.get(db)
+    assert len(builds) == 1
+
+    versions = table_versions(db, ('stock', 'orders'))
+    stock_id = db.execute("INSERT INTO stock (item_type, capacity, quantity, storage_owner) "
+                          "VALUES ('Snapshot-Test', '1TB', 1, 'Convex')").lastrowid
+    db.commit()
+    assert table_versions(db, ('stock', 'orders'))[0] > versions[0]
+    snapshot.get(db)
+    assert len(builds) == 2
+
+    order_id = db.execute('''INSERT INTO orders (item_type, capacity, quantity, storage_owner, order_reason,
+            storage_sent_to, sent_by, order_date) VALUES ('Snapshot-Test', '1TB', 1, 'Convex', 'T', 'C', 'T', '2024-01-01')''').lastrowid
+    db.commit()
+    assert table_versions(db, ('stock', 'orders'))[1] > versions[1]
+    snapshot.get(db)
+    assert len(builds) == 3
+
+    db.execute('DELETE FROM orders WHERE id = ?', (order_id,))
+    db.execute('DELETE FROM stock WHERE id = ?', (stock_id,))
+    db.commit()
+
+
+def test_snapshot_expires_after_cache_timeout(db, builds, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(fragment_cache_module, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    snapshot = MetricsSnapshot()
+    snapshot.get(db)
+    now[0] += get_config().CACHE_TIMEOUT - 1
+    snapshot.get(db)
+    assert len(builds) == 1
+    now[0] += 2
+    snapshot.get(db)
+    assert len(builds) == 2
+
+
+def test_invalidate_forces_a_rebuild(db, builds):
+    snapshot = MetricsSnapshot()
+    snapshot.get(db)
+    snapshot.invalidate()
+    snapshot.get(db)
+    assert len(builds) == 2
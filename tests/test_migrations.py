@@ -0,0 +1,40 @@
+"""
+Schema migration tests
+A fresh database must migrate to the latest version, and migrating a current
+database must be a no-op.
+"""
+
+import sqlite3
+
+from migrations import LATEST_VERSION, MIGRATIONS, current_version, migrate
+
+
+def test_versions_are_ordered_and_unique():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == sorted(set(versions))
+
+
+def test_fresh_database_migrates_to_latest(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'fresh.db')
+    assert current_version(conn) == 0
+    assert migrate(conn) == [version for version, _, _ in MIGRATIONS]
+    assert current_version(conn) == LATEST_VERSION
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert {'stock', 'orders', 'work_projects', 'employees', 'work_logs', 'payment_details',
+            'work_assignments', 'stock_summary', 'order_allocations', 'table_versions'} <= tables
+    conn.close()
+
+
+def test_current_database_is_not_migrated_again(app, db):
+    assert current_version(db) == LATEST_VERSION
+    assert migrate(db) == []
+
+
+def test_migrations_are_idempotent(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'rerun.db')
+    migrate(conn)
+    # Re-running every migration against an up-to-date schema must not fail
+    for _, _, migration_func in MIGRATIONS:
+        migration_func(conn)
+    conn.commit()
+    conn.close()
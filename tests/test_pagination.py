@@ -0,0 +1,72 @@
+"""
+Tests for keyset pagination and its cursors
+"""
+
+import base64
+import sqlite3
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor, keyset_page
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL)')
+    # Repeated names, so the id tie-breaker matters
+    conn.executemany('INSERT INTO items (id, name) VALUES (?, ?)', [(n, f'name-{n % 3}') for n in range(1, 8)])
+    yield conn
+    conn.close()
+
+
+def all_pages(conn, page_size, **kwargs):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = keyset_page(conn, 'SELECT id, name FROM items', ['name', 'id'], ['name', 'id'],
+                                   cursor=cursor, page_size=page_size, **kwargs)
+        pages.append([row[0] for row in rows])
+        if cursor is None:
+            return pages
+
+
+def crafted(text):
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip('=')
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(['2024-01-01 10:00:00', 42]), 2) == ['2024-01-01 10:00:00', 42]
+    assert decode_cursor(encode_cursor([1.5, None]), 2) == [1.5, None]
+
+
+def test_pages_cover_every_row_once_in_order(conn):
+    assert all_pages(conn, 3) == [[3, 6, 1], [4, 7, 2], [5]]
+
+
+def test_descending_pages(conn):
+    assert all_pages(conn, 3, descending=True) == [[5, 2, 7], [4, 1, 6], [3]]
+
+
+def test_last_page_has_no_cursor(conn):
+    rows, cursor = keyset_page(conn, 'SELECT id, name FROM items', ['id'], ['id'], page_size=7)
+    assert len(rows) == 7
+    assert cursor is None
+    assert all_pages(conn, 7) == [[3, 6, 1, 4, 7, 2, 5]]
+
+
+@pytest.mark.parametrize('token', [
+    'not base64!', crafted('not json'), crafted('{"a": 1}'), crafted('[1]'), crafted('[1, 2, 3]'),
+    crafted('[{}, 1]'), crafted('[[1], 1]'), crafted('["a", {"b": 2}]'),
+])
+def test_malformed_cursors_are_ignored(conn, token):
+    assert decode_cursor(token, 2) is None
+    rows, _ = keyset_page(conn, 'SELECT id, name FROM items', ['name', 'id'], ['name', 'id'], cursor=token, page_size=3)
+    assert [row[0] for row in rows] == [3, 6, 1]
+
+
+def test_crafted_cursor_on_an_endpoint_is_not_a_server_error(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=1, user_name='Tester', role='Admin Access')
+    assert client.get(f"/api/v1/stock?cursor={crafted('[{}]')}").status_code == 200
+    assert client.get(f"/api/stock/search?cursor={crafted('[{}]')}").status_code == 200
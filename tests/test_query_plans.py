@@ -0,0 +1,139 @@
+"""
+Query plan regression tests
+Every hot query issued by app.py must be answered through an index; a plain
+"SCAN <table>" in its EXPLAIN QUERY PLAN output fails the test.
+"""
+
+import re
+
+import pytest
+
+from assignments import ASSIGNED_PROJECTS_SQL
+from indexes import INDEXES, ensure_indexes
+from stock import ALLOCATE_SQL, DEPLETE_SQL
+from stock_search import STOCK_COLUMNS
+from work_dashboard import day_sql
+
+# Tables bounded by the number of stock groups, staff or tracked tables, where a scan is expected
+SMALL_TABLES = {'stock_summary', 'work_summary', 'employees', 'table_versions'}
+
+STOCK_SEARCH = f"SELECT {', '.join(STOCK_COLUMNS)} FROM stock"
+
+HOT_QUERIES = {
+    'allocate_order': (ALLOCATE_SQL, {'order_id': 1, 'requested': 3, 'item_type': 'HDD', 'capacity': '1TB'}),
+    'deplete_order_stock': (DEPLETE_SQL, {'order_id': 1}),
+    'index_assigned_work': (ASSIGNED_PROJECTS_SQL, ('alice',)),
+    'index_stock_groups': (
+        "SELECT item_type, storage_owner, in_stock_quantity FROM stock_summary WHERE in_stock_quantity > 0", ()),
+    'index_recent_work': ("SELECT * FROM work_projects ORDER BY created_at DESC LIMIT 5", ()),
+    'index_work_total': ("SELECT COUNT(*) FROM work_projects", ()),
+    'order_item_types': ("SELECT DISTINCT item_type FROM stock WHERE quantity > 0", ()),
+    'order_page': (
+        "SELECT * FROM orders WHERE created_at <= ? AND (created_at, id) < (?, ?) "
+        "ORDER BY created_at DESC, id DESC LIMIT ?", ('2025-01-01', '2025-01-01', 10, 51)),
+    'upload_page': (
+        "SELECT * FROM stock WHERE id >= ? AND (id) > (?) ORDER BY id ASC LIMIT ?", (10, 10, 51)),
+    'metrics_ownership': (
+        """SELECT storage_owner, SUM(in_stock_rows) as total_items, SUM(in_stock_quantity) as total_quantity
+           FROM stock_summary WHERE in_stock_rows > 0 GROUP BY storage_owner ORDER BY total_quantity DESC""", ()),
+    'metrics_source_versions': (
+        "SELECT table_name, version FROM table_versions WHERE table_name IN (?,?)", ('stock', 'orders')),
+    'metrics_recent_orders': (
+        """SELECT o.storage_owner, o.disk_name, o.order_reason, o.storage_sent_to, o.item_type, o.capacity,
+               o.quantity, o.sent_by, o.order_date, o.created_at
+           FROM orders o ORDER BY o.created_at DESC LIMIT 20""", ()),
+    'serial_numbers_capacities': (
+        "SELECT DISTINCT capacity FROM stock WHERE item_type = ? AND quantity > 0", ('HDD',)),
+    'serial_numbers_lookup': (
+        "SELECT serial_number, SUM(quantity) as total_quantity, storage_owner, disk_name FROM stock "
+        "WHERE item_type = ? AND capacity = ? AND quantity > 0 GROUP BY serial_number, storage_owner, disk_name",
+        ('HDD', '1TB')),
+    'work_page': (
+        "SELECT * FROM work_projects WHERE created_at <= ? AND (created_at, id) < (?, ?) "
+        "ORDER BY created_at DESC, id DESC LIMIT ?", ('2025-01-01', '2025-01-01', 10, 51)),
+    'work_profile_weddings': ("SELECT COUNT(*) FROM work_projects WHERE wedding_date IS NOT NULL", ()),
+    'work_profile_status': ("SELECT COUNT(*) FROM work_projects WHERE status = ?", ('Active',)),
+    'work_profile_recent': ("SELECT * FROM work_projects ORDER BY created_at DESC LIMIT 6", ()),
+    'work_profile_payment': (
+        "SELECT quoted_amount, discount, advance_amount, remaining_amount FROM payment_details WHERE project_id = ?",
+        (1,)),
+    'work_profile_logs': (
+        "SELECT section, event_type, event_date, user, details FROM work_logs WHERE project_id = ? ORDER BY event_date",
+        (1,)),
+    'accounts': (
+        """SELECT wp.id, wp.client_name, pd.quoted_amount, pd.discount, pd.advance_amount, pd.remaining_amount
+           FROM work_projects wp LEFT JOIN payment_details pd ON wp.id = pd.project_id
+           WHERE wp.client_name COLLATE NOCASE >= ? AND (wp.client_name COLLATE NOCASE, wp.id) > (?, ?)
+           ORDER BY wp.client_name COLLATE NOCASE ASC, wp.id ASC LIMIT ?""", ('m', 'm', 10, 51)),
+    'login': ("SELECT id, name, role, password FROM employees WHERE name = ?", ('admin',)),
+    'work_upcoming': (
+        f"""SELECT COUNT(*) FROM (
+            SELECT id FROM work_projects WHERE {day_sql('wedding_date')} >= :today
+            UNION
+            SELECT id FROM work_projects WHERE {day_sql('engagement_date')} >= :today)""", {'today': 20000}),
+    'calendar': (
+        """SELECT e.day, e.event_kind, p.id, p.client_name, p.status
+           FROM work_project_events e JOIN work_projects p ON p.id = e.project_id
+           WHERE e.day BETWEEN ? AND ? AND e.event_kind IN (?) ORDER BY e.day, e.event_kind, e.project_id""",
+        (20000, 20030, 'wedding')),
+    'mywork': (ASSIGNED_PROJECTS_SQL, ('alice',)),
+    'assignment_lookup': (
+        "SELECT assignee, date_assigned FROM work_assignments WHERE project_id = ? AND section = ?", (1, 'reel')),
+    'order_allocations': ("SELECT stock_id, quantity FROM order_allocations WHERE order_id = ?", (1,)),
+    'stock_search_serial': (
+        f"{STOCK_SEARCH} WHERE (serial_number COLLATE NOCASE = ?) ORDER BY id ASC LIMIT ?", ('SN0001', 51)),
+    'stock_search_serial_prefix': (
+        f"{STOCK_SEARCH} WHERE (serial_number COLLATE NOCASE >= ? AND serial_number COLLATE NOCASE < ?) "
+        "ORDER BY id ASC LIMIT ?", ('sn00', 'sn01', 51)),
+    'stock_search_disk_name': (
+        f"{STOCK_SEARCH} WHERE (disk_name COLLATE NOCASE = ?) ORDER BY id ASC LIMIT ?", ('disk-01', 51)),
+    'stock_search_type_capacity_owner': (
+        f"{STOCK_SEARCH} WHERE (item_type = ? AND capacity = ? AND storage_owner = ?) ORDER BY id ASC LIMIT ?",
+        ('HDD', '1TB', 'Convex', 51)),
+    'stock_search_owner': (f"{STOCK_SEARCH} WHERE (storage_owner = ?) ORDER BY id ASC LIMIT ?", ('Convex', 51)),
+    'stock_search_condition': (f"{STOCK_SEARCH} WHERE (condition = ?) ORDER BY id ASC LIMIT ?", ('Used', 51)),
+    'stock_search_by_serial_page': (
+        f"{STOCK_SEARCH} WHERE (serial_number IS NOT NULL) AND serial_number COLLATE NOCASE >= ? "
+        "AND (serial_number COLLATE NOCASE, id) > (?, ?) ORDER BY serial_number COLLATE NOCASE ASC, id ASC LIMIT ?",
+        ('SN05', 'SN05', 10, 51)),
+}
+
+# Scans of subquery results, shown as "SCAN (subquery-N)", read no table and do not match
+_BARE_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def full_table_scans(conn, sql, params):
+    """Return the plan lines that read a whole table without an index"""
+    scans = []
+    for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params):
+        match = _BARE_SCAN.match(row[3])
+        if match and match.group(1) not in SMALL_TABLES and match.group(1) != 'CONSTANT':
+            scans.append(row[3])
+    return scans
+
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(db, name):
+    sql, params = HOT_QUERIES[name]
+    assert full_table_scans(db, sql, params) == []
+
+
+def test_declared_indexes_exist(db):
+    existing = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    missing = [name for name, _, _, _ in INDEXES if name not in existing]
+    assert missing == []
+
+
+def test_ensure_indexes_is_idempotent(db):
+    assert ensure_indexes(db) == {'created': [], 'dropped': []}
+
+
+def test_ensure_indexes_drops_undeclared_managed_index(db):
+    db.execute('CREATE INDEX idx_stock_obsolete ON stock (disk_name)')
+    db.execute('CREATE INDEX custom_stock_disk ON stock (disk_name)')
+    result = ensure_indexes(db)
+    names = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    db.execute('DROP INDEX custom_stock_disk')
+    assert result['dropped'] == ['idx_stock_obsolete']
+    assert 'idx_stock_obsolete' not in names
+    assert 'custom_stock_disk' in names
@@ -0,0 +1,38 @@
+"""
+Tests for per-route latency and SQLite time instrumentation
+"""
+
+import sqlite3
+
+from request_metrics import InstrumentedCursor, request_metrics
+
+
+def test_requests_are_recorded_with_their_queries(app):
+    request_metrics.reset()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['role'] = 'Admin Access'
+    assert client.get('/employees/data').status_code == 200
+    client.get('/no/such/page')
+
+    body = client.get('/internal/stats').get_data(as_text=True)
+    assert 'convex_http_request_duration_seconds_count{endpoint="main.employees_data",method="GET"} 1' in body
+    assert 'convex_http_responses_total{endpoint="main.employees_data",method="GET",status="200"} 1' in body
+    assert 'convex_http_responses_total{endpoint="unmatched",method="GET",status="404"} 1' in body
+    queries = next(line for line in body.splitlines()
+                   if line.startswith('convex_db_queries_total{endpoint="main.employees_data"'))
+    assert int(queries.rsplit(' ', 1)[1]) > 0
+    assert 'convex_http_request_db_seconds_bucket{endpoint="main.employees_data",method="GET",le="+Inf"} 1' in body
+
+
+def test_stats_endpoint_is_limited_to_allowed_hosts(app):
+    client = app.test_client()
+    response = client.get('/internal/stats', environ_base={'REMOTE_ADDR': '10.0.0.5'})
+    assert response.status_code == 403
+    assert client.get('/internal/stats').headers['Content-Type'].startswith('text/plain')
+
+
+def test_row_iteration_is_not_wrapped():
+    # Per-row Python wrappers cost more than the rows; only execute* and fetch* are timed
+    assert InstrumentedCursor.__next__ is sqlite3.Cursor.__next__
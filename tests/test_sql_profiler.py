@@ -0,0 +1,84 @@
+"""
+Tests for the opt-in SQL profiler
+"""
+
+import json
+import logging
+
+import pytest
+from flask import Flask, jsonify
+
+import db as db_module
+import request_metrics
+import sql_profiler
+from config import get_config
+from db import get_db, init_app as init_db_connections
+
+
+def test_statement_shape_collapses_literals():
+    assert sql_profiler.statement_shape("SELECT *  FROM stock\n WHERE id = 42 AND owner = 'Convex'") == \
+        'SELECT * FROM stock WHERE id = ? AND owner = ?'
+    assert sql_profiler.statement_shape('SELECT * FROM stock WHERE id IN (?, ?, ?)') == \
+        'SELECT * FROM stock WHERE id IN (?)'
+
+
+def warm_pool(app):
+    # A connection opened inside a request would add its setup pragmas to the report
+    with app.app_context():
+        get_db()
+
+
+@pytest.fixture
+def profiled_app(monkeypatch, tmp_path):
+    """A small app with the profiler on, logging reports under tmp_path"""
+    config_class = get_config()
+    monkeypatch.setattr(config_class, 'SQL_PROFILER_ENABLED', True)
+    monkeypatch.setattr(config_class, 'SQL_SLOW_QUERY_MS', 0)
+    monkeypatch.setattr(config_class, 'SQL_REPEAT_THRESHOLD', 5)
+    monkeypatch.setattr(config_class, 'SQL_PROFILE_LOG', str(tmp_path / 'sql_profile.log'))
+    monkeypatch.setattr(request_metrics, 'profile_statements', False)
+    monkeypatch.setattr(sql_profiler.report_logger, 'handlers', [])
+
+    profiled = Flask(__name__)
+    init_db_connections(profiled)
+    request_metrics.init_app(profiled)
+    assert sql_profiler.init_app(profiled)
+
+    @profiled.route('/loop')
+    def loop():
+        conn = get_db()
+        names = [conn.execute('SELECT name FROM employees WHERE id = ?', (i,)).fetchone() for i in range(6)]
+        return jsonify(len(names))
+
+    warm_pool(profiled)
+    yield profiled
+    for handler in sql_profiler.report_logger.handlers:
+        handler.close()
+
+
+def test_request_report_flags_repeats_and_explains_slow_queries(profiled_app, tmp_path, caplog):
+    with caplog.at_level(logging.WARNING, logger='sql_profiler'):
+        assert profiled_app.test_client().get('/loop').status_code == 200
+
+    for handler in sql_profiler.report_logger.handlers:
+        handler.flush()
+    report = json.loads((tmp_path / 'sql_profile.log').read_text().splitlines()[-1])
+    assert report['endpoint'] == 'loop'
+    assert report['queries'] == 6
+    assert report['repeated'] == [{'shape': 'SELECT name FROM employees WHERE id = ?', 'count': 6,
+                                   'ms': report['repeated'][0]['ms']}]
+    assert all(entry['plan'] for entry in report['slow'])
+    assert any('Possible N+1' in record.message for record in caplog.records)
+
+
+def test_profiler_reports_with_request_metrics_off(profiled_app, monkeypatch, tmp_path):
+    monkeypatch.setattr(get_config(), 'REQUEST_METRICS_ENABLED', False)
+    # Pooled connections may predate the setting; start from an empty pool
+    monkeypatch.setattr(db_module, '_pools', {})
+    warm_pool(profiled_app)
+    assert profiled_app.test_client().get('/loop').status_code == 200
+
+    for handler in sql_profiler.report_logger.handlers:
+        handler.flush()
+    report = json.loads((tmp_path / 'sql_profile.log').read_text().splitlines()[-1])
+    assert report['queries'] == 6
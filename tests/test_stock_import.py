@@ -0,0 +1,55 @@
+"""
+Tests for the streaming CSV stock import
+"""
+
+import io
+
+import pytest
+
+from stock_import import import_stock_csv, summarize_import
+
+
+@pytest.fixture
+def clean_stock(db):
+    before = db.execute('SELECT COALESCE(MAX(id), 0) FROM stock').fetchone()[0]
+    yield before
+    db.execute('DELETE FROM stock WHERE id > ?', (before,))
+    db.commit()
+
+
+def test_bad_bytes_after_a_committed_chunk_return_a_partial_report(db, clean_stock):
+    rows = b''.join(b'HDD,1TB,Convex,SN-IMP-%05d\n' % n for n in range(5000))
+    data = b'item_type,capacity,storage_owner,serial_number\n' + rows + b'\xff\xfe,bad\n' + b'HDD,1TB,Convex,SN-LATE\n'
+    report = import_stock_csv(db, io.BytesIO(data), chunk_size=1000)
+
+    imported = db.execute('SELECT COUNT(*) FROM stock WHERE id > ?', (clean_stock,)).fetchone()[0]
+    assert report['imported'] == imported == report['rows_read'] == 5000
+    # Everything before the bad line is in the database, nothing after it
+    assert report['aborted']['line'] == 5002
+    assert 'unreadable' in report['aborted']['error']
+    success, error = summarize_import(report)
+    assert f"Imported {imported} item(s)" in success
+    assert f"line {report['aborted']['line']}" in error
+
+
+def test_undecodable_header_imports_nothing(db, clean_stock):
+    with pytest.raises(ValueError):
+        import_stock_csv(db, io.BytesIO(b'\xff\xfeitem_type,capacity\n'))
+
+
+def test_valid_file_imports_every_unit(db, clean_stock):
+    data = b'type,size,owner,qty\nSSD,512GB,Convex,3\nSSD,512GB,,1\n'
+    report = import_stock_csv(db, io.BytesIO(data))
+    assert (report['imported'], report['skipped'], report.get('aborted')) == (3, 1, None)
+
+
+def test_upload_endpoint_imports_a_posted_csv(app, db, clean_stock):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=1, user_name='Tester', role='Admin Access')
+    data = b'item_type,capacity,storage_owner,serial_number\nHDD,2TB,Convex,SN-POST-1\nHDD,2TB,Convex,SN-POST-2\n'
+    response = client.post('/upload', data={'file': (io.BytesIO(data), 'manifest.csv')},
+                           content_type='multipart/form-data', headers={'Accept': 'application/json'})
+    assert response.get_json()['imported'] == 2
+    serials = db.execute('SELECT serial_number FROM stock WHERE id > ? ORDER BY id', (clean_stock,)).fetchall()
+    assert serials == [('SN-POST-1',), ('SN-POST-2',)]
@@ -0,0 +1,63 @@
+"""
+Tests for the server-side stock search
+"""
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from stock_search import search_stock
+
+
+@pytest.fixture
+def stock(db):
+    rows = [
+        ('HDD', '1TB', 'SN-A100', '2024-01-05', 1, 'Convex', 'New', 'Disk-Alpha'),
+        ('HDD', '1TB', 'SN-A101', '2024-02-01', 0, 'Convex', 'Used', 'Disk-Beta'),
+        ('HDD', '2TB', 'sn-a200', None, 1, 'Client 001', 'New', None),
+        ('SSD', '512GB', 'SN-B300', '2023-12-24', 1, 'Convex', 'New', 'disk-alpha'),
+        ('Pendrive', '64GB', None, '2024-03-10', 1, 'Client 002', 'New', None),
+    ]
+    ids = [db.execute('''INSERT INTO stock (item_type, capacity, serial_number, purchase_date, quantity,
+            storage_owner, condition, disk_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', row).lastrowid for row in rows]
+    db.commit()
+    yield ids
+    db.executemany('DELETE FROM stock WHERE id = ?', [(stock_id,) for stock_id in ids])
+    db.commit()
+
+
+def ids_for(db, **args):
+    items, _ = search_stock(db, MultiDict(args))
+    return [item['id'] for item in items]
+
+
+def test_filters_combine(db, stock):
+    assert ids_for(db, item_type='HDD', capacity='1TB', owner='Convex') == stock[:2]
+    assert ids_for(db, item_type='HDD', in_stock='true') == [stock[0], stock[2]]
+    assert ids_for(db, condition='Used') == [stock[1]]
+
+
+def test_serial_and_disk_lookups_ignore_case(db, stock):
+    assert ids_for(db, serial='sn-a100') == [stock[0]]
+    assert ids_for(db, serial='SN-A*') == [stock[0], stock[1], stock[2]]
+    assert ids_for(db, disk_name='DISK-ALPHA') == [stock[0], stock[3]]
+    assert ids_for(db, disk_name='disk-b*') == [stock[1]]
+
+
+def test_sorted_pages_follow_the_cursor(db, stock):
+    seen, cursor = [], None
+    while True:
+        items, cursor = search_stock(db, MultiDict({'sort': 'serial_number', 'order': 'desc', 'limit': '2',
+                                                    'serial': 'sn-*', 'cursor': cursor or ''}))
+        seen.extend(item['serial_number'] for item in items)
+        if cursor is None:
+            break
+    assert seen == ['SN-B300', 'sn-a200', 'SN-A101', 'SN-A100']
+
+
+def test_invalid_arguments_are_rejected(app, stock):
+    client = app.test_client()
+    assert client.get('/api/stock/search?sort=price').status_code == 400
+    assert client.get('/api/stock/search?in_stock=maybe').status_code == 400
+    body = client.get('/api/stock/search?serial=SN-B300').get_json()
+    assert [item['id'] for item in body['items']] == [stock[3]]
+    assert body['next_cursor'] is None
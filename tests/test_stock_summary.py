@@ -0,0 +1,40 @@
+"""
+Tests for the trigger-maintained stock_summary table
+"""
+
+SUMMARY_COLUMNS = 'item_type, capacity, storage_owner, row_count, in_stock_rows, in_stock_quantity'
+
+
+def summary(conn):
+    return conn.execute(f'SELECT {SUMMARY_COLUMNS} FROM stock_summary ORDER BY 1, 2, 3').fetchall()
+
+
+def scanned_summary(conn):
+    """The per-group totals computed by scanning every stock row"""
+    return conn.execute('''SELECT item_type, capacity, storage_owner, COUNT(*), SUM(quantity > 0), SUM(MAX(quantity, 0))
+        FROM stock GROUP BY item_type, capacity, storage_owner ORDER BY 1, 2, 3''').fetchall()
+
+
+def test_summary_follows_inserts_updates_and_deletes(db):
+    rows = [('Summary-HDD', '1TB', 'Convex', 1), ('Summary-HDD', '1TB', 'Convex', 0),
+            ('Summary-HDD', '2TB', 'Client 001', 3), ('Summary-SSD', '1TB', 'Convex', -1)]
+    ids = [db.execute('INSERT INTO stock (item_type, capacity, storage_owner, quantity) VALUES (?, ?, ?, ?)',
+                      row).lastrowid for row in rows]
+    db.commit()
+    try:
+        assert summary(db) == scanned_summary(db)
+        db.execute('UPDATE stock SET quantity = 0 WHERE id = ?', (ids[0],))
+        db.execute('UPDATE stock SET quantity = 5 WHERE id = ?', (ids[1],))
+        db.execute("UPDATE stock SET storage_owner = 'Convex' WHERE id = ?", (ids[2],))
+        db.execute("UPDATE stock SET item_type = 'Summary-HDD', capacity = '1TB' WHERE id = ?", (ids[3],))
+        db.commit()
+        assert summary(db) == scanned_summary(db)
+        db.execute('DELETE FROM stock WHERE id IN (?, ?)', (ids[0], ids[2]))
+        db.commit()
+        assert summary(db) == scanned_summary(db)
+    finally:
+        db.executemany('DELETE FROM stock WHERE id = ?', [(stock_id,) for stock_id in ids])
+        db.commit()
+    # Groups whose last row is gone disappear from the summary
+    assert summary(db) == scanned_summary(db)
+    assert not [row for row in summary(db) if row[0].startswith('Summary-')]
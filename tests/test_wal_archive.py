@@ -0,0 +1,153 @@
+"""
+WAL archiving tests
+Committed frames are archived into segments, and the database can be rebuilt
+as of any archived segment.
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from migrations import migrate
+from upgrade_implementation import InventoryUpgradeManager
+from wal_archive import WalArchiver, list_generations, read_segments, restore_point_in_time
+
+
+def insert_units(conn, count):
+    conn.executemany(
+        "INSERT INTO stock (item_type, capacity, quantity, storage_owner) VALUES ('HDD', '1TB', 1, 'Convex')",
+        [()] * count)
+    conn.commit()
+
+
+@pytest.fixture
+def archived_db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db_path = tmp_path / 'live.db'
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA wal_autocheckpoint = 0')
+    migrate(conn)
+    manager = InventoryUpgradeManager(db_path=str(db_path), backup_dir=tmp_path / 'backups')
+    archiver = WalArchiver(db_path, manager.write_snapshot, root=manager.archive_dir,
+                           interval=3600, checkpoint_frames=20).start()
+    yield conn, archiver, manager
+    conn.close()
+
+
+def stock_count(path):
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute('PRAGMA quick_check').fetchone()[0] == 'ok'
+        return conn.execute('SELECT COUNT(*) FROM stock').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_restore_to_each_segment(archived_db, tmp_path):
+    conn, archiver, manager = archived_db
+    for _ in range(5):
+        insert_units(conn, 10)
+        assert archiver.archive_once() > 0
+    archiver.stop()
+
+    generations = list_generations(manager.archive_dir)
+    assert len(generations) == 1
+    segments = read_segments(manager.archive_dir / generations[0]['generation'])
+    assert len(segments) == 5
+    for expected, segment in zip(range(10, 60, 10), segments):
+        restore_point_in_time(segment['archived_at'], tmp_path / 'restored.db', root=manager.archive_dir)
+        assert stock_count(tmp_path / 'restored.db') == expected
+
+
+def test_outside_reset_starts_new_generation(archived_db):
+    conn, archiver, manager = archived_db
+    insert_units(conn, 5)
+    archiver.archive_once()
+    insert_units(conn, 5)
+    # Checkpoints the archiver did not run reset the WAL before the last frames were copied
+    for _ in range(2):
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        insert_units(conn, 1)
+    archiver.archive_once()
+    archiver.stop()
+    assert len(list_generations(manager.archive_dir)) == 2
+
+
+def test_restore_backup_at_point_in_time(archived_db):
+    conn, archiver, manager = archived_db
+    insert_units(conn, 10)
+    archiver.archive_once()
+    target = read_segments(archiver.generation_dir)[-1]['archived_at']
+    insert_units(conn, 10)
+    archiver.archive_once()
+
+    assert manager.restore_backup(target_time=target)
+    assert conn.execute('SELECT COUNT(*) FROM stock').fetchone()[0] == 10
+    archiver.stop()
+
+
+def test_checkpoint_during_concurrent_writes_keeps_one_generation(archived_db, tmp_path):
+    conn, archiver, manager = archived_db
+    db_path = tmp_path / 'live.db'
+
+    def write():
+        writer = sqlite3.connect(db_path, timeout=30)
+        writer.execute('PRAGMA wal_autocheckpoint = 0')
+        for _ in range(200):
+            insert_units(writer, 1)
+        writer.close()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    while thread.is_alive():
+        archiver.archive_once()
+    thread.join()
+    archiver.stop()
+
+    # Each checkpoint ran under the archiver's write lock, so no commit escaped the archive
+    generations = list_generations(manager.archive_dir)
+    assert len(generations) == 1
+    restore_point_in_time(read_segments(archiver.generation_dir)[-1]['archived_at'],
+                          tmp_path / 'restored.db', root=manager.archive_dir)
+    assert stock_count(tmp_path / 'restored.db') == 200
+
+
+def restart_archiver(manager, db_path):
+    # A recycled worker's archiver is never stopped; a new one takes over
+    return WalArchiver(db_path, manager.write_snapshot, root=manager.archive_dir,
+                       interval=3600, checkpoint_frames=20).start()
+
+
+def test_new_archiver_resumes_generation(archived_db, tmp_path):
+    conn, archiver, manager = archived_db
+    insert_units(conn, 5)
+    archiver.archive_once()
+    insert_units(conn, 5)
+    successor = restart_archiver(manager, tmp_path / 'live.db')
+    # 30 frames pass checkpoint_frames, so the successor checkpoints and the WAL restarts
+    insert_units(conn, 30)
+    successor.archive_once()
+    insert_units(conn, 5)
+    successor.stop()
+
+    assert len(list_generations(manager.archive_dir)) == 1
+    resumed = restart_archiver(manager, tmp_path / 'live.db')
+    insert_units(conn, 5)
+    resumed.stop()
+    assert len(list_generations(manager.archive_dir)) == 1
+    restore_point_in_time(read_segments(resumed.generation_dir)[-1]['archived_at'],
+                          tmp_path / 'restored.db', root=manager.archive_dir)
+    assert stock_count(tmp_path / 'restored.db') == 50
+
+
+def test_new_archiver_after_outside_reset_starts_new_generation(archived_db, tmp_path):
+    conn, archiver, manager = archived_db
+    insert_units(conn, 5)
+    archiver.archive_once()
+    for _ in range(2):
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        insert_units(conn, 1)
+    restart_archiver(manager, tmp_path / 'live.db').stop()
+    assert len(list_generations(manager.archive_dir)) == 2
@@ -0,0 +1,51 @@
+"""
+Tests for the trigger-maintained /work dashboard counters
+"""
+
+from datetime import date
+
+from work_dashboard import dashboard_counters, day_sql, epoch_day
+
+TODAY = date(2025, 6, 1)
+
+
+def scanned_counters(conn):
+    """The counters computed the old way, by scanning every project"""
+    row = conn.execute('''SELECT
+            COUNT(CASE WHEN TRIM(wedding_date) != '' THEN 1 END),
+            COUNT(CASE WHEN TRIM(engagement_date) != '' THEN 1 END),
+            COUNT(CASE WHEN date(wedding_date) >= :today OR date(engagement_date) >= :today THEN 1 END),
+            COUNT(CASE WHEN status = 'Active' THEN 1 END),
+            COUNT(CASE WHEN status = 'Active' AND TRIM(wedding_date) != '' THEN 1 END)
+        FROM work_projects''', {'today': TODAY.isoformat()}).fetchone()
+    return dict(zip(('wedding_count', 'engagement_count', 'upcoming_count', 'active_count',
+                     'active_wedding_count'), row))
+
+
+def test_day_numbers_match_python_dates(db):
+    for text, expected in (('2025-06-01', epoch_day(TODAY)), ('1970-01-01', 0), ('2025-06-01 18:00', epoch_day(TODAY)),
+                           ('', None), (None, None), ('June 1st', None), ('2025', None)):
+        assert db.execute(f"SELECT {day_sql(':d')}", {'d': text}).fetchone()[0] == expected
+
+
+def test_counters_follow_inserts_updates_and_deletes(db):
+    rows = [
+        ('Dash A', 'Active', '2025-07-01', ''),
+        ('Dash B', 'Active', '', '2025-06-01'),
+        ('Dash C', 'Completed', '2024-01-01', '2023-12-01'),
+        ('Dash D', None, None, '2026-01-01'),
+    ]
+    ids = [db.execute('''INSERT INTO work_projects (client_name, services, status, wedding_date, engagement_date)
+                         VALUES (?, 'Album', ?, ?, ?)''', row).lastrowid for row in rows]
+    db.commit()
+    try:
+        assert dashboard_counters(db, TODAY) == scanned_counters(db)
+        db.execute("UPDATE work_projects SET status = 'Completed', wedding_date = '' WHERE id = ?", (ids[0],))
+        db.execute("UPDATE work_projects SET status = 'Active', wedding_date = '2025-08-08' WHERE id = ?", (ids[3],))
+        db.execute('DELETE FROM work_projects WHERE id = ?', (ids[1],))
+        db.commit()
+        assert dashboard_counters(db, TODAY) == scanned_counters(db)
+    finally:
+        db.executemany('DELETE FROM work_projects WHERE id = ?', [(project_id,) for project_id in ids])
+        db.commit()
+    assert dashboard_counters(db, TODAY) == scanned_counters(db)
@@ -0,0 +1,70 @@
+"""
+Tests for the work project events table and the calendar API
+"""
+
+from datetime import date
+
+import pytest
+
+from work_events import events_between, parse_window
+
+
+@pytest.fixture
+def projects(db):
+    rows = [
+        ('Calendar A', '2031-03-10', '2031-01-05', '2031-02-14', None),
+        ('Calendar B', '2031-03-10 ', '', None, '2031-03-01'),
+        ('Calendar C', 'sometime in March', None, None, None),
+    ]
+    ids = [db.execute('''INSERT INTO work_projects (client_name, services, wedding_date, engagement_date,
+            save_the_date, maduaram_veypu_date) VALUES (?, 'Album', ?, ?, ?, ?)''', row).lastrowid for row in rows]
+    db.commit()
+    yield ids
+    db.executemany('DELETE FROM work_projects WHERE id = ?', [(project_id,) for project_id in ids])
+    db.commit()
+
+
+def calendar(db, start, end, kinds=None):
+    return [(event['date'], event['kind'], event['client_name'])
+            for event in events_between(db, date.fromisoformat(start), date.fromisoformat(end), kinds)]
+
+
+def test_events_in_window_in_date_order(db, projects):
+    assert calendar(db, '2031-01-01', '2031-03-31') == [
+        ('2031-01-05', 'engagement', 'Calendar A'),
+        ('2031-02-14', 'save_the_date', 'Calendar A'),
+        ('2031-03-01', 'maduaram_veypu', 'Calendar B'),
+        ('2031-03-10', 'wedding', 'Calendar A'),
+        ('2031-03-10', 'wedding', 'Calendar B'),
+    ]
+    assert calendar(db, '2031-03-01', '2031-03-31', ['wedding']) == [
+        ('2031-03-10', 'wedding', 'Calendar A'), ('2031-03-10', 'wedding', 'Calendar B')]
+
+
+def test_events_follow_project_edits(db, projects):
+    db.execute("UPDATE work_projects SET wedding_date = '2031-03-20', save_the_date = '' WHERE id = ?", (projects[0],))
+    db.execute("UPDATE work_projects SET wedding_date = '2031-03-11' WHERE id = ?", (projects[2],))
+    db.execute('DELETE FROM work_projects WHERE id = ?', (projects[1],))
+    db.commit()
+    assert calendar(db, '2031-02-01', '2031-03-31') == [
+        ('2031-03-11', 'wedding', 'Calendar C'),
+        ('2031-03-20', 'wedding', 'Calendar A'),
+    ]
+    assert db.execute('SELECT COUNT(*) FROM work_project_events WHERE project_id = ?', (projects[1],)).fetchone()[0] == 0
+
+
+def test_window_validation():
+    assert parse_window('2031-01-01', '2031-01-01') == (date(2031, 1, 1), date(2031, 1, 1))
+    for start, end in (('2031-01-02', '2031-01-01'), ('2031-01-01', '2032-01-02'), ('01/01/2031', '2031-02-01'),
+                       (None, '2031-01-01')):
+        with pytest.raises(ValueError):
+            parse_window(start, end)
+
+
+def test_calendar_api(app, projects):
+    client = app.test_client()
+    body = client.get('/api/calendar?start=2031-03-01&end=2031-03-31&kind=wedding,maduaram_veypu').get_json()
+    assert [(event['date'], event['kind']) for event in body['events']] == [
+        ('2031-03-01', 'maduaram_veypu'), ('2031-03-10', 'wedding'), ('2031-03-10', 'wedding')]
+    assert client.get('/api/calendar?start=2031-03-01&end=2031-03-31&kind=birthday').status_code == 400
+    assert client.get('/api/calendar?start=2031-03-01').status_code == 400
@@ -0,0 +1,61 @@
+"""
+Tests for the work project full-text index and search endpoint
+"""
+
+import pytest
+
+from work_search import match_expression, search_projects
+
+
+@pytest.fixture
+def projects(db):
+    rows = [
+        ('Anand Krishnan', 'Meera', 'Outdoor shoot at the beach', 'Drone', 'Photography'),
+        ('Maria Joseph', 'Anand Krishnan', 'Church ceremony', 'Album', 'Videography'),
+        ('Rahul Menon', None, 'Wants <b>bold</b> album cover, ask Anandhu', 'Album', 'Photography'),
+    ]
+    ids = []
+    for row in rows:
+        cur = db.execute('''INSERT INTO work_projects (client_name, referred_by, notes, requirements, services)
+            VALUES (?, ?, ?, ?, ?)''', row)
+        ids.append(cur.lastrowid)
+    db.commit()
+    yield ids
+    db.executemany('DELETE FROM work_projects WHERE id = ?', [(project_id,) for project_id in ids])
+    db.commit()
+
+
+def test_match_expression_quotes_prefix_terms():
+    assert match_expression('anan kri') == '"anan"* "kri"*'
+    assert match_expression('NOT "x" OR') == '"NOT"* "x"* "OR"*'
+    assert match_expression('  -- ') is None
+
+
+def test_prefix_search_ranks_client_name_first(db, projects):
+    results = search_projects(db, 'anan')
+    ids = [result['id'] for result in results]
+    assert ids[:2] == [projects[0], projects[1]]
+    assert projects[2] in ids
+    assert results[0]['client_name_html'] == '<mark>Anand</mark> Krishnan'
+
+
+def test_snippets_are_escaped(db, projects):
+    result = search_projects(db, 'bold cover')[0]
+    assert result['id'] == projects[2]
+    assert '&lt;b&gt;<mark>bold</mark>&lt;/b&gt;' in result['snippet_html']
+
+
+def test_index_follows_updates_and_deletes(db, projects):
+    db.execute("UPDATE work_projects SET notes = 'Temple wedding' WHERE id = ?", (projects[0],))
+    db.commit()
+    assert [r['id'] for r in search_projects(db, 'temple')] == [projects[0]]
+    assert projects[0] not in [r['id'] for r in search_projects(db, 'beach')]
+    db.execute('DELETE FROM work_projects WHERE id = ?', (projects[1],))
+    db.commit()
+    assert projects[1] not in [r['id'] for r in search_projects(db, 'church')]
+
+
+def test_search_endpoint(app, projects):
+    body = app.test_client().get('/work/search?q=maria').get_json()
+    assert [result['id'] for result in body['results']] == [projects[1]]
+    assert app.test_client().get('/work/search?q=').get_json()['results'] == []
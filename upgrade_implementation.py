@@ -4,19 +4,33 @@ Convex Studio Inventory - Upgrade Implementation Script
 This script provides the foundation for future upgrades and maintenance.
 """
 
+import argparse
 import sqlite3
 import os
-import shutil
 import json
 import logging
+import threading
 from datetime import datetime
 from pathlib import Path
 
+from config import get_config
+from indexes import ensure_indexes
+from migrations import MIGRATIONS, apply_migration, current_version
+from wal_archive import ARCHIVE_DIR_NAME, list_generations, restore_point_in_time
+from backup_archive import (COMPRESSORS, MANIFEST_SUFFIX, backup_files, describe_archive, extract_archive,
+                            map_archives, read_manifest, verify_archive, write_archive)
+
+# version -> migration function, for run_migration
+MIGRATION_FUNCTIONS = {version: func for version, _, func in MIGRATIONS}
+
 class InventoryUpgradeManager:
-    def __init__(self, db_path='inventory.db'):
+    def __init__(self, db_path='inventory.db', backup_dir=None):
         self.db_path = db_path
-        self.backup_dir = Path('backups')
+        self.backup_dir = Path(backup_dir or get_config().BACKUP_DIR)
         self.logs_dir = Path('logs')
+        # Only one backup runs at a time; last_backup describes the latest attempt
+        self._backup_lock = threading.Lock()
+        self.last_backup = None
         self.setup_directories()
         self.setup_logging()
         
@@ -40,33 +54,9 @@ class InventoryUpgradeManager:
     def get_db_version(self):
         """Get current database schema version"""
         conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
         
         try:
-            # Check if schema_version table exists
-            c.execute("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name='schema_version'
-            """)
-            
-            if not c.fetchone():
-                # Create schema_version table if it doesn't exist
-                c.execute('''
-                    CREATE TABLE schema_version (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        version INTEGER NOT NULL,
-                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        description TEXT
-                    )
-                ''')
-                c.execute("INSERT INTO schema_version (version, description) VALUES (1, 'Initial version')")
-                conn.commit()
-                return 1
-            
-            # Get latest version
-            c.execute("SELECT version FROM schema_version ORDER BY id DESC LIMIT 1")
-            version = c.fetchone()[0]
-            return version
+            return current_version(conn)
             
         except Exception as e:
             self.logger.error(f"Error getting database version: {e}")
@@ -74,38 +64,119 @@ class InventoryUpgradeManager:
         finally:
             conn.close()
             
+    def pending_migrations(self):
+        """List (version, description) for migrations not yet applied"""
+        version = self.get_db_version()
+        return [(v, description) for v, description, _ in MIGRATIONS if v > version]
+            
     def backup_database(self):
-        """Create a backup of the current database"""
+        """Create a backup of the current database
+        
+        Uses the SQLite online backup API, so the copy is consistent even while
+        the application is writing. The checked copy is then streamed into a
+        chunked archive compressed with Config.BACKUP_COMPRESSION. Returns the
+        archive path, or None if the backup failed or did not pass its
+        integrity check.
+        """
+        with self._backup_lock:
+            config_class = get_config()
+            started_at = datetime.now()
+            timestamp = started_at.strftime("%Y%m%d_%H%M%S_%f")
+            suffix = COMPRESSORS[config_class.BACKUP_COMPRESSION][0]
+            backup_path = self.backup_dir / f"inventory_backup_{timestamp}{suffix}"
+            partial_path = self.backup_dir / f"inventory_backup_{timestamp}.snapshot.partial"
+            
+            try:
+                self.write_snapshot(partial_path)
+                # Only a checked backup gets a name that list_backups() and retention see
+                write_archive(partial_path, backup_path, config_class.BACKUP_COMPRESSION,
+                              config_class.BACKUP_CHUNK_SIZE)
+                partial_path.unlink()
+                self.logger.info(f"Database backed up to: {backup_path}")
+                self.enforce_backup_retention()
+                self.last_backup = {'status': 'ok', 'path': str(backup_path),
+                                    'started_at': started_at.isoformat(),
+                                    'finished_at': datetime.now().isoformat()}
+                return backup_path
+                
+            except Exception as e:
+                self.logger.error(f"Backup failed: {e}")
+                if partial_path.exists():
+                    partial_path.unlink()
+                self.last_backup = {'status': 'failed', 'error': str(e),
+                                    'started_at': started_at.isoformat(),
+                                    'finished_at': datetime.now().isoformat()}
+                return None
+                
+    def backup_database_async(self):
+        """Start backup_database() on a background thread and return the thread"""
+        thread = threading.Thread(target=self.backup_database, name='inventory-backup', daemon=True)
+        thread.start()
+        return thread
+        
+    def backup_in_progress(self):
+        """Return True while a backup is running"""
+        return self._backup_lock.locked()
+        
+    def write_snapshot(self, target_path):
+        """Write a consistent copy of the live database to target_path and check it"""
+        self._copy_online(target_path)
+        result = self._quick_check(target_path)
+        if result != 'ok':
+            raise sqlite3.DatabaseError(f"quick_check failed: {result}")
+            
+    def _copy_online(self, target_path):
+        """Copy the live database to target_path in page-sized steps"""
+        pages = get_config().BACKUP_PAGES_PER_STEP
+        source = sqlite3.connect(self.db_path, check_same_thread=False)
+        target = sqlite3.connect(target_path)
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"inventory_backup_{timestamp}.db"
-            backup_path = self.backup_dir / backup_name
+            # Holding one read transaction pins the snapshot: under WAL, writers
+            # carry on and the copy does not restart when they commit
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            source.backup(target, pages=pages)
+            source.rollback()
+            # A backup file must stand alone, without a -wal file next to it
+            target.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            target.close()
+            source.close()
             
-            shutil.copy2(self.db_path, backup_path)
-            self.logger.info(f"Database backed up to: {backup_path}")
-            return backup_path
+    def _quick_check(self, path):
+        """Run PRAGMA quick_check against a backup file and return its first result row"""
+        conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            return conn.execute('PRAGMA quick_check').fetchone()[0]
+        finally:
+            conn.close()
             
-        except Exception as e:
-            self.logger.error(f"Backup failed: {e}")
-            return None
+    def enforce_backup_retention(self):
+        """Delete the oldest backups beyond Config.MAX_BACKUP_FILES; returns the names removed"""
+        keep = get_config().MAX_BACKUP_FILES
+        # Backup names embed their timestamp, so name order is age order
+        backups = sorted(self.backup_files(), key=lambda p: p.name, reverse=True)
+        removed = []
+        for old_backup in backups[keep:]:
+            old_backup.with_name(old_backup.name + MANIFEST_SUFFIX).unlink(missing_ok=True)
+            old_backup.unlink()
+            removed.append(old_backup.name)
+        if removed:
+            self.logger.info(f"Removed old backups: {', '.join(removed)}")
+        return removed
             
     def run_migration(self, version, description, migration_func):
-        """Run a database migration"""
+        """Run a database migration and record it in one transaction"""
+        conn = sqlite3.connect(self.db_path)
         try:
             self.logger.info(f"Running migration to version {version}: {description}")
             
-            # Run the migration
-            migration_func()
-            
-            # Record the migration
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute(
-                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
-                (version, description)
-            )
+            # The migration and its schema_version row commit or roll back together
+            if not apply_migration(conn, version, description, migration_func):
+                self.logger.info(f"Version {version} was already applied")
+                return True
+            ensure_indexes(conn)
             conn.commit()
-            conn.close()
             
             self.logger.info(f"Migration to version {version} completed successfully")
             return True
@@ -113,6 +184,8 @@ class InventoryUpgradeManager:
         except Exception as e:
             self.logger.error(f"Migration to version {version} failed: {e}")
             return False
+        finally:
+            conn.close()
             
     def health_check(self):
         """Perform a health check on the database"""
@@ -161,142 +234,101 @@ class InventoryUpgradeManager:
                 'timestamp': datetime.now().isoformat()
             }
             
+    def backup_files(self):
+        """Paths of every complete backup, archived or plain"""
+        return backup_files(self.backup_dir)
+        
     def list_backups(self):
         """List all available database backups"""
-        backups = []
-        for backup_file in self.backup_dir.glob("inventory_backup_*.db"):
-            stat = backup_file.stat()
-            backups.append({
-                'filename': backup_file.name,
-                'size_mb': round(stat.st_size / (1024 * 1024), 2),
-                'created': datetime.fromtimestamp(stat.st_ctime).isoformat()
-            })
-        
+        backups = map_archives(describe_archive, self.backup_files(), get_config().BACKUP_VERIFY_WORKERS)
         return sorted(backups, key=lambda x: x['created'], reverse=True)
         
-    def restore_backup(self, backup_filename):
-        """Restore database from a backup"""
+    def verify_backups(self, filenames=None):
+        """Verify backups on a thread pool; returns one result dict per backup
+        
+        Archives are checked chunk by chunk against their manifest. Plain .db
+        backups from before archives existed get a quick_check instead.
+        """
+        paths = ([self.backup_dir / name for name in filenames] if filenames is not None
+                 else sorted(self.backup_files(), key=lambda p: p.name, reverse=True))
+        return map_archives(self._verify_backup, paths, get_config().BACKUP_VERIFY_WORKERS)
+        
+    def _verify_backup(self, path):
+        if read_manifest(path) is not None or not path.name.endswith('.db'):
+            return verify_archive(path)
         try:
-            backup_path = self.backup_dir / backup_filename
+            result = self._quick_check(path)
+        except sqlite3.DatabaseError as e:
+            result = str(e)
+        return {'filename': path.name, 'valid': result == 'ok', 'error': None if result == 'ok' else result}
+        
+    def restore_backup(self, backup_filename=None, target_time=None):
+        """Restore database from a backup, or as of target_time from the WAL archive
+        
+        target_time (a datetime or ISO string) rebuilds the database from the
+        newest archived generation that started before it, replaying the WAL
+        segments archived up to that time.
+        """
+        rebuilt_path = None
+        try:
+            if target_time is not None:
+                rebuilt_path = self.backup_dir / f"point_in_time_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.db.partial"
+                reached = restore_point_in_time(target_time, rebuilt_path, root=self.archive_dir)
+                result = self._quick_check(rebuilt_path)
+                if result != 'ok':
+                    raise sqlite3.DatabaseError(f"Rebuilt database failed quick_check: {result}")
+                backup_path = rebuilt_path
+                source_name = f"WAL archive as of {reached}"
+            else:
+                backup_path = self.backup_dir / backup_filename
+                source_name = backup_filename
             
             if not backup_path.exists():
                 raise FileNotFoundError(f"Backup file not found: {backup_filename}")
+            
+            if read_manifest(backup_path) is not None:
+                # Archives are unpacked chunk by chunk, each checked against the manifest
+                rebuilt_path = self.backup_dir / f"{backup_path.name}.restore.partial"
+                extract_archive(backup_path, rebuilt_path)
+                backup_path = rebuilt_path
                 
             # Create a backup of current database before restore
             current_backup = self.backup_database()
             
             # Restore the backup
-            shutil.copy2(backup_path, self.db_path)
+            self._install_database(backup_path)
             
-            self.logger.info(f"Database restored from: {backup_filename}")
+            self.logger.info(f"Database restored from: {source_name}")
             return True
             
         except Exception as e:
             self.logger.error(f"Restore failed: {e}")
             return False
-
-# Example migration functions
-def migration_2_add_audit_trail():
-    """Migration 2: Add audit trail table"""
-    conn = sqlite3.connect('inventory.db')
-    c = conn.cursor()
-    
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS audit_trail (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            table_name TEXT NOT NULL,
-            record_id INTEGER NOT NULL,
-            action TEXT NOT NULL,
-            old_values TEXT,
-            new_values TEXT,
-            user_id TEXT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-def migration_3_add_user_management():
-    """Migration 3: Add user management tables"""
-    conn = sqlite3.connect('inventory.db')
-    c = conn.cursor()
-    
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL DEFAULT 'staff',
-            is_active BOOLEAN DEFAULT 1,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS user_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            session_token TEXT UNIQUE NOT NULL,
-            expires_at TIMESTAMP NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-def add_completed_date_columns():
-    conn = sqlite3.connect('inventory.db')
-    c = conn.cursor()
-    # Add columns if they do not exist
-    for col in ['reel_completed_date', 'album_completed_date', 'highlight_completed_date', 'fullwork_completed_date']:
-        c.execute(f"PRAGMA table_info(work_projects)")
-        columns = [row[1] for row in c.fetchall()]
-        if col not in columns:
-            c.execute(f"ALTER TABLE work_projects ADD COLUMN {col} TEXT")
-    conn.commit()
-    conn.close()
-
-def add_reel_completed_date_column():
-    conn = sqlite3.connect('inventory.db')
-    c = conn.cursor()
-    c.execute("PRAGMA table_info(work_projects)")
-    columns = [row[1] for row in c.fetchall()]
-    if 'reel_completed_date' not in columns:
-        c.execute("ALTER TABLE work_projects ADD COLUMN reel_completed_date TEXT")
-    conn.commit()
-    conn.close()
-
-def add_assignment_completed_date_columns():
-    conn = sqlite3.connect('inventory.db')
-    c = conn.cursor()
-    c.execute("PRAGMA table_info(work_projects)")
-    columns = [row[1] for row in c.fetchall()]
-    for col in ['album_completed_date', 'highlight_completed_date', 'fullwork_completed_date']:
-        if col not in columns:
-            c.execute(f"ALTER TABLE work_projects ADD COLUMN {col} TEXT")
-    conn.commit()
-    conn.close()
-
-def migrate_add_payment_details_table():
-    db = sqlite3.connect('inventory.db')
-    db.execute("""
-    CREATE TABLE IF NOT EXISTS payment_details (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        project_id INTEGER NOT NULL UNIQUE,
-        quoted_amount REAL NOT NULL,
-        discount REAL DEFAULT 0,
-        advance_amount REAL DEFAULT 0,
-        remaining_amount REAL,
-        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (project_id) REFERENCES work_projects(id)
-    )
-    """)
-    db.commit()
-    db.close()
+        finally:
+            if rebuilt_path is not None and rebuilt_path.exists():
+                rebuilt_path.unlink()
+            
+    def _install_database(self, source_path):
+        """Replace the live database's contents with source_path through the backup API
+        
+        Unlike copying the file over, this is safe with open connections and a
+        WAL file next to the database, and the change is itself archived.
+        """
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(self.db_path, timeout=get_config().DATABASE_BUSY_TIMEOUT / 1000)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+            
+    @property
+    def archive_dir(self):
+        return self.backup_dir / ARCHIVE_DIR_NAME
+        
+    def list_archive_generations(self):
+        """List the WAL archive generations available for point-in-time restore"""
+        return list_generations(self.archive_dir)
 
 def main():
     """Main function to demonstrate upgrade functionality"""
@@ -326,35 +358,33 @@ def main():
     if backup_path:
         print(f"  Backup created: {backup_path}")
     
-    # Example of running a migration
+    # Apply pending migrations
     current_version = upgrade_manager.get_db_version()
     print(f"\n4. Current database version: {current_version}")
     
-    if current_version < 2:
-        print("  Running migration to version 2 (audit trail)...")
-        success = upgrade_manager.run_migration(
-            2, 
-            "Add audit trail table", 
-            migration_2_add_audit_trail
-        )
-        if success:
-            print("  Migration completed successfully")
-        else:
-            print("  Migration failed")
-    
-    if current_version < 3:
-        print("  Running migration to version 3 (user management)...")
-        success = upgrade_manager.run_migration(
-            3, 
-            "Add user management tables", 
-            migration_3_add_user_management
-        )
-        if success:
+    for version, description in upgrade_manager.pending_migrations():
+        print(f"  Running migration to version {version} ({description})...")
+        if upgrade_manager.run_migration(version, description, MIGRATION_FUNCTIONS[version]):
             print("  Migration completed successfully")
         else:
             print("  Migration failed")
+            break
     
     print("\n=== Upgrade Manager Complete ===")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convex Studio Inventory upgrade manager")
+    parser.add_argument('--restore', metavar='BACKUP_FILE', help="restore a backup from the backups folder")
+    parser.add_argument('--restore-at', metavar='TIMESTAMP',
+                        help="restore the database as of an ISO timestamp from the WAL archive")
+    parser.add_argument('--verify-backups', action='store_true', help="verify every backup archive")
+    args = parser.parse_args()
+    if args.verify_backups:
+        results = InventoryUpgradeManager().verify_backups()
+        for result in results:
+            print(f"  {result['filename']}: {'ok' if result['valid'] else result['error']}")
+        raise SystemExit(0 if all(result['valid'] for result in results) else 1)
+    if args.restore or args.restore_at:
+        restored = InventoryUpgradeManager().restore_backup(args.restore, target_time=args.restore_at)
+        raise SystemExit(0 if restored else 1)
     main() 
\ No newline at end of file
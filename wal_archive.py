@@ -0,0 +1,414 @@
+"""
+Continuous WAL archiving for Convex Studio Inventory System
+A background thread copies newly committed WAL frames into the backups folder,
+so backup I/O follows the write volume rather than the database size.
+
+Archive layout, under <BACKUP_DIR>/wal_archive:
+
+    <generation>/base.db           consistent snapshot the generation starts from
+    <generation>/generation.json   start time and page size
+    <generation>/segments.jsonl    one line per archived segment, in order
+    <generation>/<seq>.frames      raw WAL frames of committed transactions
+    <generation>/state.json        where in the WAL the archiver has got to
+
+While archiving is enabled the application does not checkpoint on its own
+(wal_autocheckpoint = 0); the archiver checkpoints once the frames are safe,
+still holding the write lock it archived them under, so no commit can reach
+the database file without passing through the archive. If frames could have
+been missed (the WAL was reset by someone else) a new generation is started
+from a fresh snapshot. An archiver taking over from a stopped process resumes
+the newest generation when the WAL still holds every frame after it. A database can be rebuilt as of any archived segment time.
+"""
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import struct
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from config import get_config
+
+logger = logging.getLogger(__name__)
+
+WAL_HEADER_SIZE = 32
+WAL_FRAME_HEADER_SIZE = 24
+# Magic numbers for WAL files whose checksums use little- and big-endian words
+WAL_MAGIC_LE = 0x377f0682
+WAL_MAGIC_BE = 0x377f0683
+
+ARCHIVE_DIR_NAME = 'wal_archive'
+STATE_FILE = 'state.json'
+
+
+def archive_root():
+    return Path(get_config().BACKUP_DIR) / ARCHIVE_DIR_NAME
+
+
+def wal_checksum(data, s0, s1, big_endian):
+    """Continue the WAL checksum over data (a multiple of 8 bytes)"""
+    words = struct.unpack(f"{'>' if big_endian else '<'}{len(data) // 4}I", data)
+    for x0, x1 in zip(words[0::2], words[1::2]):
+        s0 = (s0 + x0 + s1) & 0xFFFFFFFF
+        s1 = (s1 + x1 + s0) & 0xFFFFFFFF
+    return s0, s1
+
+
+def read_wal_header(wal_path):
+    """Return the parsed WAL header, or None if there is no valid header"""
+    try:
+        with open(wal_path, 'rb') as f:
+            raw = f.read(WAL_HEADER_SIZE)
+    except FileNotFoundError:
+        return None
+    if len(raw) < WAL_HEADER_SIZE:
+        return None
+    magic, version, page_size, checkpoint_seq, salt1, salt2, c0, c1 = struct.unpack('>8I', raw)
+    if magic not in (WAL_MAGIC_LE, WAL_MAGIC_BE):
+        return None
+    big_endian = magic == WAL_MAGIC_BE
+    if wal_checksum(raw[:24], 0, 0, big_endian) != (c0, c1):
+        return None
+    return {
+        'page_size': page_size,
+        'salts': (salt1, salt2),
+        'big_endian': big_endian,
+    }
+
+
+def read_committed_frames(wal_path, header, first_frame):
+    """Read frames from first_frame up to the last commit frame of the current WAL cycle
+
+    Returns (frames bytes, number of frames). The caller holds the write lock,
+    so no frame is being written; frames left over from an older cycle carry
+    different salts and end the read.
+    """
+    page_size = header['page_size']
+    frame_size = WAL_FRAME_HEADER_SIZE + page_size
+    committed, pending = [], []
+    with open(wal_path, 'rb') as f:
+        f.seek(WAL_HEADER_SIZE + first_frame * frame_size)
+        while True:
+            frame = f.read(frame_size)
+            if len(frame) < frame_size:
+                break
+            _, db_size, salt1, salt2 = struct.unpack('>4I', frame[:16])
+            if (salt1, salt2) != header['salts']:
+                break
+            pending.append(frame)
+            if db_size:
+                # Commit frame: everything up to here belongs to committed transactions
+                committed.extend(pending)
+                pending = []
+    return b''.join(committed), len(committed)
+
+
+def apply_frames(db_file, frames, page_size):
+    """Write archived frames into an open database file, truncating at each commit"""
+    frame_size = WAL_FRAME_HEADER_SIZE + page_size
+    for offset in range(0, len(frames), frame_size):
+        page_number, db_size = struct.unpack('>2I', frames[offset:offset + 8])
+        db_file.seek((page_number - 1) * page_size)
+        db_file.write(frames[offset + WAL_FRAME_HEADER_SIZE:offset + frame_size])
+        if db_size:
+            db_file.truncate(db_size * page_size)
+
+
+def list_generations(root=None):
+    """Describe every archived generation, oldest first"""
+    root = Path(root or archive_root())
+    generations = []
+    if not root.exists():
+        return generations
+    for directory in sorted(path for path in root.iterdir() if path.is_dir()):
+        meta_path = directory / 'generation.json'
+        if not meta_path.exists():
+            continue
+        meta = json.loads(meta_path.read_text())
+        segments = read_segments(directory)
+        meta.update({
+            'generation': directory.name,
+            'segments': len(segments),
+            'restorable_until': segments[-1]['archived_at'] if segments else meta['started_at'],
+        })
+        generations.append(meta)
+    return generations
+
+
+def read_segments(generation_dir):
+    index = Path(generation_dir) / 'segments.jsonl'
+    if not index.exists():
+        return []
+    with open(index) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def restore_point_in_time(target_time, output_path, root=None):
+    """Rebuild the database as of target_time into output_path
+
+    Uses the newest generation started at or before target_time and replays
+    every segment archived up to it. Returns the archived_at time reached.
+    """
+    if isinstance(target_time, str):
+        target_time = datetime.fromisoformat(target_time)
+    candidates = [g for g in list_generations(root) if datetime.fromisoformat(g['started_at']) <= target_time]
+    if not candidates:
+        raise ValueError(f"No archived generation covers {target_time.isoformat()}")
+    generation = candidates[-1]
+    generation_dir = Path(root or archive_root()) / generation['generation']
+
+    shutil.copyfile(generation_dir / 'base.db', output_path)
+    reached = generation['started_at']
+    with open(output_path, 'r+b') as db_file:
+        for segment in read_segments(generation_dir):
+            if datetime.fromisoformat(segment['archived_at']) > target_time:
+                break
+            if segment['page_size'] != generation['page_size']:
+                raise ValueError(f"Segment {segment['file']} has an unexpected page size")
+            frames = (generation_dir / segment['file']).read_bytes()
+            apply_frames(db_file, frames, segment['page_size'])
+            reached = segment['archived_at']
+    return reached
+
+
+class WalArchiver:
+    """Background thread that archives committed WAL frames of one database"""
+
+    def __init__(self, db_path, snapshot, root=None, interval=None, checkpoint_frames=None, keep_generations=None):
+        config_class = get_config()
+        self.db_path = str(db_path)
+        self.wal_path = self.db_path + '-wal'
+        # snapshot(path) writes a consistent, checked copy of the database to path
+        self.snapshot = snapshot
+        self.root = Path(root or archive_root())
+        self.interval = interval or config_class.WAL_ARCHIVE_INTERVAL
+        self.checkpoint_frames = checkpoint_frames or config_class.WAL_ARCHIVE_CHECKPOINT_FRAMES
+        self.keep_generations = keep_generations or config_class.WAL_ARCHIVE_GENERATIONS
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+        self._checkpoint_conn = None
+        self.generation_dir = None
+        self._salts = None
+        self._frame = 0
+        self._sequence = 0
+        # Set after our own checkpoint, when the next WAL cycle may start at any moment
+        self._expect_restart = False
+        self.last_error = None
+        self.lock_file = None
+
+    def start(self):
+        """Resume the newest generation or start a new one, and archive on a daemon thread"""
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # This connection keeps the WAL from being checkpointed away on close
+        self._conn.execute('PRAGMA wal_autocheckpoint = 0')
+        # Checkpoints run here while self._conn holds the write lock
+        self._checkpoint_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._checkpoint_conn.execute('PRAGMA wal_autocheckpoint = 0')
+        if not self.resume_generation():
+            self.start_generation()
+        self._thread = threading.Thread(target=self._run, name='wal-archiver', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Archive what is left, then stop the thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.archive_once()
+        self._checkpoint_conn.close()
+        self._conn.close()
+        if self.lock_file is not None:
+            self.lock_file.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.archive_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"WAL archiving failed: {e}")
+
+    def start_generation(self):
+        """Take a fresh base snapshot and archive from the current WAL cycle onwards"""
+        header = read_wal_header(self.wal_path)
+        name = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        generation_dir = self.root / name
+        generation_dir.mkdir(parents=True)
+        started_at = datetime.now()
+        self.snapshot(generation_dir / 'base.db')
+        page_size = self._conn.execute('PRAGMA page_size').fetchone()[0]
+        (generation_dir / 'generation.json').write_text(json.dumps({
+            'started_at': started_at.isoformat(),
+            'page_size': page_size,
+        }))
+        self.generation_dir = generation_dir
+        self._sequence = 0
+        # Frames already in the WAL are replayed over the snapshot; rewriting
+        # pages it already holds leaves them unchanged
+        self._salts = header['salts'] if header else None
+        self._frame = 0
+        self._expect_restart = False
+        self._save_state()
+        logger.info(f"Started WAL archive generation {name}")
+        self._prune_generations()
+
+    def resume_generation(self):
+        """Continue the newest generation if the WAL still holds every frame after it
+
+        A recycled worker process hands archiving over to another one; resuming
+        saves a full base snapshot per hand-over. Returns True if resumed.
+        """
+        generations = sorted(path for path in self.root.iterdir()
+                             if (path / STATE_FILE).exists()) if self.root.exists() else []
+        header = read_wal_header(self.wal_path)
+        if not generations or header is None:
+            return False
+        state = json.loads((generations[-1] / STATE_FILE).read_text())
+        if state['salts'] is None:
+            return False
+        salts, expect_restart = self._salts, self._expect_restart
+        self._salts, self._expect_restart = tuple(state['salts']), state['expect_restart']
+        # Same cycle, or the next one after a checkpoint of ours; anything else may have lost frames
+        if header['salts'] != self._salts and not self._is_expected_restart(header['salts']):
+            self._salts, self._expect_restart = salts, expect_restart
+            return False
+        self.generation_dir = generations[-1]
+        self._frame = state['frame']
+        self._sequence = state['sequence']
+        logger.info(f"Resumed WAL archive generation {self.generation_dir.name}")
+        return True
+
+    def _save_state(self):
+        # Replaced in one step, so a process stopping mid-write leaves the previous state
+        state_path = self.generation_dir / STATE_FILE
+        temp_path = state_path.with_suffix('.tmp')
+        temp_path.write_text(json.dumps({
+            'salts': self._salts,
+            'frame': self._frame,
+            'sequence': self._sequence,
+            'expect_restart': self._expect_restart,
+        }))
+        os.replace(temp_path, state_path)
+
+    def archive_once(self):
+        """Copy newly committed frames into a segment and checkpoint when the WAL is large"""
+        # Holding the write lock while reading means the WAL tail is complete;
+        # writers wait for as long as it takes to copy the new frames and,
+        # when due, to checkpoint them
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            header = read_wal_header(self.wal_path)
+            if header is None:
+                return 0
+            reset = header['salts'] != self._salts and not self._is_expected_restart(header['salts'])
+            if not reset:
+                if header['salts'] != self._salts:
+                    self._salts, self._frame = header['salts'], 0
+                    self._expect_restart = False
+                frames, count = read_committed_frames(self.wal_path, header, self._frame)
+                if count:
+                    self._write_segment(frames, count, header['page_size'])
+                    self._frame += count
+                    self._save_state()
+                if self._frame >= self.checkpoint_frames:
+                    self._checkpoint()
+        finally:
+            self._conn.rollback()
+
+        if reset:
+            # The WAL was reset by a checkpoint we did not run: frames may be lost
+            logger.warning("WAL was reset outside the archiver; starting a new generation")
+            self.start_generation()
+            return 0
+        return count
+
+    def _is_expected_restart(self, salts):
+        """True if a new WAL cycle directly follows one we archived completely"""
+        if self._salts is None:
+            return True
+        # salt-1 goes up by one with every WAL restart; a bigger step means a
+        # whole cycle went by unseen
+        return self._expect_restart and salts[0] == (self._salts[0] + 1) & 0xFFFFFFFF
+
+    def _write_segment(self, frames, count, page_size):
+        self._sequence += 1
+        name = f'{self._sequence:08d}.frames'
+        with open(self.generation_dir / name, 'wb') as f:
+            f.write(frames)
+            f.flush()
+            os.fsync(f.fileno())
+        # The index line is written last, so a segment only counts once it is complete
+        with open(self.generation_dir / 'segments.jsonl', 'a') as index:
+            index.write(json.dumps({
+                'file': name,
+                'archived_at': datetime.now().isoformat(),
+                'first_frame': self._frame,
+                'frames': count,
+                'page_size': page_size,
+            }) + '\n')
+
+    def _checkpoint(self):
+        """Copy the archived frames into the database; the caller holds the write lock
+
+        PASSIVE needs no write lock of its own, so it runs from a second
+        connection while self._conn keeps writers out: every frame it copies
+        has been archived. The next writer restarts the WAL, continuing the
+        salt sequence, which is how _is_expected_restart recognises it.
+        """
+        _, log_frames, checkpointed = self._checkpoint_conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchone()
+        self._expect_restart = True
+        self._save_state()
+        if checkpointed < log_frames:
+            logger.debug("WAL checkpoint could not complete; readers still active")
+
+    def _prune_generations(self):
+        generations = sorted(path for path in self.root.iterdir() if path.is_dir())
+        for old in generations[:-self.keep_generations]:
+            shutil.rmtree(old)
+            logger.info(f"Removed WAL archive generation {old.name}")
+
+
+def acquire_archive_lock(root):
+    """Take the archive directory's exclusive lock without waiting
+
+    Returns the open lock file, which holds the lock until closed, or None if
+    another process holds it. Where file locks are unavailable (Windows) the
+    application runs as a single process and the lock is always granted.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return open(os.devnull)
+    lock_file = open(Path(root) / 'archiver.lock', 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def start_wal_archiver(db_path, snapshot):
+    """Start archiving db_path if Config.WAL_ARCHIVE_ENABLED is set; returns the archiver or None
+
+    With several worker processes only the first to take the archive lock
+    archives; the others return None.
+    """
+    if not get_config().WAL_ARCHIVE_ENABLED:
+        return None
+    root = archive_root()
+    root.mkdir(parents=True, exist_ok=True)
+    lock_file = acquire_archive_lock(root)
+    if lock_file is None:
+        logger.info("Another process is archiving the WAL; not starting an archiver here")
+        return None
+    archiver = WalArchiver(db_path, snapshot, root)
+    # Kept open for the life of the archiver; closing it releases the lock
+    archiver.lock_file = lock_file
+    return archiver.start()
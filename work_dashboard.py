@@ -0,0 +1,94 @@
+"""
+Work dashboard counters for Convex Studio Inventory System
+The /work counters are read from work_summary, a per-status tally kept
+current by triggers, and from two expression indexes over the wedding and
+engagement dates normalized to day numbers. Neither read grows with the
+project history: the tally has a handful of rows, and the upcoming count
+walks only the index entries from today onwards.
+"""
+
+from datetime import date
+
+EPOCH = date(1970, 1, 1)
+
+
+def day_sql(column):
+    """SQL expression for column's date as days since 1970-01-01, NULL unless it starts YYYY-MM-DD
+
+    Deterministic, so it can back an expression index; queries must use the
+    identical expression for the planner to pick the index.
+    """
+    return (f"CASE WHEN {column} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' "
+            f"THEN CAST(julianday(substr({column}, 1, 10)) - 2440587.5 AS INTEGER) END")
+
+
+def epoch_day(day):
+    """Day number of a date, matching day_sql()"""
+    return (day - EPOCH).days
+
+
+def _has_date(column):
+    return f"(COALESCE(TRIM({column}), '') != '')"
+
+
+def init_work_summary(conn):
+    """Create work_summary, backfill it and attach the triggers that keep it current
+
+    Runs inside the caller's transaction, so no project change is missed
+    between the backfill and the triggers.
+    """
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='work_summary'")
+    if c.fetchone():
+        return
+    c.execute('''CREATE TABLE work_summary (
+        status TEXT NOT NULL,
+        has_wedding INTEGER NOT NULL,
+        has_engagement INTEGER NOT NULL,
+        project_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (status, has_wedding, has_engagement)
+    ) WITHOUT ROWID''')
+    c.execute(f'''INSERT INTO work_summary (status, has_wedding, has_engagement, project_count)
+        SELECT COALESCE(status, ''), {_has_date('wedding_date')}, {_has_date('engagement_date')}, COUNT(*)
+        FROM work_projects
+        GROUP BY 1, 2, 3''')
+
+    key = lambda row: (f"COALESCE({row}.status, '')", _has_date(f'{row}.wedding_date'),
+                       _has_date(f'{row}.engagement_date'))
+    add_new = '''
+        INSERT INTO work_summary (status, has_wedding, has_engagement, project_count)
+        VALUES ({0}, {1}, {2}, 1)
+        ON CONFLICT (status, has_wedding, has_engagement) DO UPDATE SET project_count = project_count + 1;'''.format(*key('NEW'))
+    remove_old = '''
+        UPDATE work_summary SET project_count = project_count - 1
+        WHERE status = {0} AND has_wedding = {1} AND has_engagement = {2};
+        DELETE FROM work_summary
+        WHERE status = {0} AND has_wedding = {1} AND has_engagement = {2} AND project_count <= 0;'''.format(*key('OLD'))
+    c.execute(f'''CREATE TRIGGER work_summary_insert AFTER INSERT ON work_projects BEGIN {add_new} END''')
+    c.execute(f'''CREATE TRIGGER work_summary_delete AFTER DELETE ON work_projects BEGIN {remove_old} END''')
+    c.execute(f'''CREATE TRIGGER work_summary_update
+        AFTER UPDATE OF status, wedding_date, engagement_date ON work_projects
+        BEGIN {remove_old} {add_new} END''')
+
+
+def dashboard_counters(conn, today=None):
+    """Return the /work counters: wedding, engagement, upcoming, active and active wedding projects"""
+    wedding_count, engagement_count, active_count, active_wedding_count = conn.execute('''SELECT
+            COALESCE(SUM(CASE WHEN has_wedding THEN project_count END), 0),
+            COALESCE(SUM(CASE WHEN has_engagement THEN project_count END), 0),
+            COALESCE(SUM(CASE WHEN status = 'Active' THEN project_count END), 0),
+            COALESCE(SUM(CASE WHEN status = 'Active' AND has_wedding THEN project_count END), 0)
+        FROM work_summary''').fetchone()
+    # A project counts once even if both of its dates are ahead; each branch is an index range scan
+    upcoming_count = conn.execute(f'''SELECT COUNT(*) FROM (
+            SELECT id FROM work_projects WHERE {day_sql('wedding_date')} >= :today
+            UNION
+            SELECT id FROM work_projects WHERE {day_sql('engagement_date')} >= :today
+        )''', {'today': epoch_day(today or date.today())}).fetchone()[0]
+    return {
+        'wedding_count': wedding_count,
+        'engagement_count': engagement_count,
+        'upcoming_count': upcoming_count,
+        'active_count': active_count,
+        'active_wedding_count': active_wedding_count,
+    }
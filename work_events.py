@@ -0,0 +1,109 @@
+"""
+Work project calendar for Convex Studio Inventory System
+The wedding, engagement, save-the-date and maduaram veypu dates are free text
+on work_projects. work_project_events holds each parseable one as a typed row
+(project, kind, day number), kept in step by triggers and indexed by day, so
+"what is happening between these dates" is one index range scan.
+"""
+
+from datetime import date, timedelta
+
+from work_dashboard import EPOCH, day_sql, epoch_day
+
+# event kind -> work_projects column holding its date
+EVENT_COLUMNS = {
+    'wedding': 'wedding_date',
+    'engagement': 'engagement_date',
+    'save_the_date': 'save_the_date',
+    'maduaram_veypu': 'maduaram_veypu_date',
+}
+
+# Longest window one calendar request may cover
+MAX_WINDOW_DAYS = 366
+
+
+def _event_values(row):
+    """VALUES rows of (kind, day number) for the event dates of a trigger row, NEW or OLD"""
+    return 'VALUES ' + ', '.join(f"('{kind}', {day_sql(f'{row}.{column}')})" for kind, column in EVENT_COLUMNS.items())
+
+
+def init_work_events(conn):
+    """Create work_project_events, backfill it from work_projects and install the sync triggers
+
+    Runs inside the caller's transaction.
+    """
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='work_project_events'")
+    if c.fetchone():
+        return
+    c.execute('''CREATE TABLE work_project_events (
+        project_id INTEGER NOT NULL,
+        event_kind TEXT NOT NULL,
+        day INTEGER NOT NULL,
+        PRIMARY KEY (project_id, event_kind),
+        FOREIGN KEY (project_id) REFERENCES work_projects(id)
+    ) WITHOUT ROWID''')
+    # Dates that do not start YYYY-MM-DD have a NULL day number and get no event
+    for kind, column in EVENT_COLUMNS.items():
+        c.execute(f'''INSERT INTO work_project_events (project_id, event_kind, day)
+            SELECT id, ?, day FROM (SELECT id, {day_sql(column)} AS day FROM work_projects)
+            WHERE day IS NOT NULL''', (kind,))
+
+    add_new = f'''INSERT INTO work_project_events (project_id, event_kind, day)
+        SELECT NEW.id, column1, column2 FROM ({_event_values('NEW')}) WHERE column2 IS NOT NULL;'''
+    columns = ', '.join(EVENT_COLUMNS.values())
+    c.execute(f'''CREATE TRIGGER work_project_events_insert AFTER INSERT ON work_projects BEGIN
+        {add_new}
+    END''')
+    c.execute('''CREATE TRIGGER work_project_events_delete AFTER DELETE ON work_projects BEGIN
+        DELETE FROM work_project_events WHERE project_id = OLD.id;
+    END''')
+    c.execute(f'''CREATE TRIGGER work_project_events_update AFTER UPDATE OF id, {columns} ON work_projects BEGIN
+        DELETE FROM work_project_events WHERE project_id = OLD.id;
+        {add_new}
+    END''')
+
+
+def parse_window(start, end):
+    """Validate a calendar window given as ISO dates; returns (start, end) as dates
+
+    Raises ValueError for missing or malformed dates, an end before the
+    start or a window longer than MAX_WINDOW_DAYS.
+    """
+    try:
+        start, end = date.fromisoformat(start or ''), date.fromisoformat(end or '')
+    except ValueError:
+        raise ValueError('start and end must be dates as YYYY-MM-DD')
+    if end < start:
+        raise ValueError('end must not be before start')
+    if (end - start).days >= MAX_WINDOW_DAYS:
+        raise ValueError(f'the window may cover at most {MAX_WINDOW_DAYS} days')
+    return start, end
+
+
+def events_between(conn, start, end, kinds=None):
+    """Return the events from start to end inclusive, in date order
+
+    kinds optionally limits the result to some keys of EVENT_COLUMNS;
+    raises ValueError for an unknown kind.
+    """
+    params = [epoch_day(start), epoch_day(end)]
+    kind_clause = ''
+    if kinds:
+        unknown = [kind for kind in kinds if kind not in EVENT_COLUMNS]
+        if unknown:
+            raise ValueError(f"kind must be among {', '.join(EVENT_COLUMNS)}")
+        kind_clause = f" AND e.event_kind IN ({','.join('?' for _ in kinds)})"
+        params.extend(kinds)
+    rows = conn.execute(f'''SELECT e.day, e.event_kind, p.id, p.client_name, p.status
+        FROM work_project_events e
+        JOIN work_projects p ON p.id = e.project_id
+        WHERE e.day BETWEEN ? AND ?{kind_clause}
+        ORDER BY e.day, e.event_kind, e.project_id''', params).fetchall()
+    return [{
+        'date': (EPOCH + timedelta(days=day)).isoformat(),
+        'kind': kind,
+        'project_id': project_id,
+        'client_name': client_name,
+        'status': status,
+    } for day, kind, project_id, client_name, status in rows]
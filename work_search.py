@@ -0,0 +1,101 @@
+"""
+Full-text search over work projects for Convex Studio Inventory System
+work_projects_fts is an external-content FTS5 index over the searchable
+columns of work_projects, kept in step by triggers. Searches match word
+prefixes, rank with bm25 (a client name hit outweighs a hit in the notes)
+and return highlighted snippets.
+"""
+
+import html
+import re
+
+SEARCH_COLUMNS = ('client_name', 'referred_by', 'notes', 'requirements', 'services')
+
+# bm25 weights, in SEARCH_COLUMNS order
+COLUMN_WEIGHTS = (10.0, 4.0, 1.0, 2.0, 2.0)
+
+MAX_RESULTS = 50
+
+# Highlight markers that cannot occur in user text; swapped for <mark> after escaping
+_OPEN, _CLOSE = '\x02', '\x03'
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def init_work_search(conn):
+    """Create the FTS index, fill it from work_projects and install the sync triggers
+
+    Runs inside the caller's transaction.
+    """
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='work_projects_fts'")
+    if c.fetchone():
+        return
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'NEW.{column}' for column in SEARCH_COLUMNS)
+    old_values = ', '.join(f'OLD.{column}' for column in SEARCH_COLUMNS)
+    c.execute(f'''CREATE VIRTUAL TABLE work_projects_fts USING fts5(
+        {columns},
+        content='work_projects', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )''')
+    c.execute("INSERT INTO work_projects_fts (work_projects_fts) VALUES ('rebuild')")
+
+    # External-content tables are told about every change, removals with the old values
+    c.execute(f'''CREATE TRIGGER work_projects_fts_insert AFTER INSERT ON work_projects BEGIN
+        INSERT INTO work_projects_fts (rowid, {columns}) VALUES (NEW.id, {new_values});
+    END''')
+    c.execute(f'''CREATE TRIGGER work_projects_fts_delete AFTER DELETE ON work_projects BEGIN
+        INSERT INTO work_projects_fts (work_projects_fts, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});
+    END''')
+    c.execute(f'''CREATE TRIGGER work_projects_fts_update AFTER UPDATE OF {columns} ON work_projects BEGIN
+        INSERT INTO work_projects_fts (work_projects_fts, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});
+        INSERT INTO work_projects_fts (rowid, {columns}) VALUES (NEW.id, {new_values});
+    END''')
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix
+
+    Words are quoted, so FTS5 operators typed by the user are taken literally.
+    Returns None when the text has no searchable words.
+    """
+    terms = _TERM.findall(text or '')
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _marked_html(text):
+    """HTML-escape FTS output and turn the highlight markers into <mark> tags"""
+    if text is None:
+        return None
+    return html.escape(text).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def search_projects(conn, text, limit=20):
+    """Return the best-matching projects for text, best first, with highlights"""
+    expression = match_expression(text)
+    if expression is None:
+        return []
+    limit = max(1, min(int(limit), MAX_RESULTS))
+    weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+    rows = conn.execute(f'''SELECT p.id, p.client_name, p.wedding_date, p.engagement_date, p.status,
+               highlight(work_projects_fts, 0, ?, ?),
+               snippet(work_projects_fts, -1, ?, ?, '…', 12),
+               bm25(work_projects_fts, {weights}) AS rank
+        FROM work_projects_fts
+        JOIN work_projects p ON p.id = work_projects_fts.rowid
+        WHERE work_projects_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?''', (_OPEN, _CLOSE, _OPEN, _CLOSE, expression, limit)).fetchall()
+    return [{
+        'id': project_id,
+        'client_name': client_name,
+        'client_name_html': _marked_html(client_name_marked),
+        'snippet_html': _marked_html(snippet),
+        'wedding_date': wedding_date,
+        'engagement_date': engagement_date,
+        'status': status,
+        'rank': round(rank, 4),
+    } for project_id, client_name, wedding_date, engagement_date, status, client_name_marked, snippet, rank in rows]
@@ -0,0 +1,8 @@
+"""
+WSGI entry point for Convex Studio Inventory System
+Serve with a preforking server, e.g. gunicorn --config gunicorn.conf.py wsgi:app
+"""
+
+from app import create_app
+
+app = create_app()